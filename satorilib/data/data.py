@@ -18,6 +18,8 @@ stretch:
     we should think about writing a SqliteManager module next to the CSVManager
         at the disk api level, allowing the DataService to use that
     this would require that data always be saved in the sqlite database instead.
+    (satorilib.disk.SqliteStreamStore keeps every stream in one such database,
+        SqliteCache puts the Cache api in front of it)
 '''
 
 # from satorilib.disk import something
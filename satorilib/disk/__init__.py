@@ -3,6 +3,10 @@ from satorilib.disk.model import ModelApi
 from satorilib.disk.wallet import WalletApi
 from satorilib.disk.utils import safetify, safetifyWithResult
 from satorilib.disk.filetypes.csv import CSVManager
+from satorilib.disk.filetypes.binary import BinaryManager
 from satorilib.disk.disk import Disk
 from satorilib.disk.cache import Cache, Cached
 from satorilib.disk.memory import getHashBefore
+from satorilib.disk.registry import CacheRegistry
+from satorilib.disk.filetypes.streamstore import SqliteStreamStore
+from satorilib.disk.sqlitecache import SqliteCache
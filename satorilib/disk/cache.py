@@ -2,6 +2,9 @@
 
 from typing import Union
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 from satorilib import logging
 from satorilib.concepts import StreamId
@@ -13,6 +16,8 @@ from satorilib.disk.utils import safetify, safetifyWithResult
 from satorilib.disk.model import ModelApi
 from satorilib.disk.wallet import WalletApi
 from satorilib.disk.filetypes.csv import CSVManager
+from satorilib.disk.checkpoint import Checkpoints
+from satorilib.disk import timeindex
 from satorilib.concepts import Observation
 
 
@@ -38,6 +43,11 @@ class Cache(Disk):
     ''' single point of contact for interacting with disk '''
 
     config = None
+    checkpointInterval = 10000
+    gatherWorkers = 8
+    gatheredLimit = 16
+    _gathered: OrderedDict = OrderedDict()
+    _gatheredLock = threading.Lock()
 
     @classmethod
     def setConfig(cls, config):
@@ -57,10 +67,67 @@ class Cache(Disk):
         self.loadCache()
         self.checkedHash = ''
         self.checkedIndex = None
+        self._checkpoints = None
+        self._validatedFrom = 0
 
     def __str__(self):
         return f'Cache({self.id}, {self.df.tail()})'
 
+    @property
+    def df(self) -> pd.DataFrame:
+        ''' the in memory frame, folding in any rows appended to the tail '''
+        if self.unloaded:
+            self.unloaded = False
+            self.loadCache()
+        if len(self._tail) > 0:
+            tail = pd.DataFrame(
+                {
+                    'value': [value for _, value, _ in self._tail],
+                    'hash': [rowHash for _, _, rowHash in self._tail]},
+                index=pd.Index(
+                    [timestamp for timestamp, _, _ in self._tail],
+                    name=self._df.index.name))
+            self._tail = []
+            self._df = pd.concat([self._df, tail])
+        return self._df
+
+    @df.setter
+    def df(self, value: pd.DataFrame):
+        self._tail = []
+        self._times = None
+        self.unloaded = False
+        self._df = value
+
+    def unload(self):
+        ''' drops the frame from memory, it's read again on next access '''
+        self.df = pd.DataFrame()
+        self.unloaded = True
+
+    def memoryUsage(self) -> int:
+        ''' approximate bytes held by the in memory frame '''
+        if self.unloaded:
+            return 0
+        return int(self.df.memory_usage(deep=True).sum())
+
+    @property
+    def times(self) -> timeindex.TimeIndex:
+        ''' parsed timestamps of self.df, built once and extended on append '''
+        if self._times is None or self._times.size != self._rowCount():
+            self._times = timeindex.TimeIndex(self.df.index)
+        return self._times
+
+    def _rowCount(self) -> int:
+        if self.unloaded:
+            return 0
+        return self._df.shape[0] + len(self._tail)
+
+    def _lastRow(self) -> tuple[int, str, str]:
+        ''' position, index and hash of the last row without compacting '''
+        if len(self._tail) > 0:
+            timestamp, _, rowHash = self._tail[-1]
+            return self._rowCount() - 1, timestamp, rowHash
+        return self._df.shape[0] - 1, self._df.index[-1], self._df['hash'].values[-1]
+
     ### passthru ###
 
     def clearCache(self):
@@ -124,19 +191,20 @@ class Cache(Disk):
         after: bool = False,
         exact: bool = False
     ) -> pd.DataFrame:
+        ''' rows before, after or at a time, binary searched, as a slice '''
         if (
             not isinstance(time, str) or
             not any([before, after, exact]) or
             self.df is None
         ):
             return None
-        if before:
-            return self.df[self.df.index < time]
-        if after:
-            return self.df[self.df.index > time]
-        if exact:
-            return self.df[self.df.index == time]
-        return None
+        return timeindex.search(
+            self.df,
+            time=time,
+            before=before,
+            after=after,
+            exact=exact,
+            times=self.times)
 
     ### helpers ###
 
@@ -167,6 +235,15 @@ class Cache(Disk):
     def exists(self, filename: str = None):
         return os.path.exists(self.path(filename=filename))
 
+    @property
+    def checkpoints(self) -> Checkpoints:
+        ''' verified-prefix checkpoints kept next to the aggregate file '''
+        if self._checkpoints is None:
+            self._checkpoints = Checkpoints(
+                filePath=self.path(filename='checkpoint.json'),
+                interval=self.checkpointInterval)
+        return self._checkpoints
+
     def hashDataFrame(self, df: pd.DataFrame = None, priorRowHash: str = '') -> pd.DataFrame:
         ''' first we have to flattent the columns, then rename them '''
         return historyHashes(
@@ -248,10 +325,15 @@ class Cache(Disk):
             data=self.updateCache(df))
 
     def write(self, df: pd.DataFrame = None) -> bool:
-        return self.csv.write(
+        success = self.csv.write(
             filePath=self.path(),
             data=self.updateCache(self.hashDataFrame(
                 self.updateCache(df) if df is not None else self.df)))
+        if success:
+            # we just hashed the whole chain ourselves, so all of it is verified
+            self.checkpoints.reset()
+            self.checkpoints.extend(self.df)
+        return success
 
     def merge(self, df: pd.DataFrame) -> bool:
         ''' appends to the end of the file while also hashing '''
@@ -305,15 +387,23 @@ class Cache(Disk):
         returns success and timestamp and observationHash
         '''
         timestamp = timestamp or datetimeToTimestamp(now())
+        if self._isTail(timestamp):
+            return self._appendToTail(
+                value=value,
+                timestamp=timestamp,
+                observationHash=observationHash,
+                hashThis=hashThis)
         if timestamp in self.df.index:
             return CachedResult(
                 success=False,
                 time=timestamp,
                 hash=observationHash,
                 data=value)
-        observationHash = observationHash or (
-            hashIt(self.getHashBefore(timestamp) + str(timestamp) + str(value))
-            if hashThis else '')
+        chainedHash = None
+        if hashThis or observationHash:
+            chainedHash = hashIt(
+                self.getHashBefore(timestamp) + str(timestamp) + str(value))
+        observationHash = observationHash or (chainedHash if hashThis else '')
         df = pd.DataFrame(
             {'value': [value], 'hash': [observationHash]},
             index=[timestamp])
@@ -326,10 +416,93 @@ class Cache(Disk):
                     hash=observationHash,
                     data=value,
                     validated=True)
+        if observationHash != '' and observationHash == chainedHash:
+            success = self._insertIntoChain(df)
+        else:
+            success = self.csv.append(
+                filePath=self.path(),
+                data=self.updateCacheShowDifference(pd.concat([self.df, df])))
+        validated, validatedFrame = self.performValidation()
+        return CachedResult(
+            time=timestamp,
+            data=value,
+            hash=observationHash,
+            success=success,
+            validated=validated,
+            validatedFrame=validatedFrame)
+
+    def _insertIntoChain(self, df: pd.DataFrame) -> bool:
+        '''
+        inserts a row that chains onto the one before it. every hashed row
+        after it chained onto its predecessor too, so they're rehashed from it
+        rather than left broken (validation would remove them otherwise).
+        checkpoints past the insert no longer hold since positions shifted.
+        '''
+        self.updateCache(pd.concat([self.df, df]))
+        position = self.df.index.get_loc(df.index[0])
+        after = self.df.iloc[position + 1:]
+        if not any(
+            isinstance(rowHash, str) and rowHash != ''
+            for rowHash in after['hash'].values
+        ):
+            return self.csv.append(filePath=self.path(), data=df)
+        self.df = pd.concat([
+            self.df.iloc[:position + 1],
+            self.hashDataFrame(
+                df=after.copy(),
+                priorRowHash=df['hash'].values[0])])
+        return self.csv.write(filePath=self.path(), data=self.df)
+
+    def _isTail(self, timestamp: str) -> bool:
+        ''' true if the timestamp comes after everything we have '''
+        if self.unloaded:
+            self.df  # evicted by the registry, read it back in first
+        if self._rowCount() == 0 or 'hash' not in self._df.columns:
+            return False
+        _, lastTimestamp, _ = self._lastRow()
+        return (
+            isinstance(timestamp, str) and
+            isinstance(lastTimestamp, str) and
+            timestamp > lastTimestamp)
+
+    def _appendToTail(
+        self,
+        value: str,
+        timestamp: str,
+        observationHash: str = None,
+        hashThis: bool = False,
+    ) -> CachedResult:
+        '''
+        the common case, an observation newer than our last row: one row goes
+        to disk and onto the tail buffer, the hash chain is extended from the
+        last hash and the frame is only rebuilt when someone reads self.df.
+        out of order observations take the merge path in appendByAttributes.
+        '''
+        position, lastTimestamp, lastHash = self._lastRow()
+        chainedHash = None
+        if hashThis or observationHash:
+            # a row stored without a hash reads back as NaN
+            priorHash = lastHash if isinstance(lastHash, str) else ''
+            chainedHash = hashIt(priorHash + str(timestamp) + str(value))
+        observationHash = observationHash or (chainedHash if hashThis else '')
         success = self.csv.append(
             filePath=self.path(),
-            data=self.updateCacheShowDifference(pd.concat([self.df, df]))),
-        validated, validatedFrame = self.performValidation()
+            data=pd.DataFrame(
+                {'value': [value], 'hash': [observationHash]},
+                index=[timestamp]))
+        self._tail.append((timestamp, value, observationHash))
+        if self._times is not None:
+            self._times.append(timestamp)
+        if (
+            chainedHash is not None and
+            observationHash == chainedHash and
+            self.checkpoints.isTip(position, lastTimestamp, lastHash)
+        ):
+            # everything before was verified and this row chains onto it
+            self._validatedFrom = position + 1
+            validated, validatedFrame = True, None
+        else:
+            validated, validatedFrame = self.performValidation()
         return CachedResult(
             time=timestamp,
             data=value,
@@ -339,49 +512,76 @@ class Cache(Disk):
             validatedFrame=validatedFrame)
 
     def performValidation(self, entire: bool = False) -> tuple[bool, Union[pd.DataFrame, None]]:
-        ''' validates the hashes (efficiently using cached) returns results'''
+        '''
+        validates the hashes (efficiently using checkpoints) returns results.
+        only the rows after the nearest checkpoint that still holds are checked,
+        the checkpoints survive restarts since they're saved next to the data.
+        '''
         if self.df.empty:
             return True, None
         if entire:
-            success, df = self.validateAllHashes()
-        else:
-            success, df = self.validateAllHashes(
-                df=(self.df[self.df.index > self.checkedIndex]
-                    if self.checkedIndex is not None else None),
-                priorRowHash=self.checkedHash)
+            self.checkpoints.reset()
+        start, priorRowHash = self.checkpoints.verified(self.df)
+        self._validatedFrom = start
+        if start >= self.df.shape[0]:
+            return True, None
+        success, df = self.validateAllHashes(
+            df=self.df.iloc[start:],
+            priorRowHash=priorRowHash)
+        if not success and df is None and start > 0:
+            # broke on the first unchecked row, so the checkpoint is the last good
+            df = self.df.iloc[[start - 1]]
         return success, df
 
     def modifyBasedValidation(self, success: bool, df: Union[pd.DataFrame, None] = None):
         ''' modification done separately '''
         if success:
-            self.checkedHash = self.df.iloc[-1].hash
-            self.checkedIndex = self.df.index[-1]
+            if self._rowCount() > 0:
+                self._checkpointFrom(self._validatedFrom)
+                _, self.checkedIndex, self.checkedHash = self._lastRow()
         else:
             # logging.debug('validation failed', df, color='yellow')
             if df is None or df.empty:
+                self.checkpoints.reset()
+                self.checkpoints.save()
                 self.checkedHash = ''
                 self.checkedIndex = None
             else:
                 self.removeItAndAfter(df.index[-1])
                 self.checkedHash = df.iloc[-1].hash
                 self.checkedIndex = df.index[-1]
+        self._validatedFrom = 0
         return success
 
+    def _checkpointFrom(self, start: int):
+        ''' marks rows from start on as verified, avoiding compaction if we can '''
+        offset = self._df.shape[0]
+        if start < offset:
+            return self.checkpoints.extend(self.df, start=start)
+        return self.checkpoints.advance([
+            (offset + i, timestamp, rowHash)
+            for i, (timestamp, _, rowHash) in enumerate(self._tail)
+            if offset + i >= start])
+
     def clear(self) -> Union[bool, None]:
         self.updateCacheSimple(self.df[0:0])
         self.csv.write(filePath=self.path(), data=self.df)
+        self.checkpoints.truncate(self.df)
 
     def remove(self) -> Union[bool, None]:
         self.csv.remove(filePath=self.path())
+        self.checkpoints.remove()
         self.clearCache()
 
     def removeItAndAfter(self, timestamp) -> Union[bool, None]:
         self.updateCacheSimple(self.df[self.df.index < timestamp])
         self.csv.write(filePath=self.path(), data=self.df)
+        self.checkpoints.truncate(self.df)
 
     def removeItAndBefore(self, timestamp) -> Union[bool, None]:
         self.updateCacheSimple(self.df[self.df.index > timestamp])
         self.csv.write(filePath=self.path(), data=self.df)
+        self.checkpoints.truncate(self.df)
 
     ### read ###
 
@@ -423,7 +623,7 @@ class Cache(Disk):
         rows = self.search(time, before=True)
         if rows is None or rows.empty:
             return ''
-        return rows.iloc[-1].hash
+        return rows['hash'].values[-1]
 
     def getObservationAfter(self, time: str) -> pd.DataFrame:
         ''' gets the observation just after a given time '''
@@ -450,8 +650,50 @@ class Cache(Disk):
         targetColumn: 'str|tuple[str]',
         streamIds: list[StreamId] = None,
     ) -> pd.DataFrame:
-        ''' retrieves the targets and merges them '''
-        streamIds = streamIds or [
+        '''
+        retrieves the targets and merges them. the stream files are loaded
+        concurrently, each index is parsed once, and they're aligned in a
+        single k-way asof merge. the aligned frame is kept (keyed by the stream
+        set and what each file last saw) so asking again before any of them
+        changes doesn't touch disk beyond reading their tails.
+        '''
+        streamIds = self._streamIdsOr(streamIds)
+        # the same stream can live under another folder or format
+        key = (self.loc, self.ext, tuple(streamIds), targetColumn)
+        lastSeen = tuple(self._lastSeenOf(streamId) for streamId in streamIds)
+        with Cache._gatheredLock:
+            if key in Cache._gathered and Cache._gathered[key][0] == lastSeen:
+                Cache._gathered.move_to_end(key)
+                return Cache._gathered[key][1].copy()
+        dfs = self._loadAllForGather(streamIds)
+        if len(dfs) == 0:
+            return None
+        gathered = (
+            dfs[0] if len(dfs) == 1
+            else self.memory.merge(dfs=dfs, targetColumn=targetColumn))
+        with Cache._gatheredLock:
+            Cache._gathered[key] = (lastSeen, gathered)
+            Cache._gathered.move_to_end(key)
+            while len(Cache._gathered) > Cache.gatheredLimit:
+                Cache._gathered.popitem(last=False)
+        return gathered.copy()
+
+    def gatherAligned(
+        self,
+        targetColumn: 'str|tuple[str]',
+        streamIds: list[StreamId] = None,
+    ) -> Union[memory.AlignedMemory, None]:
+        '''
+        what gather returns, as an AlignedMemory to keep up to date with each
+        new observation (update) instead of gathering again every tick.
+        '''
+        dfs = self._loadAllForGather(self._streamIdsOr(streamIds))
+        if len(dfs) == 0:
+            return None
+        return self.memory.aligned(dfs=dfs, targetColumn=targetColumn)
+
+    def _streamIdsOr(self, streamIds: list[StreamId] = None) -> list[StreamId]:
+        return streamIds or [
             self.id or
             StreamId(
                 source=self.df.columns.levels[0],
@@ -460,23 +702,61 @@ class Cache(Disk):
                 target=(
                     self.df.columns.levels[3]
                     if len(self.df.columns.levels) == 4 else None))]
-        dfs = []
-        for streamId in streamIds:
-            df = (self if streamId == self.id else Cache(id=streamId)).read()
-            if df is None:
-                continue
-            dfs.append(self.memory.expand(df=df, streamId=streamId))
-        if len(dfs) == 0:
+
+    def _loadAllForGather(self, streamIds: list[StreamId]) -> list[pd.DataFrame]:
+        ''' the streams that exist, read concurrently '''
+        with ThreadPoolExecutor(
+            max_workers=min(self.gatherWorkers, len(streamIds))
+        ) as pool:
+            loaded = list(pool.map(self._loadForGather, streamIds))
+        return [df for df in loaded if df is not None]
+
+    def _pathOf(self, streamId: StreamId) -> str:
+        ''' the aggregate path of another stream, without building a Cache '''
+        if streamId == self.id:
+            return self.path()
+        return os.path.join(
+            self.loc or Cache.config.dataPath(),
+            generatePathId(streamId=streamId),
+            f'aggregate.{self.ext}')
+
+    def _lastSeenOf(self, streamId: StreamId) -> Union[tuple[str, int], None]:
+        ''' last timestamp and size on disk, enough to know if it changed '''
+        filePath = self._pathOf(streamId)
+        if not os.path.exists(filePath):
+            return None
+        tail = self.csv.tail(filePath)
+        return (
+            tail.index[-1] if tail is not None and not tail.empty else None,
+            (
+                os.path.getsize(filePath) if os.path.isfile(filePath)
+                else self.csv.count(filePath)))
+
+    def _loadForGather(self, streamId: StreamId) -> Union[pd.DataFrame, None]:
+        filePath = self._pathOf(streamId)
+        if streamId == self.id and not self.df.empty:
+            df = self.df.copy()
+        elif os.path.exists(filePath):
+            df = self.csv.read(filePath=filePath)
+        else:
+            df = None
+        if df is None:
             return None
-        if len(dfs) == 1:
-            return dfs[0]
-        return self.memory.merge(dfs=dfs, targetColumn=targetColumn)
+        return self.memory.expand(df=df, streamId=streamId)
 
 
 class Cached:
-    '''requires self.streamId attribute to be set'''
+    '''
+    requires self.streamId attribute to be set
+    if a CacheRegistry is set on the class, caches come from it rather than
+    from the neuron's start singleton.
+    '''
+
+    registry = None
 
     def diskOf(self, streamId: StreamId) -> Cache:
+        if Cached.registry is not None:
+            return Cached.registry.get(streamId)
         if not hasattr(self, '_diskOf') or self._diskOf is None or streamId != self._diskOf.id:
             from satorineuron.init.start import getStart
             self._diskOf = getStart().cacheOf(streamId)
@@ -484,6 +764,8 @@ class Cached:
 
     @property
     def disk(self):
+        if Cached.registry is not None:
+            return Cached.registry.get(self.streamId)
         if not hasattr(self, '_disk') or self._disk is None or self.streamId != self._disk.id:
             # circular import if outside this function. but it's ok here because
             # we take care to never call this function on imports or inits. and
@@ -0,0 +1,128 @@
+''' verified-prefix checkpoints of a stream's hash chain, persisted to disk '''
+
+from typing import Union
+import os
+import json
+import pandas as pd
+from satorilib.disk.utils import safetify
+
+
+class Checkpoints():
+    '''
+    remembers how much of a hash chain has already been verified so we don't
+    have to walk the entire history again after a restart, an append or an
+    insert. we keep the tip (the last verified row) and an anchor every
+    `interval` rows. each one is a (position, index, hash) triple: a
+    checkpoint is only trusted if the row at that position still has that
+    index and that hash, so any insert or removal before it (which shifts
+    positions) or any rehash (which changes hashes) invalidates it, and we
+    fall back to the nearest anchor that is still intact.
+    '''
+
+    def __init__(self, filePath: str, interval: int = 10000):
+        self.filePath = filePath
+        self.interval = interval
+        self.tip: Union[tuple[int, str, str], None] = None
+        self.anchors: list[tuple[int, str, str]] = []
+        self.loaded = False
+
+    @staticmethod
+    def _holds(df: pd.DataFrame, checkpoint: tuple[int, str, str]) -> bool:
+        position, index, rowHash = checkpoint
+        return (
+            0 <= position < df.shape[0] and
+            str(df.index[position]) == index and
+            df['hash'].values[position] == rowHash)
+
+    def load(self) -> 'Checkpoints':
+        self.loaded = True
+        if not os.path.exists(self.filePath):
+            return self
+        try:
+            with open(self.filePath, mode='r') as f:
+                saved = json.load(f)
+            self.tip = tuple(saved['tip']) if saved.get('tip') else None
+            self.anchors = [tuple(anchor) for anchor in saved.get('anchors', [])]
+        except Exception as _:
+            self.tip = None
+            self.anchors = []
+        return self
+
+    def save(self) -> bool:
+        try:
+            with open(safetify(self.filePath), mode='w') as f:
+                json.dump({'tip': self.tip, 'anchors': self.anchors}, f)
+            return True
+        except Exception as _:
+            return False
+
+    def remove(self):
+        self.tip = None
+        self.anchors = []
+        if os.path.exists(self.filePath):
+            os.remove(self.filePath)
+
+    def reset(self):
+        self.tip = None
+        self.anchors = []
+
+    def verified(self, df: pd.DataFrame) -> tuple[int, str]:
+        '''
+        returns the position of the first row that still needs checking and the
+        hash to chain it from, dropping any checkpoints that no longer hold.
+        '''
+        if not self.loaded:
+            self.load()
+        if df is None or df.empty or 'hash' not in df.columns:
+            self.reset()
+            return 0, ''
+        if self.tip is not None and self._holds(df, self.tip):
+            return self.tip[0] + 1, self.tip[2]
+        self.tip = None
+        while len(self.anchors) > 0:
+            if self._holds(df, self.anchors[-1]):
+                self.tip = self.anchors[-1]
+                return self.tip[0] + 1, self.tip[2]
+            self.anchors.pop()
+        return 0, ''
+
+    def extend(self, df: pd.DataFrame, start: int = 0) -> bool:
+        ''' records rows from start to the end of df as verified and saves '''
+        if df is None or df.empty or start >= df.shape[0]:
+            return False
+        hashes = df['hash'].values
+        # anchors from start on are recorded again below, don't double them
+        self.anchors = [anchor for anchor in self.anchors if anchor[0] < start]
+        first = start + (-(start + 1) % self.interval)
+        for position in range(first, df.shape[0], self.interval):
+            self.anchors.append(
+                (position, str(df.index[position]), hashes[position]))
+        last = df.shape[0] - 1
+        self.tip = (last, str(df.index[last]), hashes[last])
+        return self.save()
+
+    def isTip(self, position: int, index: str, rowHash: str) -> bool:
+        ''' true if the chain is verified up to and including this row '''
+        if not self.loaded:
+            self.load()
+        return self.tip is not None and self.tip == (position, str(index), rowHash)
+
+    def advance(self, rows: list[tuple[int, str, str]]) -> bool:
+        '''
+        records rows just past the tip as verified without needing the whole
+        frame, rows are (position, index, hash) triples in order.
+        '''
+        if len(rows) == 0:
+            return False
+        self.anchors = [anchor for anchor in self.anchors if anchor[0] < rows[0][0]]
+        for position, index, rowHash in rows:
+            if (position + 1) % self.interval == 0:
+                self.anchors.append((position, str(index), rowHash))
+        position, index, rowHash = rows[-1]
+        self.tip = (position, str(index), rowHash)
+        return self.save()
+
+    def truncate(self, df: pd.DataFrame) -> bool:
+        ''' keeps only the checkpoints that still hold after rows were removed '''
+        self.verified(df)
+        return self.save()
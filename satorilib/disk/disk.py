@@ -12,6 +12,7 @@ from satorilib.disk.utils import safetify, safetifyWithResult
 from satorilib.disk.model import ModelApi
 from satorilib.disk.wallet import WalletApi
 from satorilib.disk.filetypes.csv import CSVManager
+from satorilib.disk.filetypes.binary import BinaryManager
 
 
 class Disk(ModelDataDiskApi):
@@ -34,7 +35,8 @@ class Disk(ModelDataDiskApi):
         **kwargs,
     ):
         self.memory = memory.Memory
-        self.csv = CSVManager()
+        # the file manager is chosen by extension, csv unless told otherwise
+        self.csv = BinaryManager() if ext == 'bin' else CSVManager()
         self.setAttributes(df=df, id=id, loc=loc, ext=ext, **kwargs)
 
     def setAttributes(
@@ -0,0 +1,269 @@
+from typing import Union
+import os
+import shutil
+import binascii
+import numpy as np
+import pandas as pd
+from satorilib.interfaces.data import FileManager
+from satorilib import logging
+
+
+class BinaryManager(FileManager):
+    '''
+    manages reading and writing to an append-only binary columnar store.
+
+    the filePath is a directory of segment files, each one a plain array of
+    fixed-width records: int64 nanosecond timestamp, float64 value and the
+    8 byte blake2s digest behind the 16 character hex hash. since every record
+    is the same size we can memory map the segments, seek straight to any row
+    and read the tail without touching the rest of the history. timestamps
+    come back in the format we write them in (%Y-%m-%d %H:%M:%S.%f) and an
+    all zero digest stands for an empty (unhashed) row.
+    '''
+
+    record = np.dtype([('ts', '<i8'), ('value', '<f8'), ('hash', 'V8')])
+    segmentRows = 1_000_000
+
+    def __init__(self, segmentRows: int = None):
+        self.segmentRows = segmentRows or BinaryManager.segmentRows
+
+    def _conformBasic(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self._conformIndexName(self.conformFlatColumns(df))
+
+    def _conformIndexName(self, df: pd.DataFrame) -> pd.DataFrame:
+        df.index.name = None
+        return df
+
+    def conformFlatColumns(self, df: pd.DataFrame) -> pd.DataFrame:
+        if len(df.columns) == 1:
+            df.columns = ['value']
+        if len(df.columns) == 2:
+            df.columns = ['value', 'hash']
+        return df
+
+    def _clean(self, df: pd.DataFrame) -> pd.DataFrame:
+        if df.index.is_monotonic_increasing and df.index.is_unique:
+            return df
+        return self._sort(self._dedupe(df))
+
+    def _sort(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.sort_index()
+
+    def _dedupe(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df[~df.index.duplicated(keep='last')]
+
+    ### segments ###
+
+    def _segmentPath(self, filePath: str, segment: int) -> str:
+        return os.path.join(filePath, f'{segment:08d}.seg')
+
+    def _segments(self, filePath: str) -> list[str]:
+        if not os.path.isdir(filePath):
+            return []
+        return [
+            os.path.join(filePath, name)
+            for name in sorted(os.listdir(filePath))
+            if name.endswith('.seg')]
+
+    def _rowsIn(self, segmentPath: str) -> int:
+        return os.path.getsize(segmentPath) // self.record.itemsize
+
+    def _map(self, segmentPath: str) -> Union[np.memmap, np.ndarray]:
+        rows = self._rowsIn(segmentPath)
+        if rows == 0:
+            return np.empty(0, dtype=self.record)
+        return np.memmap(segmentPath, dtype=self.record, mode='r', shape=(rows,))
+
+    ### encoding ###
+
+    def _encode(self, df: pd.DataFrame) -> np.ndarray:
+        df = self.conformFlatColumns(df)
+        records = np.zeros(df.shape[0], dtype=self.record)
+        index = pd.to_datetime(df.index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        records['ts'] = index.values.astype('datetime64[ns]').astype('<i8')
+        records['value'] = pd.to_numeric(
+            df['value'], errors='coerce').to_numpy(dtype='<f8')
+        if 'hash' in df.columns:
+            records['hash'] = np.frombuffer(
+                self._digests(df['hash'].values),
+                dtype='V8')
+        return records
+
+    @staticmethod
+    def _digests(hashes: np.ndarray) -> bytes:
+        ''' 8 bytes per row, zeros for rows without a full 16 hex digit hash '''
+        if all(isinstance(rowHash, str) and len(rowHash) == 16 for rowHash in hashes):
+            try:
+                return bytes.fromhex(''.join(hashes))
+            except ValueError as _:
+                pass
+        digests = bytearray(8 * len(hashes))
+        for position, rowHash in enumerate(hashes):
+            if isinstance(rowHash, str) and len(rowHash) == 16:
+                try:
+                    digests[position * 8:position * 8 + 8] = bytes.fromhex(rowHash)
+                except ValueError as _:
+                    pass
+        return bytes(digests)
+
+    def _decode(self, records: np.ndarray) -> pd.DataFrame:
+        timestamps = [
+            timestamp.replace('T', ' ')
+            for timestamp in np.datetime_as_string(
+                records['ts'].astype('datetime64[ns]').astype('datetime64[us]'),
+                unit='us').tolist()]
+        digests = binascii.hexlify(
+            np.ascontiguousarray(records['hash']).tobytes()).decode()
+        empty = '0' * 16
+        hashes = [
+            '' if rowHash == empty else rowHash
+            for rowHash in (
+                digests[i:i + 16] for i in range(0, len(digests), 16))]
+        return pd.DataFrame(
+            {'value': np.array(records['value']), 'hash': hashes},
+            index=timestamps)
+
+    ### api ###
+
+    def remove(self, filePath: str) -> Union[bool, None]:
+        try:
+            shutil.rmtree(filePath)
+            return True
+        except FileNotFoundError as _:
+            return None
+        except Exception as _:
+            return False
+
+    def readArrays(self, filePath: str) -> list[np.memmap]:
+        ''' memory mapped record arrays, one per segment, nothing is copied '''
+        return [self._map(segmentPath) for segmentPath in self._segments(filePath)]
+
+    def count(self, filePath: str) -> int:
+        return sum(self._rowsIn(segmentPath) for segmentPath in self._segments(filePath))
+
+    def read(self, filePath: str, **kwargs) -> pd.DataFrame:
+        try:
+            arrays = self.readArrays(filePath)
+            if len(arrays) == 0:
+                return None
+            return self._clean(self._conformBasic(self._decode(
+                arrays[0] if len(arrays) == 1 else np.concatenate(arrays))))
+        except Exception as _:
+            return None
+
+    def write(self, filePath: str, data: pd.DataFrame) -> bool:
+        try:
+            records = self._encode(data)
+            if os.path.isdir(filePath):
+                shutil.rmtree(filePath)
+            os.makedirs(filePath, exist_ok=True)
+            for segment, start in enumerate(range(0, max(len(records), 1), self.segmentRows)):
+                with open(self._segmentPath(filePath, segment), mode='wb') as f:
+                    f.write(records[start:start + self.segmentRows].tobytes())
+            return True
+        except Exception as _:
+            return False
+
+    def append(self, filePath: str, data: pd.DataFrame) -> bool:
+        try:
+            records = self._encode(data)
+            os.makedirs(filePath, exist_ok=True)
+            segments = self._segments(filePath)
+            segment = max(len(segments) - 1, 0)
+            room = (
+                self.segmentRows - self._rowsIn(segments[-1])
+                if len(segments) > 0 else self.segmentRows)
+            while len(records) > 0:
+                if room <= 0:
+                    segment += 1
+                    room = self.segmentRows
+                with open(self._segmentPath(filePath, segment), mode='ab') as f:
+                    f.write(records[:room].tobytes())
+                records = records[room:]
+                room = 0
+            return True
+        except Exception as _:
+            return False
+
+    def readLines(
+        self,
+        filePath: str,
+        start: int,
+        end: int = None,
+    ) -> Union[pd.DataFrame, None]:
+        ''' 0-indexed, seeks straight to the records '''
+        end = (end if end is not None and end > start else None) or start+1
+        try:
+            found = []
+            offset = 0
+            for records in self.readArrays(filePath):
+                rows = len(records)
+                if offset + rows > start and offset < end:
+                    found.append(records[max(start - offset, 0):end - offset])
+                offset += rows
+                if offset >= end:
+                    break
+            if len(found) == 0:
+                return None
+            return self._conformBasic(self._decode(
+                found[0] if len(found) == 1 else np.concatenate(found)))
+        except Exception as e:
+            logging.error('unable to get data', e, print=True)
+            return None
+
+    def tail(self, filePath: str, rows: int = 1) -> Union[pd.DataFrame, None]:
+        ''' the last rows on disk, in O(1) '''
+        total = self.count(filePath)
+        if total == 0:
+            return None
+        return self.readLines(filePath, start=max(total - rows, 0), end=total)
+
+
+def _roundTrips(original: pd.DataFrame, copy: Union[pd.DataFrame, None]) -> bool:
+    '''
+    true if the copy hashes exactly like the original: the same index, value
+    and hash strings row for row (a missing hash counts as an empty one)
+    '''
+    from satorilib.utils.hash import _chainColumns
+
+    def strings(df: pd.DataFrame) -> tuple[list[str], list[str], list[str]]:
+        indexes, values, hashes = _chainColumns(df)
+        return indexes, values, [
+            rowHash if isinstance(rowHash, str) else '' for rowHash in hashes]
+
+    if copy is None or copy.shape[0] != original.shape[0]:
+        return False
+    return strings(original) == strings(copy)
+
+
+def migrateCsvDirectories(dataPath: str, segmentRows: int = None) -> dict[str, bool]:
+    '''
+    one shot migration: every stream folder under dataPath that has an
+    aggregate.csv gets an aggregate.bin next to it. the csv is left alone so
+    it can be removed once the binary copy has been checked. a stream only
+    counts as migrated if its binary copy reads back exactly like the csv
+    (values that aren't numbers, integers or timestamps in another format
+    don't survive), otherwise the copy is removed and the stream is False.
+    '''
+    from satorilib.disk.filetypes.csv import CSVManager
+    csv = CSVManager()
+    binary = BinaryManager(segmentRows=segmentRows)
+    results = {}
+    for name in sorted(os.listdir(dataPath)):
+        csvPath = os.path.join(dataPath, name, 'aggregate.csv')
+        if not os.path.isfile(csvPath):
+            continue
+        binPath = os.path.join(dataPath, name, 'aggregate.bin')
+        df = csv.read(filePath=csvPath)
+        results[name] = (
+            df is not None and
+            binary.write(filePath=binPath, data=df) and
+            _roundTrips(df, binary.read(filePath=binPath)))
+        if not results[name]:
+            logging.error(
+                'binary copy does not match csv, not migrated:', name,
+                print=True)
+            binary.remove(filePath=binPath)
+    return results
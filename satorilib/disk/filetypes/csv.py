@@ -1,5 +1,7 @@
 from typing import Union
+import io
 import os
+import numpy as np
 import pandas as pd
 from satorilib.interfaces.data import FileManager
 from satorilib import logging
@@ -7,7 +9,15 @@ from satorilib import logging
 
 
 class CSVManager(FileManager):
-    ''' manages reading and writing to CSV files usind pandas '''
+    '''
+    manages reading and writing to CSV files usind pandas
+
+    alongside each csv we keep a sidecar (filePath + '.idx') of little endian
+    uint64 byte offsets: 0 followed by the end of every line. it's extended on
+    append and rebuilt on write, so readLines can seek straight to the rows it
+    wants instead of parsing from the start row to the end of the file. if it
+    ever disagrees with the size of the csv it's repaired from the csv itself.
+    '''
 
     def _conformBasic(self, df: pd.DataFrame) -> pd.DataFrame:
         return self._conformIndexName(self.conformFlatColumns(df))
@@ -35,9 +45,71 @@ class CSVManager(FileManager):
     def _merge(self, dfs: list[pd.DataFrame]) -> pd.DataFrame:
         return self._clean(pd.concat(dfs, axis=0))
 
+    ### line offsets ###
+
+    @staticmethod
+    def _indexPath(filePath: str) -> str:
+        return filePath + '.idx'
+
+    @staticmethod
+    def _lineEnds(filePath: str, start: int = 0) -> np.ndarray:
+        ''' offsets just past every newline from start on, plus a trailing partial line '''
+        content = np.fromfile(filePath, dtype=np.uint8, offset=start)
+        ends = np.flatnonzero(content == 10).astype('<u8') + (start + 1)
+        if len(content) > 0 and content[-1] != 10:
+            ends = np.append(ends, np.uint64(start + len(content)))
+        return ends
+
+    def _indexLines(self, filePath: str, start: int = 0) -> bool:
+        ''' records the line ends from byte start on, start 0 rebuilds it '''
+        try:
+            ends = self._lineEnds(filePath, start)
+            if start == 0:
+                with open(self._indexPath(filePath), mode='wb') as f:
+                    f.write(np.zeros(1, dtype='<u8').tobytes())
+                    f.write(ends.tobytes())
+            else:
+                with open(self._indexPath(filePath), mode='ab') as f:
+                    f.write(ends.tobytes())
+            return True
+        except Exception as _:
+            self._removeIndex(filePath)
+            return False
+
+    def _removeIndex(self, filePath: str):
+        try:
+            os.remove(self._indexPath(filePath))
+        except Exception as _:
+            pass
+
+    def lineOffsets(self, filePath: str) -> np.ndarray:
+        '''
+        0 and the end of each line, repaired if it's out of date. we always
+        write the sidecar after the csv, so a csv modified later than its
+        sidecar was changed by something else and is indexed from scratch.
+        '''
+        size = os.path.getsize(filePath)
+        indexPath = self._indexPath(filePath)
+        offsets = (
+            np.fromfile(indexPath, dtype='<u8')
+            if (
+                os.path.exists(indexPath) and
+                os.stat(indexPath).st_mtime_ns >= os.stat(filePath).st_mtime_ns)
+            else np.empty(0, dtype='<u8'))
+        if len(offsets) > 0 and offsets[-1] == size:
+            return offsets
+        if len(offsets) > 0 and offsets[-1] < size:
+            self._indexLines(filePath, start=int(offsets[-1]))
+        else:
+            self._indexLines(filePath)
+        return np.fromfile(self._indexPath(filePath), dtype='<u8')
+
+    ### api ###
+
     def remove(self, filePath: str) -> Union[bool, None]:
         try:
             os.remove(filePath)
+            self._removeIndex(filePath)
             return True
         except FileNotFoundError as _:
             return None
@@ -62,13 +134,17 @@ class CSVManager(FileManager):
     def write(self, filePath: str, data: pd.DataFrame) -> bool:
         try:
             data.to_csv(filePath, float_format='%.10f', header=False)
+            self._indexLines(filePath)
             return True
         except Exception as _:
             return False
 
     def append(self, filePath: str, data: pd.DataFrame) -> bool:
         try:
+            start = os.path.getsize(filePath) if os.path.exists(filePath) else 0
             data.to_csv(filePath, float_format='%.10f', mode='a', header=False)
+            if start == 0 or os.path.exists(self._indexPath(filePath)):
+                self._indexLines(filePath, start=start)
             return True
         except Exception as _:
             return False
@@ -79,20 +155,28 @@ class CSVManager(FileManager):
         start: int,
         end: int = None,
     ) -> Union[pd.DataFrame, None]:
-        ''' 0-indexed '''
+        ''' 0-indexed, parses only lines start up to (not including) end '''
         end = (end if end is not None and end > start else None) or start+1
-        capture = end - start - 1
         try:
-            df = self._conformBasic(pd.read_table(
-                filePath,
-                sep=",",
+            offsets = self.lineOffsets(filePath)
+            lines = len(offsets) - 1
+            if start >= lines:
+                return None
+            begin = int(offsets[start])
+            with open(filePath, mode='rb') as f:
+                f.seek(begin)
+                chunk = f.read(int(offsets[min(end, lines)]) - begin)
+            return self._conformBasic(pd.read_csv(
+                io.BytesIO(chunk),
                 index_col=0,
-                header=None,
-                skiprows=start,
-                # skipfooter=end, # slicing is faster; since using c engine
-                # engine='python', # required for skipfooter
-            ))
-            return df.iloc[[capture]] if capture == 0 else df.iloc[0:capture+1]
+                header=None))
         except Exception as e:
             logging.error('unable to get data', e, print=True)
             return None
+
+    def tail(self, filePath: str, rows: int = 1) -> Union[pd.DataFrame, None]:
+        ''' the last rows on disk, found through the line offsets '''
+        lines = len(self.lineOffsets(filePath)) - 1
+        if lines <= 0:
+            return None
+        return self.readLines(filePath, start=max(lines - rows, 0), end=lines)
@@ -1,18 +1,34 @@
 from typing import Union, List
 import pandas as pd
-from sqlalchemy import create_engine, Table, MetaData, select, insert, delete
+from sqlalchemy import create_engine, inspect, Table, MetaData, select, insert, delete
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 from satorilib.interfaces.data import FileManager
+from satorilib.sqlite import sql_io
 from satorilib import logging
 
 class SqliteManager(FileManager):
     ''' manages reading and writing to sqlite database using pandas '''
 
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, batch_size: int = 10000):
         self.engine = create_engine(connection_string)
         self.Session = sessionmaker(bind=self.engine)
         self.metadata = MetaData()
+        self.batch_size = batch_size
+        self.tables: dict[str, Table] = {}
+
+    def _table(self, table_name: str) -> Table:
+        ''' reflects a table once, then reuses its metadata '''
+        if table_name not in self.tables:
+            self.tables[table_name] = Table(
+                table_name, self.metadata, autoload_with=self.engine)
+        return self.tables[table_name]
+
+    def _forget(self, table_name: str):
+        ''' drops cached metadata after the table was replaced or dropped '''
+        table = self.tables.pop(table_name, None)
+        if table is not None:
+            self.metadata.remove(table)
 
     def _conform_basic(self, df: pd.DataFrame) -> pd.DataFrame:
         return self._conform_index_name(self.conform_flat_columns(df))
@@ -42,8 +58,9 @@ class SqliteManager(FileManager):
 
     def remove(self, table_name: str) -> Union[bool, None]:
         try:
-            table = Table(table_name, self.metadata, autoload_with=self.engine)
+            table = self._table(table_name)
             table.drop(self.engine)
+            self._forget(table_name)
             return True
         except SQLAlchemyError as e:
             logging.error(f"Error removing table {table_name}", e, print=True)
@@ -51,7 +68,7 @@ class SqliteManager(FileManager):
 
     def read(self, table_name: str, **kwargs) -> pd.DataFrame:
         try:
-            table = Table(table_name, self.metadata, autoload_with=self.engine)
+            table = self._table(table_name)
             with self.Session() as session:
                 result = session.execute(select(table))
                 df = pd.DataFrame(result.fetchall(), columns=result.keys())
@@ -63,18 +80,41 @@ class SqliteManager(FileManager):
     def write(self, table_name: str, data: pd.DataFrame) -> bool:
         try:
             data = self._conform_basic(data)
+            self._forget(table_name)
             data.to_sql(table_name, self.engine, if_exists='replace', index=True)
             return True
         except SQLAlchemyError as e:
             logging.error(f"Error writing to table {table_name}", e, print=True)
             return False
 
-    def append(self, table_name: str, data: pd.DataFrame) -> bool:
+    def append(self, table_name: str, data: pd.DataFrame, upsert: bool = False) -> bool:
+        '''
+        bulk appends through executemany in a single transaction, batch_size
+        rows at a time. upsert replaces rows whose id (timestamp) exists.
+        '''
         try:
             data = self._conform_basic(data)
-            data.to_sql(table_name, self.engine, if_exists='append', index=True)
+            if table_name not in self.tables and not inspect(self.engine).has_table(table_name):
+                return self.write(table_name, data)
+            columns, arrays = sql_io.column_values(data, index_col='id')
+            conn = self.engine.raw_connection()
+            try:
+                if upsert:
+                    cursor = conn.cursor()
+                    cursor.execute(sql_io.unique_index_query(table_name, 'id'))
+                    cursor.close()
+                sql_io.execute_many(
+                    conn,
+                    sql_io.insert_query(
+                        table_name,
+                        columns,
+                        upsert_key='id' if upsert else None),
+                    arrays,
+                    batch_size=self.batch_size)
+            finally:
+                conn.close()
             return True
-        except SQLAlchemyError as e:
+        except Exception as e:
             logging.error(f"Error appending to table {table_name}", e, print=True)
             return False
 
@@ -82,7 +122,7 @@ class SqliteManager(FileManager):
         ''' 0-indexed '''
         end = (end if end is not None and end > start else None) or start + 1
         try:
-            table = Table(table_name, self.metadata, autoload_with=self.engine)
+            table = self._table(table_name)
             with self.Session() as session:
                 query = select(table).order_by(table.c.id).offset(start).limit(end - start)
                 result = session.execute(query)
@@ -91,3 +131,7 @@ class SqliteManager(FileManager):
         except SQLAlchemyError as e:
             logging.error(f"Error reading lines from table {table_name}", e, print=True)
             return None
+
+    def readLines(self, filePath: str, start: int, end: int = None) -> Union[pd.DataFrame, None]:
+        ''' FileManager interface, filePath is the table name here '''
+        return self.read_lines(filePath, start, end)
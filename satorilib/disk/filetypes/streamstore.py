@@ -0,0 +1,241 @@
+from typing import Union, Iterator
+import os
+import pandas as pd
+from satorilib.interfaces.data import FileManager
+from satorilib.sqlite import sql_io
+from satorilib import logging
+
+
+class SqliteStreamStore(FileManager):
+    '''
+    every stream in one sqlite database instead of a folder per stream.
+
+    observations are clustered on (stream_id, ts) in a WITHOUT ROWID table so
+    the primary key btree holds the rows themselves: a range, the latest n or
+    the row before/after a time are a single index seek and never load the
+    rest of the series. a second index on (stream_id, hash) lets us find where
+    a hash sits in a chain. connections come from sql_io's WAL pool.
+
+    as a FileManager the filePath argument is the stream key, we use the same
+    generatePathId the csv folders are named by.
+    '''
+
+    schema = (
+        'create table if not exists observations ('
+        ' stream_id text not null,'
+        ' ts text not null,'
+        ' value,'
+        ' hash text,'
+        ' primary key (stream_id, ts)'
+        ') without rowid;'
+        'create index if not exists observations_hash'
+        ' on observations (stream_id, hash);')
+
+    def __init__(self, database: str, poolSize: int = 4, batchSize: int = 10000):
+        self.database = database
+        self.batchSize = batchSize
+        self.pool = sql_io.pool(database, size=poolSize)
+        with self.pool.connection() as conn:
+            conn.executescript(self.schema)
+
+    def _query(self, query: str, params: list) -> list[tuple]:
+        with self.pool.connection() as conn:
+            return conn.execute(query, params).fetchall()
+
+    @staticmethod
+    def _frame(rows: list[tuple]) -> pd.DataFrame:
+        ''' (ts, value, hash) rows as the flat frame the csv manager returns '''
+        return pd.DataFrame(
+            {
+                'value': [row[1] for row in rows],
+                'hash': [row[2] for row in rows]},
+            index=[row[0] for row in rows])
+
+    def _select(
+        self,
+        key: str,
+        where: str = '',
+        params: list = None,
+        order: str = 'asc',
+        limit: int = None,
+        offset: int = None,
+    ) -> pd.DataFrame:
+        query = (
+            'select ts, value, hash from observations where stream_id = ?'
+            f'{where} order by ts {order}'
+            f'{" limit ?" if limit is not None or offset is not None else ""}'
+            f'{" offset ?" if offset is not None else ""}')
+        params = [key] + (params or [])
+        if limit is not None or offset is not None:
+            params.append(limit if limit is not None else -1)
+        if offset is not None:
+            params.append(offset)
+        rows = self._query(query, params)
+        return self._frame(rows if order == 'asc' else rows[::-1])
+
+    def _insert(self, conn, key: str, data: pd.DataFrame) -> int:
+        if data is None or data.empty:
+            conn.commit()
+            return 0
+        hashes = (
+            data['hash'].values if 'hash' in data.columns
+            else [''] * len(data))
+        _, arrays = sql_io.column_values(pd.DataFrame(
+            {'value': data[data.columns[0]].values, 'hash': hashes},
+            index=data.index.astype(str)), index_col='ts')
+        return sql_io.execute_many(
+            conn,
+            'insert or replace into observations'
+            ' (stream_id, ts, value, hash) values (?, ?, ?, ?)',
+            [[key] * len(data)] + arrays,
+            batch_size=self.batchSize)
+
+    ### FileManager ###
+
+    def read(self, filePath: str, **kwargs) -> Union[pd.DataFrame, None]:
+        df = self._select(filePath)
+        return None if df.empty else df
+
+    def write(self, filePath: str, data: pd.DataFrame) -> bool:
+        ''' replaces the whole series '''
+        try:
+            with self.pool.connection() as conn:
+                # the delete joins the insert's transaction, one commit for both
+                conn.execute(
+                    'delete from observations where stream_id = ?',
+                    [filePath])
+                self._insert(conn, filePath, data)
+            return True
+        except Exception as e:
+            logging.error('unable to write stream', e, print=True)
+            return False
+
+    def append(self, filePath: str, data: pd.DataFrame) -> bool:
+        ''' later rows for a timestamp win, just like reading an appended csv '''
+        try:
+            with self.pool.connection() as conn:
+                self._insert(conn, filePath, data)
+            return True
+        except Exception as e:
+            logging.error('unable to append to stream', e, print=True)
+            return False
+
+    def readLines(
+        self,
+        filePath: str,
+        start: int,
+        end: int = None,
+    ) -> Union[pd.DataFrame, None]:
+        ''' 0-indexed '''
+        end = (end if end is not None and end > start else None) or start+1
+        df = self._select(filePath, limit=end - start, offset=start)
+        return None if df.empty else df
+
+    def remove(self, filePath: str) -> Union[bool, None]:
+        try:
+            with self.pool.connection() as conn:
+                with conn:
+                    conn.execute(
+                        'delete from observations where stream_id = ?',
+                        [filePath])
+            return True
+        except Exception as _:
+            return False
+
+    ### indexed queries ###
+
+    def range(
+        self,
+        key: str,
+        start: str = None,
+        end: str = None,
+        includeStart: bool = True,
+        includeEnd: bool = True,
+    ) -> pd.DataFrame:
+        where = ''
+        params = []
+        if start is not None:
+            where += f' and ts {">=" if includeStart else ">"} ?'
+            params.append(start)
+        if end is not None:
+            where += f' and ts {"<=" if includeEnd else "<"} ?'
+            params.append(end)
+        return self._select(key, where=where, params=params)
+
+    def latest(self, key: str, n: int = 1) -> pd.DataFrame:
+        return self._select(key, order='desc', limit=n)
+
+    def before(self, key: str, time: str, n: int = 1) -> pd.DataFrame:
+        return self._select(key, where=' and ts < ?', params=[time], order='desc', limit=n)
+
+    def after(self, key: str, time: str, n: int = 1) -> pd.DataFrame:
+        return self._select(key, where=' and ts > ?', params=[time], limit=n)
+
+    def exact(self, key: str, time: str) -> pd.DataFrame:
+        return self._select(key, where=' and ts = ?', params=[time])
+
+    def hashBefore(self, key: str, time: str) -> str:
+        rows = self._query(
+            'select hash from observations where stream_id = ? and ts < ?'
+            ' order by ts desc limit 1',
+            [key, time])
+        return (rows[0][0] or '') if len(rows) > 0 else ''
+
+    def findHash(self, key: str, rowHash: str) -> pd.DataFrame:
+        return self._select(key, where=' and hash = ?', params=[rowHash])
+
+    def count(self, key: str) -> int:
+        return self._query(
+            'select count(*) from observations where stream_id = ?',
+            [key])[0][0]
+
+    def removeRange(self, key: str, start: str = None, end: str = None) -> int:
+        ''' deletes rows with start <= ts <= end (either side open if None) '''
+        where = ''
+        params = [key]
+        if start is not None:
+            where += ' and ts >= ?'
+            params.append(start)
+        if end is not None:
+            where += ' and ts <= ?'
+            params.append(end)
+        with self.pool.connection() as conn:
+            with conn:
+                return conn.execute(
+                    f'delete from observations where stream_id = ?{where}',
+                    params).rowcount
+
+    def iterate(self, key: str, after: str = None, rows: int = None) -> Iterator[pd.DataFrame]:
+        ''' the series in chunks, keyset paginated so each chunk is a seek '''
+        rows = rows or self.batchSize
+        while True:
+            df = (
+                self._select(key, where=' and ts > ?', params=[after], limit=rows)
+                if after is not None else self._select(key, limit=rows))
+            if df.empty:
+                return
+            yield df
+            after = df.index[-1]
+
+    def streams(self) -> list[str]:
+        return [row[0] for row in self._query(
+            'select distinct stream_id from observations', [])]
+
+
+def migrateCsvDirectories(dataPath: str, database: str) -> dict[str, bool]:
+    '''
+    one shot migration: every stream folder under dataPath with an
+    aggregate.csv is loaded into the database under its folder name. the
+    folders are left alone so they can be removed once it's checked.
+    '''
+    from satorilib.disk.filetypes.csv import CSVManager
+    csv = CSVManager()
+    store = SqliteStreamStore(database)
+    results = {}
+    for name in sorted(os.listdir(dataPath)):
+        csvPath = os.path.join(dataPath, name, 'aggregate.csv')
+        if not os.path.isfile(csvPath):
+            continue
+        df = csv.read(filePath=csvPath)
+        results[name] = df is not None and store.write(filePath=name, data=df)
+    return results
@@ -5,6 +5,7 @@ from satorilib.utils.time import datetimeToTimestamp, now
 from satorilib.utils.hash import hashIt
 from satorilib.disk.cache import CachedResult
 from satorilib.disk.filetypes.csv import CSVManager
+from satorilib.disk import timeindex
 
 
 def search(
@@ -14,15 +15,7 @@ def search(
     after: bool = False,
     exact: bool = False,
 ) -> pd.DataFrame:
-    if not isinstance(time, str) or not any([before, after, exact]) or df is None:
-        return None
-    if before:
-        return df[df.index < time]
-    if after:
-        return df[df.index > time]
-    if exact:
-        return df[df.index == time]
-    return None
+    return timeindex.search(df, time=time, before=before, after=after, exact=exact)
 
 
 def getHashBefore(df: pd.DataFrame, time: str) -> str:
@@ -30,4 +23,4 @@ def getHashBefore(df: pd.DataFrame, time: str) -> str:
     rows = search(df, time=time, before=True)
     if rows is None or rows.empty:
         return ""
-    return rows.iloc[-1].hash
+    return rows["hash"].values[-1]
@@ -0,0 +1,111 @@
+''' one shared Cache per stream for the whole process, under a memory budget '''
+
+from typing import Union
+import threading
+from collections import OrderedDict
+from satorilib.concepts import StreamId
+from satorilib.disk.cache import Cache
+
+
+class CacheRegistry():
+    '''
+    hands out a single Cache per StreamId so every part of the process shares
+    one frame per stream. it keeps an approximate count of the bytes each
+    resident frame holds (df.memory_usage(deep=True)) and when the total goes
+    over the budget it unloads the least recently used streams. an unloaded
+    Cache is still handed out, it just reads its data back in on next access.
+    '''
+
+    def __init__(
+        self,
+        budget: int = 512 * 1024 * 1024,
+        loc: str = None,
+        ext: str = 'csv',
+    ):
+        self.budget = budget
+        self.loc = loc
+        self.ext = ext
+        self.caches: OrderedDict[StreamId, Cache] = OrderedDict()
+        # measured bytes and the row count they were measured at
+        self.sizes: dict[StreamId, tuple[int, int]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+
+    def _sizeOf(self, streamId: StreamId, cache: Cache) -> int:
+        '''
+        deep memory usage is O(n) on object columns, so we only measure when
+        the row count changes a lot and scale the last measurement otherwise.
+        '''
+        rows = cache._rowCount()
+        if rows == 0:
+            return 0
+        measured, measuredRows = self.sizes.get(streamId, (0, 0))
+        if measuredRows == 0 or abs(rows - measuredRows) > measuredRows * 0.1:
+            measured, measuredRows = cache.memoryUsage(), rows
+            self.sizes[streamId] = (measured, measuredRows)
+        return measured * rows // measuredRows
+
+    def get(self, streamId: StreamId) -> Cache:
+        with self.lock:
+            cache = self.caches.get(streamId)
+            if cache is None:
+                self.misses += 1
+                cache = Cache(id=streamId, loc=self.loc, ext=self.ext)
+                self.caches[streamId] = cache
+            elif cache.unloaded:
+                self.misses += 1
+                cache.df  # reload now so it's measured
+            else:
+                self.hits += 1
+            self.caches.move_to_end(streamId)
+            self.enforce(keep=streamId)
+            return cache
+
+    def enforce(self, keep: StreamId = None) -> int:
+        ''' unloads least recently used streams until under budget '''
+        with self.lock:
+            total = self.bytes()
+            for streamId, cache in list(self.caches.items()):
+                if total <= self.budget:
+                    break
+                if streamId == keep or cache.unloaded:
+                    continue
+                total -= self._sizeOf(streamId, cache)
+                self.evict(streamId)
+            return total
+
+    def evict(self, streamId: StreamId) -> bool:
+        with self.lock:
+            cache = self.caches.get(streamId)
+            if cache is None or cache.unloaded:
+                return False
+            cache.unload()
+            self.sizes.pop(streamId, None)
+            self.evictions += 1
+            return True
+
+    def remove(self, streamId: StreamId) -> Union[Cache, None]:
+        with self.lock:
+            self.sizes.pop(streamId, None)
+            return self.caches.pop(streamId, None)
+
+    def bytes(self) -> int:
+        with self.lock:
+            return sum(
+                self._sizeOf(streamId, cache)
+                for streamId, cache in self.caches.items()
+                if not cache.unloaded)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'streams': len(self.caches),
+                'resident': sum(
+                    1 for cache in self.caches.values() if not cache.unloaded),
+                'bytes': self.bytes(),
+                'budget': self.budget}
@@ -0,0 +1,242 @@
+''' the Cache api answered by indexed queries on the shared stream database '''
+
+from typing import Union
+import os
+import threading
+import pandas as pd
+from satorilib.concepts import StreamId
+from satorilib.utils.time import datetimeToTimestamp, earliestDate, now
+from satorilib.utils.hash import hashIt, generatePathId, historyHashes, verifyHashes
+from satorilib.disk.disk import Disk
+from satorilib.disk.cache import CachedResult
+from satorilib.disk.filetypes.streamstore import SqliteStreamStore
+
+stores: dict[str, SqliteStreamStore] = {}
+storesLock = threading.Lock()
+
+
+def storeOf(database: str) -> SqliteStreamStore:
+    ''' one store (and so one connection pool) per database file '''
+    with storesLock:
+        if database not in stores:
+            stores[database] = SqliteStreamStore(database)
+        return stores[database]
+
+
+class SqliteCache():
+    '''
+    a stand in for Cache on a stream kept in the shared sqlite database. the
+    lookups the engine and neuron make on every observation (search, the hash
+    or row before a time, the latest time, appending one row) are index seeks
+    and nothing is held in memory. df reads the whole series for the callers
+    that really want all of it, like training.
+    '''
+
+    validationRows = 100000
+
+    def __init__(
+        self,
+        id: StreamId,
+        loc: str = None,
+        database: str = None,
+        store: SqliteStreamStore = None,
+    ):
+        self.id = id
+        self.key = generatePathId(streamId=id)
+        self.store = store or storeOf(database or os.path.join(
+            loc or Disk.config.dataPath(), 'streams.db'))
+        self.checkedHash = ''
+        self.checkedIndex = None
+
+    def __str__(self):
+        return f'SqliteCache({self.id}, {self.store.latest(self.key, n=5)})'
+
+    ### read ###
+
+    @property
+    def df(self) -> pd.DataFrame:
+        return self.store.range(self.key)
+
+    @property
+    def cache(self) -> pd.DataFrame:
+        return self.df
+
+    def read(self, start: int = None, end: int = None) -> Union[pd.DataFrame, None]:
+        if start != None:
+            return self.store.readLines(filePath=self.key, start=start, end=end)
+        return self.store.read(filePath=self.key)
+
+    def search(
+        self,
+        time: str,
+        before: bool = False,
+        after: bool = False,
+        exact: bool = False,
+    ) -> pd.DataFrame:
+        if not isinstance(time, str) or not any([before, after, exact]):
+            return None
+        if before:
+            return self.store.range(self.key, end=time, includeEnd=False)
+        if after:
+            return self.store.range(self.key, start=time, includeStart=False)
+        return self.store.exact(self.key, time)
+
+    def timeExistsInAggregate(self, time: str) -> bool:
+        return not self.store.exact(self.key, time).empty
+
+    def getRowCounts(self) -> int:
+        return self.store.count(self.key)
+
+    def getHashBefore(self, time: str) -> str:
+        ''' gets the hash of the observation just before a given time '''
+        return self.store.hashBefore(self.key, time)
+
+    def getObservationAfter(self, time: str) -> pd.DataFrame:
+        ''' gets the observation just after a given time '''
+        return self.store.after(self.key, time)
+
+    def getObservationBefore(self, time: str) -> pd.DataFrame:
+        ''' gets the observation just before a given time '''
+        return self.store.before(self.key, time)
+
+    def getLatestObservationTime(self) -> str:
+        ''' gets most recent time '''
+        latest = self.store.latest(self.key)
+        if latest.empty:
+            return datetimeToTimestamp(earliestDate())
+        return latest.index[-1]
+
+    ### write ###
+
+    def write(self, df: pd.DataFrame = None) -> bool:
+        if df is None:
+            return False
+        return self.store.write(filePath=self.key, data=historyHashes(df))
+
+    def append(self, df: pd.DataFrame, hashThis: bool = False) -> bool:
+        if df is None or df.shape[0] == 0 or len(df.columns) > 2:
+            return False
+        df = df.sort_index()
+        if not self.store.range(self.key, start=df.index[0], end=df.index[-1]).index.intersection(df.index).empty:
+            return False
+        if 'hash' not in df.columns:
+            if hashThis:
+                df = historyHashes(df, priorRowHash=self.getHashBefore(df.index[0]))
+            else:
+                df['hash'] = ''
+        return self.store.append(filePath=self.key, data=df)
+
+    def appendByAttributes(
+        self,
+        value: str,
+        timestamp: str = None,
+        observationHash: str = None,
+        hashThis: bool = False,
+    ) -> CachedResult:
+        '''
+        one row in, chained onto the row before it. if it landed before rows
+        that are hashed they're rehashed from it, otherwise the rows after it
+        are checked.
+        '''
+        timestamp = timestamp or datetimeToTimestamp(now())
+        if self.timeExistsInAggregate(timestamp):
+            return CachedResult(
+                success=False,
+                time=timestamp,
+                hash=observationHash,
+                data=value)
+        priorRowHash = self.getHashBefore(timestamp)
+        chainedHash = hashIt(priorRowHash + str(timestamp) + str(value))
+        observationHash = observationHash or (chainedHash if hashThis else '')
+        success = self.store.append(
+            filePath=self.key,
+            data=pd.DataFrame(
+                {'value': [value], 'hash': [observationHash]},
+                index=[timestamp]))
+        if observationHash == chainedHash and self._rehashAfter(timestamp, chainedHash):
+            validated, validatedFrame = True, None
+        else:
+            validated, validatedFrame = self.performValidation(since=timestamp)
+        return CachedResult(
+            time=timestamp,
+            data=value,
+            hash=observationHash,
+            success=success,
+            validated=validated,
+            validatedFrame=validatedFrame)
+
+    def _rehashAfter(self, time: str, priorRowHash: str) -> bool:
+        '''
+        chains the hashed rows after a time onto priorRowHash a chunk at a
+        time, true unless there were rows after it that weren't hashed.
+        '''
+        for chunk in self.store.iterate(
+            self.key,
+            after=time,
+            rows=self.validationRows,
+        ):
+            if not all(
+                isinstance(rowHash, str) and rowHash != ''
+                for rowHash in chunk['hash'].values
+            ):
+                return False
+            chunk = historyHashes(chunk, priorRowHash=priorRowHash)
+            if not self.store.append(filePath=self.key, data=chunk):
+                return False
+            priorRowHash = chunk['hash'].values[-1]
+        return True
+
+    def performValidation(
+        self,
+        entire: bool = False,
+        since: str = None,
+    ) -> tuple[bool, Union[pd.DataFrame, None]]:
+        '''
+        walks the chain a chunk at a time carrying the last hash across chunks,
+        so validating never holds more than validationRows rows. returns the
+        last good row on failure like Cache does. since skips the rows before
+        a time, their chain is taken as is.
+        '''
+        lastGood = None if entire or since is None else self.store.before(self.key, since)
+        if lastGood is not None and lastGood.empty:
+            lastGood = None
+        priorRowHash = lastGood['hash'].values[-1] if lastGood is not None else ''
+        for chunk in self.store.iterate(
+            self.key,
+            after=lastGood.index[-1] if lastGood is not None else None,
+            rows=self.validationRows,
+        ):
+            success, df = verifyHashes(df=chunk, priorRowHash=priorRowHash)
+            if not success:
+                return False, df if df is not None else lastGood
+            priorRowHash = chunk['hash'].values[-1]
+            lastGood = chunk.iloc[[-1]]
+        return True, None
+
+    def modifyBasedValidation(self, success: bool, df: Union[pd.DataFrame, None] = None):
+        ''' modification done separately '''
+        if success:
+            latest = self.store.latest(self.key)
+            if not latest.empty:
+                self.checkedIndex = latest.index[-1]
+                self.checkedHash = latest['hash'].values[-1]
+        elif df is None or df.empty:
+            self.checkedHash = ''
+            self.checkedIndex = None
+        else:
+            self.store.removeRange(self.key, start=df.index[-1])
+            self.checkedHash = df.iloc[-1].hash
+            self.checkedIndex = df.index[-1]
+        return success
+
+    def clear(self) -> Union[bool, None]:
+        return self.store.remove(filePath=self.key)
+
+    def remove(self) -> Union[bool, None]:
+        return self.store.remove(filePath=self.key)
+
+    def removeItAndAfter(self, timestamp) -> Union[bool, None]:
+        self.store.removeRange(self.key, start=timestamp)
+
+    def removeItAndBefore(self, timestamp) -> Union[bool, None]:
+        self.store.removeRange(self.key, end=timestamp)
@@ -0,0 +1,95 @@
+''' binary search over a frame's timestamp index instead of boolean masks '''
+
+from typing import Union
+import numpy as np
+import pandas as pd
+
+
+def _sorted(index: np.ndarray) -> bool:
+    return len(index) < 2 or bool(np.all(index[1:] >= index[:-1]))
+
+
+class TimeIndex():
+    '''
+    the string index of a frame held as an array so lookups are a searchsorted
+    away. times are compared as the strings they are, exactly like the masks
+    (df.index < time) this replaces, so the answer never depends on whether a
+    timestamp parses, its format or its timezone. rows appended to the end of
+    the frame are pushed on here as they arrive (amortized O(1)), anything
+    else means the frame was replaced and the owner should build a new one.
+    '''
+
+    def __init__(self, index: pd.Index):
+        self.size = len(index)
+        self.usable = all(isinstance(time, str) for time in index)
+        self.times = np.array(index, dtype=object)
+        self.usable = self.usable and _sorted(self.times)
+        if not self.usable:
+            self.times = np.empty(0, dtype=object)
+
+    def append(self, timestamp: str):
+        if not self.usable:
+            return
+        if not isinstance(timestamp, str) or (
+            self.size > 0 and timestamp < self.times[self.size - 1]
+        ):
+            self.usable = False
+            return
+        if self.size == len(self.times):
+            grown = np.empty(max(self.size * 2, 16), dtype=object)
+            grown[:self.size] = self.times[:self.size]
+            self.times = grown
+        self.times[self.size] = timestamp
+        self.size += 1
+
+    def bounds(self, time: str) -> Union[tuple[int, int], None]:
+        ''' positions of the first row at time and the first row after it '''
+        if not self.usable:
+            return None
+        times = self.times[:self.size]
+        return (
+            int(times.searchsorted(time, side='left')),
+            int(times.searchsorted(time, side='right')))
+
+
+def search(
+    df: pd.DataFrame,
+    time: str,
+    before: bool = False,
+    after: bool = False,
+    exact: bool = False,
+    times: TimeIndex = None,
+) -> pd.DataFrame:
+    '''
+    rows before, after or exactly at a time as a slice of df, the same rows
+    the masks below select. with a TimeIndex it's a binary search of its
+    array, without one we binary search the index itself if it's sorted
+    (pandas caches that check on the index) and only fall back to boolean
+    masks when neither is possible.
+    '''
+    if not isinstance(time, str) or not any([before, after, exact]) or df is None:
+        return None
+    found = times.bounds(time) if times is not None else None
+    if found is None and df.index.is_monotonic_increasing:
+        try:
+            found = (
+                df.index.searchsorted(time, side='left'),
+                df.index.searchsorted(time, side='right'))
+        except TypeError as _:
+            found = None
+    if found is None:
+        if before:
+            return df[df.index < time]
+        if after:
+            return df[df.index > time]
+        if exact:
+            return df[df.index == time]
+        return None
+    left, right = found
+    if before:
+        return df.iloc[:left]
+    if after:
+        return df.iloc[right:]
+    if exact:
+        return df.iloc[left:right]
+    return None
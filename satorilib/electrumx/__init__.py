@@ -1,3 +1,4 @@
+from satorilib.electrumx.budget import RateBudget
 from satorilib.electrumx.api import ElectrumxApi
 from satorilib.electrumx.connection import ElectrumxConnection
 from satorilib.electrumx.electrumx import Electrumx
@@ -1,14 +1,25 @@
 from typing import Union, Dict
 import time
 import logging
+from satorilib.electrumx.budget import RateBudget
 
 logging.basicConfig(level=logging.INFO)
 
 
 class ElectrumxApi():
-    def __init__(self, send: callable, subscribe: callable):
+    def __init__(
+        self,
+        send: callable,
+        subscribe: callable,
+        sendBatch: Union[callable, None] = None,
+        budget: Union[RateBudget, None] = None,
+        retries: int = 5,
+    ):
         self.send = send
         self.subscribe = subscribe
+        self.sendBatch = sendBatch
+        self.budget = budget or RateBudget()
+        self.retries = retries
 
     @staticmethod
     def interpret(decoded: dict) -> Union[dict, None]:
@@ -37,6 +48,66 @@ class ElectrumxApi():
         except Exception as e:
             logging.error(f"Error during {method}: {str(e)}")
 
+    @staticmethod
+    def throttled(response: Union[dict, None]) -> bool:
+        ''' no answer, or the server telling us to slow down or ask for less '''
+        if response is None:
+            return True
+        error = response.get('error') if isinstance(response, dict) else None
+        if not isinstance(error, dict):
+            return False
+        message = str(error.get('message', '')).lower()
+        return (
+            error.get('code') in (-101, -102) or
+            'busy' in message or
+            'excessive' in message or
+            'too large' in message)
+
+    def _sendMany(self, method: str, paramsList: list[list]) -> list[Union[dict, None]]:
+        if self.sendBatch is None:
+            return [self.send(method, params) for params in paramsList]
+        return self.sendBatch([(method, params) for params in paramsList])
+
+    def sendBatchRequest(
+        self,
+        method: str,
+        paramsList: list[list],
+        interpret: bool = True
+    ) -> list[Union[dict, None]]:
+        '''
+        one call per params, sent as json-rpc batches sized and paced by the
+        budget. what the server was too busy for is retried in smaller
+        batches. results line up with paramsList, None where a call failed.
+        '''
+        results = [None] * len(paramsList)
+        remaining = list(range(len(paramsList)))
+        failures = 0
+        while len(remaining) > 0:
+            chunk = remaining[:self.budget.chunk]
+            self.budget.acquire(len(chunk))
+            try:
+                responses = self._sendMany(method, [paramsList[i] for i in chunk])
+            except Exception as e:
+                logging.error(f"Error during {method} batch: {str(e)}")
+                responses = [None] * len(chunk)
+            retry = []
+            for i, response in zip(chunk, responses):
+                if ElectrumxApi.throttled(response):
+                    retry.append(i)
+                else:
+                    results[i] = ElectrumxApi.interpret(response) if interpret else response
+            remaining = retry + remaining[len(chunk):]
+            if len(retry) == 0:
+                failures = 0
+                self.budget.succeeded()
+                continue
+            failures += 1
+            self.budget.throttled()
+            if failures > self.retries:
+                logging.error(f"giving up on {len(remaining)} {method} calls")
+                break
+        return results
+
     def sendSubscriptionRequest(
         self,
         method: str,
@@ -142,6 +213,14 @@ class ElectrumxApi():
             method='blockchain.scripthash.get_balance',
             params=[scripthash, True]) or {}
 
+    def getBalancesMany(self, scripthashes: list[str]) -> list[dict]:
+        ''' getBalances for many scripthashes, in batches '''
+        return [
+            balances or {}
+            for balances in self.sendBatchRequest(
+                method='blockchain.scripthash.get_balance',
+                paramsList=[[scripthash, True] for scripthash in scripthashes])]
+
     def getTransactionHistory(self, scripthash: str) -> list:
         '''
         b.send("blockchain.scripthash.get_history",
@@ -158,12 +237,30 @@ class ElectrumxApi():
             method='blockchain.scripthash.get_history',
             params=[scripthash]) or []
 
-    def getTransaction(self, txHash: str, throttle: int = 0.34):
-        time.sleep(throttle)
+    def getTransactionHistories(self, scripthashes: list[str]) -> list[list]:
+        ''' getTransactionHistory for many scripthashes, in batches '''
+        return [
+            history or []
+            for history in self.sendBatchRequest(
+                method='blockchain.scripthash.get_history',
+                paramsList=[[scripthash] for scripthash in scripthashes])]
+
+    def getTransaction(self, txHash: str, throttle: Union[float, None] = None):
+        ''' paced by the budget unless a fixed throttle is given '''
+        if throttle is None:
+            self.budget.acquire()
+        else:
+            time.sleep(throttle)
         return self.sendRequest(
             method='blockchain.transaction.get',
             params=[txHash, True])
 
+    def getTransactions(self, txHashes: list[str]) -> list[Union[dict, None]]:
+        ''' verbose transactions in batches, None for any we couldn't get '''
+        return self.sendBatchRequest(
+            method='blockchain.transaction.get',
+            paramsList=[[txHash, True] for txHash in txHashes])
+
     def getCurrency(self, scripthash: str) -> int:
         '''
         >>> b.send("blockchain.scripthash.get_balance", script_hash('REsQeZT8KD8mFfcD4ZQQWis4Ju9eYjgxtT'))
@@ -199,11 +296,24 @@ class ElectrumxApi():
             method='blockchain.scripthash.listunspent',
             params=[scripthash, targetAsset])
 
+    def getUnspentsMany(self, scripthashes: list[str], targetAsset: Union[str, None] = None) -> list[list]:
+        ''' listunspent for many scripthashes, currency only unless targetAsset '''
+        return [
+            unspents or []
+            for unspents in self.sendBatchRequest(
+                method='blockchain.scripthash.listunspent',
+                paramsList=[
+                    [scripthash] if targetAsset is None else [scripthash, targetAsset]
+                    for scripthash in scripthashes])]
+
     def getStats(self, targetAsset: str = 'SATORI'):
         return self.sendRequest(method='blockchain.asset.get_meta', params=[targetAsset])
 
-    def getAssetBalanceForHolder(self, scripthash: str, throttle: int = 1):
-        time.sleep(throttle)
+    def getAssetBalanceForHolder(self, scripthash: str, throttle: Union[float, None] = None):
+        if throttle is None:
+            self.budget.acquire()
+        else:
+            time.sleep(throttle)
         return self.sendRequest(
             method='blockchain.scripthash.get_asset_balance',
             params=[True, scripthash]).get('confirmed', {}).get('SATORI', 0)
@@ -214,6 +324,7 @@ class ElectrumxApi():
         i = 0
         while last_addresses != addresses:
             last_addresses = addresses
+            self.budget.acquire()
             response = self.sendRequest(
                 method='blockchain.asset.list_addresses_by_asset',
                 params=[targetAsset, False, 1000, i])
@@ -223,7 +334,6 @@ class ElectrumxApi():
             if len(response) < 1000:
                 break
             i += 1000
-            time.sleep(1)  # Throttle to avoid hitting server limits
         return addresses
 
     def broadcast(self, tx: str) -> str:
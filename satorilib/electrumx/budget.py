@@ -0,0 +1,77 @@
+from typing import Union
+import time
+import threading
+
+
+class RateBudget():
+    '''
+    how fast we let ourselves ask an electrumx server for things. electrumx
+    charges each session a cost per request which decays over time; past its
+    soft limit it starts delaying our replies and past its hard limit it drops
+    the connection. so instead of sleeping a fixed time before every call we
+    spend from a token bucket (refilled at `rate` requests a second, holding
+    up to `burst`) and size batches by what the server has recently been
+    happy to answer: every clean batch grows the rate and the batch size a
+    little, a busy error or a timeout halves both.
+    '''
+
+    def __init__(
+        self,
+        rate: float = 20,
+        burst: float = 500,
+        minRate: float = 1,
+        maxRate: float = 200,
+        chunk: int = 20,
+        minChunk: int = 1,
+        maxChunk: int = 200,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.minRate = minRate
+        self.maxRate = maxRate
+        self.chunk = chunk
+        self.minChunk = minChunk
+        self.maxChunk = maxChunk
+        self.tokens = burst
+        self.refilled = time.monotonic()
+        self.lock = threading.Lock()
+        self.metrics = {'requests': 0, 'waited': 0.0, 'throttled': 0}
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+    def acquire(self, requests: int = 1) -> float:
+        '''
+        takes tokens for this many requests, waiting until the bucket would
+        have had them. a batch bigger than the bucket goes into debt rather
+        than waiting forever. returns how long we waited.
+        '''
+        with self.lock:
+            self._refill()
+            self.tokens -= requests
+            wait = max(0.0, -self.tokens / self.rate)
+            self.metrics['requests'] += requests
+            self.metrics['waited'] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def succeeded(self):
+        ''' gentle increase '''
+        with self.lock:
+            self.rate = min(self.maxRate, self.rate + max(1, self.rate / 10))
+            self.chunk = min(self.maxChunk, self.chunk + max(1, self.chunk // 4))
+
+    def throttled(self):
+        ''' multiplicative decrease, and spend what's saved up '''
+        with self.lock:
+            self.rate = max(self.minRate, self.rate / 2)
+            self.chunk = max(self.minChunk, self.chunk // 2)
+            self.tokens = min(self.tokens, 0)
+            self.metrics['throttled'] += 1
+
+    def stats(self) -> dict[str, Union[int, float]]:
+        with self.lock:
+            return {**self.metrics, 'rate': self.rate, 'chunk': self.chunk}
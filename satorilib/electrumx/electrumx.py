@@ -4,7 +4,9 @@ import socket
 import json
 import time
 import queue
+import itertools
 import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from satorilib.electrumx import ElectrumxConnection
 from satorilib.electrumx import ElectrumxApi
 
@@ -44,19 +46,58 @@ class Subscription:
         return self.shortLivedCallback(*args, **kwargs)
 
 
+class LineFramer:
+    '''
+    splits a stream of bytes into newline terminated messages. however the
+    bytes arrive - a message split across many reads or many messages in one
+    read - feed returns every message completed so far and keeps the rest.
+    '''
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list[bytes]:
+        end = data.rfind(b'\n')
+        if end == -1:
+            self.buffer += data
+            return []
+        if len(self.buffer) > 0:
+            self.buffer += data[:end]
+            messages = bytes(self.buffer).split(b'\n')
+            self.buffer.clear()
+        else:
+            messages = data[:end].split(b'\n')
+        self.buffer += data[end + 1:]
+        return [message for message in messages if message.strip()]
+
+
 class Electrumx(ElectrumxConnection):
     def __init__(
         self,
         *args,
         persistent: bool = False,
+        responseTimeout: float = 30,
+        recvSize: int = 1024 * 256,
         **kwargs,
     ):
         super(type(self), self).__init__(*args, **kwargs)
-        self.api = ElectrumxApi(send=self.send, subscribe=self.subscribe)
+        self.api = ElectrumxApi(
+            send=self.send,
+            subscribe=self.subscribe,
+            sendBatch=self.sendBatch)
         self.lock = threading.Lock()
+        self.sendLock = threading.Lock()
         self.subscriptions: dict[Subscription, queue.Queue] = {}
-        self.responses: dict[str, dict] = {}
+        # calls waiting on a reply, resolved by the listener as replies arrive
+        self.responseTimeout = responseTimeout
+        self.callIds = itertools.count(1)
+        self.pendingLock = threading.Lock()
+        self.pending: dict[Union[int, str], tuple[float, Future]] = {}
         self.quiet = queue.Queue()
+        # complete messages read off the socket, waiting to be parsed
+        self.recvSize = recvSize
+        self.inbox: queue.Queue[list[bytes]] = queue.Queue()
+        self.parser = None
         self.listenerStop = threading.Event()
         self.pingerStop = threading.Event()
         self.startListener()
@@ -74,6 +115,9 @@ class Electrumx(ElectrumxConnection):
         return subscription
 
     def startListener(self):
+        if self.parser is None or not self.parser.is_alive():
+            self.parser = threading.Thread(target=self.parse, daemon=True)
+            self.parser.start()
         self.listenerStop.clear()
         self.listener = threading.Thread(target=self.listen, daemon=True)
         self.listener.start()
@@ -84,54 +128,22 @@ class Electrumx(ElectrumxConnection):
         self.pinger.start()
 
     def listen(self):
-
-        def handleMultipleMessages(buffer: str):
-            ''' split on the first newline to handle multiple messages '''
-            return buffer.partition('\n')
-
-        buffer = ''
+        ''' reads the socket, the parser thread does everything else '''
+        framer = LineFramer()
         while not self.listenerStop.is_set():
             if not self.isConnected:
                 time.sleep(1)
                 continue
             try:
-                raw = self.connection.recv(1024 * 16).decode('utf-8')
-                buffer += raw
-                if raw == '':
+                raw = self.connection.recv(self.recvSize)
+                if raw == b'':
                     self.quiet.put(time.time())
                     self.isConnected = False
+                    self.abandonPending()
                     continue
-                if '\n' in raw:
-                    message, _, buffer = handleMultipleMessages(buffer)
-                    try:
-                        r: dict = json.loads(message)
-                        method = r.get('method', '')
-                        if method == 'blockchain.headers.subscribe':
-                            subscription = self.findSubscription(
-                                subscription=Subscription(method, params=[]))
-                            q = self.subscriptions.get(subscription)
-                            if isinstance(q, queue.Queue):
-                                q.put(r)
-                            subscription(r)
-                        if method == 'blockchain.scripthash.subscribe':
-                            subscription = self.findSubscription(
-                                subscription=Subscription(
-                                    method,
-                                    params=r.get(
-                                        'params',
-                                        ['scripthash', 'status'])[0]))
-                            q = self.subscriptions.get(subscription)
-                            if isinstance(q, queue.Queue):
-                                q.put(r)
-                            subscription(r)
-                        else:
-                            self.responses[
-                                r.get('id', self._generateCallId())] = r
-                    except json.decoder.JSONDecodeError as e:
-                        logging.error((
-                            f"JSONDecodeError: {e} in message: {message} "
-                            "error in _receive"))
-                        self.quiet.put(time.time())
+                messages = framer.feed(raw)
+                if len(messages) > 0:
+                    self.inbox.put(messages)
             except socket.timeout:
                 logging.warning('no activity for 10 minutes, wallet going to sleep.')
                 self.quiet.put(time.time())
@@ -140,36 +152,114 @@ class Electrumx(ElectrumxConnection):
             #    self.quiet.put(time.time())
             #    self.isConnected = False
 
+    def parse(self):
+        ''' parses and routes what the listener read, off the socket thread '''
+        while True:
+            for message in self.inbox.get():
+                try:
+                    decoded = json.loads(message)
+                    # the reply to a batch is a list of replies
+                    for r in decoded if isinstance(decoded, list) else [decoded]:
+                        self.handleMessage(r)
+                except json.decoder.JSONDecodeError as e:
+                    logging.error((
+                        f"JSONDecodeError: {e} in message: {message} "
+                        "error in _receive"))
+                    self.quiet.put(time.time())
+                except Exception as e:
+                    logging.error(f'error handling message {message}: {e}')
+
+    def handleMessage(self, r: dict):
+        method = r.get('method', '')
+        if method == 'blockchain.headers.subscribe':
+            subscription = self.findSubscription(
+                subscription=Subscription(method, params=[]))
+            q = self.subscriptions.get(subscription)
+            if isinstance(q, queue.Queue):
+                q.put(r)
+            subscription(r)
+        elif method == 'blockchain.scripthash.subscribe':
+            # subscribed with [scripthash], notified with [scripthash, status]
+            subscription = self.findSubscription(
+                subscription=Subscription(
+                    method,
+                    params=r.get(
+                        'params',
+                        ['scripthash', 'status'])[:1]))
+            q = self.subscriptions.get(subscription)
+            if isinstance(q, queue.Queue):
+                q.put(r)
+            subscription(r)
+        else:
+            self.resolve(r)
+
     def listenForSubscriptions(self, method: str, params: list) -> dict:
         return self.subscriptions[Subscription(method, params)].get()
 
 
-    def listenForResponse(self, callId: Union[str, None] = None) -> Union[dict, None]:
-        then = time.time()
-        while time.time() < then + 30:
-            response = self.responses.get(callId)
-            if response is not None:
-                del self.responses[callId]
-                self.cleanUpResponses()
-                return response
-            time.sleep(1)
-        return None
-
-    def cleanUpResponses(self):
+    def listenForResponse(
+        self,
+        callId: Union[int, str, None] = None,
+        timeout: Union[float, None] = None,
+        future: Union[Future, None] = None,
+    ) -> Union[dict, None]:
         '''
-        clear all stale responses since the key is a stringed time.time()
+        waits for the listener to resolve this call, None on timeout. pass
+        the future expectResponse gave you, the reply may already be in.
         '''
-        currentTime = time.time()
-        stale = 30
-        keysToDelete = []
-        for key in self.responses.keys():
-            try:
-                if float(key) < currentTime - stale:
-                    keysToDelete.append(key)
-            except Exception as e:
-                logging.warning(f'error in cleanUpResponses {e}')
-        for key in keysToDelete:
-            del self.responses[key]
+        if future is None:
+            with self.pendingLock:
+                entry = self.pending.get(callId)
+            if entry is None:
+                return None
+            future = entry[1]
+        try:
+            return future.result(timeout=timeout or self.responseTimeout)
+        except FutureTimeout as _:
+            logging.warning(f'no response to call {callId}')
+            return None
+        finally:
+            with self.pendingLock:
+                self.pending.pop(callId, None)
+
+    def expectResponse(self, callId: Union[int, str]) -> Future:
+        ''' registers a call before it's sent so its reply can't be missed '''
+        future = Future()
+        with self.pendingLock:
+            self.pending[callId] = (time.time(), future)
+        return future
+
+    def resolve(self, response: dict):
+        ''' hands a reply to whoever is waiting on its id '''
+        with self.pendingLock:
+            entry = self.pending.pop(response.get('id'), None)
+        if entry is None:
+            if response.get('id') is None and 'error' in response:
+                # e.g. a batch the server refused as a whole
+                logging.warning(f'electrumx error: {response.get("error")}')
+            # a reply to a call that timed out or was sent with sendOnly
+            return
+        if not entry[1].done():
+            entry[1].set_result(response)
+
+    def abandonPending(self):
+        ''' the connection is gone, nobody is going to answer these '''
+        with self.pendingLock:
+            entries = list(self.pending.values())
+            self.pending.clear()
+        for _, future in entries:
+            if not future.done():
+                future.set_result(None)
+
+    def cleanUpPending(self):
+        ''' drops calls nobody is waiting on anymore '''
+        stale = time.time() - self.responseTimeout * 2
+        with self.pendingLock:
+            for callId in [
+                callId for callId, (sent, _) in self.pending.items()
+                if sent < stale
+            ]:
+                del self.pending[callId]
 
     def stayConnected(self):
         while not self.pingerStop.is_set():
@@ -184,6 +274,7 @@ class Electrumx(ElectrumxConnection):
             self.pingerStop.set()
         with self.lock:
             super().reconnect()
+            self.abandonPending()
             self.startListener()
             self.handshake()
             if self.persistent:
@@ -221,34 +312,77 @@ class Electrumx(ElectrumxConnection):
         except Exception as e:
             logging.error(f'error in handshake initial {e}')
 
+    def _generateCallId(self) -> int:
+        ''' increasing ints, unique per connection however many threads call '''
+        return next(self.callIds)
+
     @staticmethod
-    def _generateCallId() -> str:
-        return str(time.time())
+    def _prepareRequest(method: str, callId: Union[int, str], params: list) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": callId,
+            "method": method,
+            "params": params}
 
-    def _preparePayload(self, method: str, callId: str, params: list) -> bytes:
+    def _preparePayload(self, method: str, callId: Union[int, str], params: list) -> bytes:
         return (
-            json.dumps({
-                "jsonrpc": "2.0",
-                "id": callId,
-                "method": method,
-                "params": params
-            }) + '\n'
+            json.dumps(Electrumx._prepareRequest(method, callId, params)) + '\n'
         ).encode()
 
+    def _transmit(self, payload: bytes, callIds: list[Union[int, str]]):
+        try:
+            with self.sendLock:
+                self.connection.sendall(payload)
+        except Exception as e:
+            with self.pendingLock:
+                for callId in callIds:
+                    self.pending.pop(callId, None)
+            raise e
+
     def send(
         self,
         method: str,
         params: list,
-        callId: Union[str, None] = None,
+        callId: Union[int, str, None] = None,
         sendOnly: bool = False,
+        timeout: Union[float, None] = None,
     ) -> Union[dict, None]:
         callId = callId or self._generateCallId()
         payload = self._preparePayload(method, callId, params)
-        self.connection.send(payload)
         if sendOnly:
+            self._transmit(payload, [callId])
             return None
-        x = self.listenForResponse(callId)
-        return x
+        self.cleanUpPending()
+        future = self.expectResponse(callId)
+        self._transmit(payload, [callId])
+        return self.listenForResponse(callId, timeout=timeout, future=future)
+
+    def sendBatch(
+        self,
+        calls: list[tuple[str, list]],
+        timeout: Union[float, None] = None,
+    ) -> list[Union[dict, None]]:
+        '''
+        sends (method, params) calls as one json-rpc batch, returns the
+        replies in the same order, None for any that didn't come in time.
+        '''
+        if len(calls) == 0:
+            return []
+        callIds = [self._generateCallId() for _ in calls]
+        payload = (json.dumps([
+            Electrumx._prepareRequest(method, callId, params)
+            for callId, (method, params) in zip(callIds, calls)
+        ]) + '\n').encode()
+        self.cleanUpPending()
+        futures = [self.expectResponse(callId) for callId in callIds]
+        self._transmit(payload, callIds)
+        deadline = time.time() + (timeout or self.responseTimeout)
+        return [
+            self.listenForResponse(
+                callId,
+                timeout=max(0.001, deadline - time.time()),
+                future=future)
+            for callId, future in zip(callIds, futures)]
 
     def subscribe(
         self,
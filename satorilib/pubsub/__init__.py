@@ -1 +1,3 @@
 from .pubsub import SatoriPubSubConn
+from .asyncpubsub import AsyncSatoriPubSubConn
+from .dispatch import Dispatcher
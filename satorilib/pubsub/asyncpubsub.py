@@ -0,0 +1,310 @@
+# an asyncio version of SatoriPubSubConn. every connection is a task on one
+# event loop (a shared background loop unless you hand it yours), so a process
+# with many subscriptions holds one thread rather than one per connection.
+#
+# when the connection drops we reconnect right away and then back off
+# exponentially with full jitter (so a fleet doesn't stampede the server when
+# it comes back), resetting once a connection holds. anything sent while we're
+# down waits in a bounded outbox and goes out as soon as we're back; if the
+# outbox fills the oldest messages are dropped and counted. websocket pings
+# serve as heartbeats so a dead connection is noticed within a couple of
+# intervals instead of when the next send fails.
+
+from typing import Union, Callable
+import json
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from satorilib import logging
+from satorilib.pubsub.dispatch import Dispatcher
+
+_sharedLoop: Union[asyncio.AbstractEventLoop, None] = None
+_sharedLoopLock = threading.Lock()
+
+
+def sharedLoop() -> asyncio.AbstractEventLoop:
+    ''' a background event loop all connections made off-loop run on '''
+    global _sharedLoop
+    with _sharedLoopLock:
+        if _sharedLoop is None:
+            loop = asyncio.new_event_loop()
+            running = threading.Event()
+
+            def runForever():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(running.set)
+                loop.run_forever()
+
+            threading.Thread(target=runForever, daemon=True).start()
+            running.wait()
+            _sharedLoop = loop
+        return _sharedLoop
+
+
+class AsyncSatoriPubSubConn(object):
+
+    def __init__(
+        self,
+        uid: str,
+        payload: Union[dict, str],
+        url: Union[str, None] = None,
+        router: Union[Callable, None] = None,
+        then: Union[str, None] = None,
+        command: str = 'key',
+        onConnect: Callable = None,
+        onDisconnect: Callable = None,
+        emergencyRestart: Callable = None,
+        outboxSize: int = 1000,
+        heartbeat: float = 20,
+        minDelay: float = 1,
+        maxDelay: float = 60,
+        loop: asyncio.AbstractEventLoop = None,
+        dispatcher: Dispatcher = None,
+        start: bool = True,
+        *args, **kwargs
+    ):
+        self.uid = uid
+        self.url = url or 'ws://pubsub.satorinet.io:24603'
+        self.payload = payload if isinstance(payload, str) else json.dumps(payload)
+        self.router = router
+        # kept across reconnects, and never stopped here since it may be shared
+        self.dispatcher = dispatcher
+        self.then = then
+        self.command = command
+        self.onConnect = onConnect
+        self.onDisconnect = onDisconnect
+        self.emergencyRestart = emergencyRestart
+        self.heartbeat = heartbeat
+        self.minDelay = minDelay
+        self.maxDelay = maxDelay
+        self.topicTime: dict[str, float] = {}
+        self.outbox: deque = deque(maxlen=outboxSize)
+        self.ws = None
+        self.loop = loop
+        self.task = None
+        self.shouldReconnect = True
+        self.connected = False
+        self.attempts = 0
+        self.metrics = {
+            'connects': 0,
+            'disconnects': 0,
+            'sent': 0,
+            'received': 0,
+            'dropped': 0}
+        self._wake: Union[asyncio.Event, None] = None
+        if start:
+            self.start()
+
+    ### lifecycle ###
+
+    def start(self):
+        ''' runs on the given loop, the running loop, or the shared one '''
+        if self.loop is None:
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.loop = sharedLoop()
+        if self._inLoop():
+            self.task = self.loop.create_task(self.run())
+        else:
+            self.task = asyncio.run_coroutine_threadsafe(self.run(), self.loop)
+        return self.task
+
+    def _inLoop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _call(self, fn: Callable, *args):
+        ''' runs fn on our loop whichever thread we're called from '''
+        if self._inLoop():
+            fn(*args)
+        else:
+            self.loop.call_soon_threadsafe(fn, *args)
+
+    def _delay(self) -> float:
+        ''' full jitter: anywhere up to the exponential backoff for this attempt '''
+        if self.attempts == 0:
+            return 0
+        return random.uniform(0, min(self.maxDelay, self.minDelay * 2 ** (self.attempts - 1)))
+
+    async def run(self):
+        import websockets
+        self._wake = asyncio.Event()
+        while self.shouldReconnect:
+            await asyncio.sleep(self._delay())
+            if not self.shouldReconnect:
+                break
+            connectedAt = None
+            try:
+                async with websockets.connect(
+                    f'{self.url}?uid={self.uid}',
+                    ping_interval=self.heartbeat,
+                    ping_timeout=self.heartbeat,
+                    close_timeout=min(5, self.heartbeat),
+                    max_size=None,
+                ) as ws:
+                    self.ws = ws
+                    connectedAt = time.time()
+                    await self._connected(ws)
+                    await self._session(ws)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                if 'Forbidden' in str(e) or '403' in str(e):
+                    logging.error('pubsub refused connection', e, print=True)
+                    self.shouldReconnect = False
+            finally:
+                await self._disconnected()
+            # only a connection that held for a while resets the backoff
+            if connectedAt is not None and time.time() - connectedAt > self.heartbeat * 2:
+                self.attempts = 1
+            else:
+                self.attempts += 1
+
+    async def _connected(self, ws):
+        self.connected = True
+        self.metrics['connects'] += 1
+        if isinstance(self.onConnect, Callable):
+            self.onConnect()
+        await ws.send(self.command + ':' + self.payload)
+        logging.info(
+            'connected to:', self.url, 'for',
+            'publishing' if self.router is None else 'subscriptions',
+            'as', self.uid, color='green')
+        if self.then is not None:
+            await ws.send(self.then)
+            self.then = None
+
+    async def _disconnected(self):
+        wasConnected = self.connected
+        self.connected = False
+        self.ws = None
+        if wasConnected:
+            self.metrics['disconnects'] += 1
+        if isinstance(self.onDisconnect, Callable):
+            self.onDisconnect()
+
+    async def _session(self, ws):
+        ''' reads and writes until either side fails '''
+        reader = asyncio.ensure_future(self._read(ws))
+        writer = asyncio.ensure_future(self._write(ws))
+        try:
+            done, _ = await asyncio.wait(
+                [reader, writer],
+                return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            reader.cancel()
+            writer.cancel()
+
+    async def _read(self, ws):
+        async for message in ws:
+            self.metrics['received'] += 1
+            if message == '---STOP!---' and isinstance(self.emergencyRestart, Callable):
+                self.emergencyRestart()
+                continue
+            if self.dispatcher is not None:
+                # one dispatcher can serve many connections, only wait for room
+                # (off the loop) when the buffer is full and the policy blocks
+                if not self.dispatcher.offer(message):
+                    await self.loop.run_in_executor(None, self.dispatcher.put, message)
+                continue
+            if self.router is None:
+                continue
+            # off the loop so a slow router never stalls heartbeats
+            try:
+                await self.loop.run_in_executor(None, self.router, message)
+            except Exception as _:
+                pass
+
+    async def _write(self, ws):
+        while True:
+            while len(self.outbox) > 0:
+                payload = self.outbox[0]
+                await ws.send(payload)
+                self.outbox.popleft()
+                self.metrics['sent'] += 1
+            self._wake.clear()
+            await self._wake.wait()
+
+    ### api ###
+
+    def _enqueue(self, payload: str):
+        if len(self.outbox) == self.outbox.maxlen:
+            self.metrics['dropped'] += 1
+        self.outbox.append(payload)
+        if self._wake is not None:
+            self._wake.set()
+
+    def send(
+        self,
+        payload: Union[str, None] = None,
+        title: Union[str, None] = None,
+        topic: Union[str, None] = None,
+        data: Union[str, None] = None,
+        observationTime: Union[str, None] = None,
+        observationHash: Union[str, None] = None,
+    ):
+        ''' queues a message, it goes out now or as soon as we reconnect '''
+        if payload is None and title is None and topic is None and data is None:
+            raise ValueError(
+                'payload or (title, topic, data) must not be None')
+        payload = payload or (
+            title + ':' + json.dumps({
+                'topic': topic,
+                'data': str(data),
+                'time': str(observationTime),
+                'hash': str(observationHash),
+            }))
+        self._call(self._enqueue, payload)
+
+    def setTopicTime(self, topic: str):
+        self.topicTime[topic] = time.time()
+
+    def publish(self, topic: str, data: str, observationTime: str, observationHash: str):
+        if self.topicTime.get(topic, 0) > time.time() - 55:
+            return
+        self.setTopicTime(topic)
+        self.send(
+            title='publish',
+            topic=topic,
+            data=data,
+            observationTime=observationTime,
+            observationHash=observationHash)
+
+    def setRouter(self, router: Callable = None):
+        self.router = router
+
+    async def _close(self, reconnect: bool):
+        self.shouldReconnect = reconnect
+        ws = self.ws
+        if ws is not None:
+            try:
+                await ws.send('notice:' + json.dumps({
+                    'topic': 'connection',
+                    'data': 'False',
+                    'time': 'None',
+                    'hash': 'None'}))
+            except Exception as _:
+                pass
+            await ws.close()
+        if not reconnect and self.task is not None:
+            self.task.cancel()
+
+    def disconnect(self, reconnect: bool = False):
+        ''' closes the connection, reconnecting afterwards only if asked '''
+        if self._inLoop():
+            return self.loop.create_task(self._close(reconnect))
+        return asyncio.run_coroutine_threadsafe(self._close(reconnect), self.loop)
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            'connected': self.connected,
+            'queued': len(self.outbox),
+            'attempts': self.attempts}
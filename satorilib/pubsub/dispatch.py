@@ -0,0 +1,204 @@
+# a stage between a pubsub socket and its router. the receiving side only
+# appends to a bounded ring buffer, worker threads drain it and hand the router
+# many messages at a time, so a slow router never holds up the socket read.
+#
+# when the buffer is full the policy decides: 'block' makes the receiver wait
+# (backpressure all the way to the server, for streams we can't lose),
+# 'dropOldest' keeps the newest messages and 'dropNewest' refuses new ones.
+# hold() keeps messages buffered without delivering them, e.g. until a sync
+# completes, and release() lets them flow.
+
+from typing import Union, Callable
+import time
+import threading
+from collections import deque
+from satorilib import logging
+
+
+class Dispatcher(object):
+
+    policies = ('block', 'dropOldest', 'dropNewest')
+
+    def __init__(
+        self,
+        router: Callable,
+        batch: bool = False,
+        capacity: int = 10000,
+        workers: int = 1,
+        maxBatch: int = 100,
+        maxDelay: float = 0.05,
+        policy: str = 'block',
+        blockTimeout: Union[float, None] = None,
+        held: bool = False,
+    ):
+        '''
+        router gets a list of messages if batch is True, otherwise it's called
+        once per message (still from the worker). one worker keeps messages in
+        order, more workers trade order for throughput.
+        '''
+        if policy not in Dispatcher.policies:
+            raise ValueError(f'policy must be one of {Dispatcher.policies}')
+        self.router = router
+        self.batch = batch
+        self.capacity = capacity
+        self.maxBatch = maxBatch
+        self.maxDelay = maxDelay
+        self.policy = policy
+        self.blockTimeout = blockTimeout
+        self.buffer: deque = deque()
+        self.lock = threading.Lock()
+        self.notEmpty = threading.Condition(self.lock)
+        self.notFull = threading.Condition(self.lock)
+        self.released = threading.Event()
+        if not held:
+            self.released.set()
+        self.running = True
+        self.metrics = {
+            'received': 0,
+            'delivered': 0,
+            'dropped': 0,
+            'blocked': 0,
+            'batches': 0,
+            'errors': 0}
+        # seconds from arrival to delivery of recent messages
+        self.latencies: deque = deque(maxlen=1024)
+        self.threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    ### receiving side ###
+
+    def _append(self, message) -> bool:
+        ''' called holding the lock with room in the buffer '''
+        self.buffer.append((time.perf_counter(), message))
+        self.metrics['received'] += 1
+        self.notEmpty.notify()
+        return True
+
+    def offer(self, message) -> bool:
+        ''' never waits, false if the message would have to wait for room '''
+        with self.lock:
+            if len(self.buffer) < self.capacity:
+                return self._append(message)
+            if self.policy == 'dropOldest':
+                self.buffer.popleft()
+                self.metrics['dropped'] += 1
+                return self._append(message)
+            if self.policy == 'dropNewest':
+                self.metrics['dropped'] += 1
+                return True
+            return False
+
+    def put(self, message) -> bool:
+        ''' buffers a message per the policy, false if it was dropped '''
+        with self.lock:
+            if len(self.buffer) >= self.capacity:
+                if self.policy == 'dropOldest':
+                    self.buffer.popleft()
+                    self.metrics['dropped'] += 1
+                elif self.policy == 'dropNewest':
+                    self.metrics['dropped'] += 1
+                    return False
+                else:
+                    self.metrics['blocked'] += 1
+                    deadline = (
+                        None if self.blockTimeout is None
+                        else time.monotonic() + self.blockTimeout)
+                    while len(self.buffer) >= self.capacity and self.running:
+                        remaining = (
+                            None if deadline is None
+                            else deadline - time.monotonic())
+                        if remaining is not None and remaining <= 0:
+                            self.metrics['dropped'] += 1
+                            return False
+                        self.notFull.wait(timeout=remaining)
+            return self._append(message)
+
+    ### delivering side ###
+
+    def _take(self) -> list:
+        ''' up to maxBatch messages, waiting up to maxDelay to fill a batch '''
+        self.released.wait()
+        with self.lock:
+            while len(self.buffer) == 0 and self.running:
+                self.notEmpty.wait(timeout=1)
+            if not self.running and len(self.buffer) == 0:
+                return []
+            # a full buffer is as big as a batch can get
+            target = min(self.maxBatch, self.capacity)
+            if len(self.buffer) < target and self.maxDelay > 0:
+                deadline = time.monotonic() + self.maxDelay
+                while len(self.buffer) < target and self.running:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.notEmpty.wait(timeout=remaining)
+            taken = [
+                self.buffer.popleft()
+                for _ in range(min(self.maxBatch, len(self.buffer)))]
+            self.notFull.notify_all()
+            return taken
+
+    def _work(self):
+        while self.running or len(self.buffer) > 0:
+            taken = self._take()
+            if len(taken) == 0:
+                continue
+            messages = [message for _, message in taken]
+            try:
+                if self.batch:
+                    self.router(messages)
+                else:
+                    for message in messages:
+                        self.router(message)
+            except Exception as e:
+                # don't break the dispatcher because of router behavior
+                with self.lock:
+                    self.metrics['errors'] += 1
+                logging.error('router failed on batch', e, print=True)
+            now = time.perf_counter()
+            with self.lock:
+                self.metrics['delivered'] += len(taken)
+                self.metrics['batches'] += 1
+                self.latencies.extend(now - arrived for arrived, _ in taken)
+
+    ### control ###
+
+    def hold(self):
+        ''' keep buffering but stop delivering '''
+        self.released.clear()
+
+    def release(self):
+        self.released.set()
+
+    def stop(self, drain: bool = True):
+        ''' stops the workers, delivering what's buffered first if drain '''
+        if not drain:
+            with self.lock:
+                self.buffer.clear()
+        self.release()
+        with self.lock:
+            self.running = False
+            self.notEmpty.notify_all()
+            self.notFull.notify_all()
+        for thread in self.threads:
+            thread.join()
+
+    def stats(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            return {
+                **self.metrics,
+                'depth': len(self.buffer),
+                'capacity': self.capacity,
+                'held': not self.released.is_set(),
+                'latencyMeanMs': (
+                    1000 * sum(latencies) / len(latencies)
+                    if len(latencies) > 0 else None),
+                'latencyP95Ms': (
+                    1000 * latencies[int(len(latencies) * 0.95)]
+                    if len(latencies) > 0 else None),
+                'latencyMaxMs': (
+                    1000 * latencies[-1] if len(latencies) > 0 else None)}
@@ -9,12 +9,15 @@
 # in reserve to the system that saves it to disk and routes it to the engine.
 # since the engine will not even be started until after the router is complete,
 # and all messages saved to the disk, this should be fine.
+# (pass a Dispatcher with held=True to buffer them until dispatcher.release(),
+# or batch=True to have the router handed lists of messages.)
 
 from typing import Union, Callable
 import json
 import time
 import threading
 from satorilib import logging
+from satorilib.pubsub.dispatch import Dispatcher
 
 
 class SatoriPubSubConn(object):
@@ -24,6 +27,7 @@ class SatoriPubSubConn(object):
         then: Union[str, None] = None, command: str = 'key', threaded: bool = True,
         onConnect: callable = None, onDisconnect: callable = None,
         emergencyRestart: callable = None,
+        dispatcher: Dispatcher = None,
         *args, **kwargs
     ):
         self.c = 0
@@ -41,6 +45,10 @@ class SatoriPubSubConn(object):
         self.ws = None
         self.then = then
         self.emergencyRestart = emergencyRestart
+        # the receive thread only buffers, the router runs on the dispatcher's.
+        # one per client, restart() hands it back in rather than making another
+        self.ownsDispatcher = dispatcher is None
+        self.dispatcher = dispatcher or Dispatcher(router=self._route)
         if self.threaded:
             self.ear = threading.Thread(
                 target=self.connectThenListen, daemon=True)
@@ -101,12 +109,7 @@ class SatoriPubSubConn(object):
                         self.emergencyRestart()
                 except Exception as _:
                     pass
-                # don't break listener because of router behavior
-                try:
-                    if self.router is not None:
-                        self.router(response)
-                except Exception as _:
-                    pass
+                self.dispatcher.put(response)
             except Exception as e:
                 # except WebSocketConnectionClosedException as e:
                 # except ConnectionResetError:
@@ -115,6 +118,14 @@ class SatoriPubSubConn(object):
                 time.sleep(60)
                 break
 
+    def _route(self, message: str):
+        # don't break dispatcher because of router behavior
+        try:
+            if self.router is not None:
+                self.router(message)
+        except Exception as _:
+            pass
+
     def setTopicTime(self, topic: str):
         self.topicTime[topic] = time.time()
 
@@ -135,14 +146,18 @@ class SatoriPubSubConn(object):
                 break
 
     def restart(self, payload: str = None):
-        self = self.__init__(
+        ownsDispatcher = self.ownsDispatcher
+        self.__init__(
             uid=self.uid,
             payload=self.payload,
             url=self.url,
             router=self.router,
             listening=self.listening,
             command=self.command,
+            threaded=self.threaded,
+            dispatcher=self.dispatcher,
             then=payload)
+        self.ownsDispatcher = ownsDispatcher
 
     def send(
         self,
@@ -196,6 +211,9 @@ class SatoriPubSubConn(object):
         self.ws.close()  # server should detect we closed the connection
         assert (self.ws.connected == False)
         self.ws = None
+        if not reconnect and self.ownsDispatcher:
+            # deliver what was already received, then let its workers go
+            self.dispatcher.stop()
 
     def setRouter(self, router: 'function' = None):
         self.router = router
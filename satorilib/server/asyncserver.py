@@ -0,0 +1,554 @@
+'''
+an asyncio flavor of SatoriServerClient for processes that drive many wallets
+at once. requests are made with aiohttp on one shared keep-alive session and
+a semaphore bounds how many are in flight, so checking in or publishing for
+hundreds of wallets takes about as long as the slowest few round trips:
+
+    session = AsyncSatoriServerClient.sharedSession()
+    semaphore = asyncio.Semaphore(64)
+    clients = [
+        AsyncSatoriServerClient(wallet, session=session, semaphore=semaphore)
+        for wallet in wallets]
+    results = await asyncio.gather(*[client.checkin() for client in clients])
+
+headers and signing are SatoriServerClient's own, the endpoint methods return
+what their synchronous counterparts return.
+'''
+from typing import Union
+import time
+import json
+import asyncio
+import aiohttp
+import requests
+from satorilib import logging
+from satorilib.utils.time import timeToTimestamp
+from satorilib.utils.json import sanitizeJson
+from satorilib.wallet import Wallet
+from satorilib.concepts.structs import Stream
+from satorilib.server.server import SatoriServerClient
+from satorilib.server.pooling import LatencyHistogram
+from satorilib.server.auth import AuthCache
+
+
+class AsyncResponse():
+    ''' the parts of requests.Response the endpoint methods rely on '''
+
+    def __init__(self, url: str, status: int, text: str, reason: str = ''):
+        self.url = url
+        self.status_code = status
+        self.text = text
+        self.reason = reason
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(
+                f'{self.status_code} {self.reason} for url: {self.url}',
+                response=self)
+
+
+class AsyncSatoriServerClient(object):
+
+    # borrowed so both clients sign and shape requests the same way
+    _getChallenge = SatoriServerClient._getChallenge
+    _authHeaders = SatoriServerClient._authHeaders
+    _unauthenticatedBody = staticmethod(SatoriServerClient._unauthenticatedBody)
+    setTopicTime = SatoriServerClient.setTopicTime
+
+    def __init__(
+        self,
+        wallet: Wallet,
+        url: str = None,
+        sendingUrl: str = None,
+        *args,
+        session: aiohttp.ClientSession = None,
+        semaphore: asyncio.Semaphore = None,
+        concurrency: int = 64,
+        timeout: Union[float, tuple[float, float], None] = (10, 120),
+        authCache: AuthCache = None,
+        authTtl: float = 30,
+        **kwargs
+    ):
+        self.wallet = wallet
+        self.url = url or 'https://central.satorinet.io'
+        self.sendingUrl = sendingUrl or 'https://mundo.satorinet.io'
+        self.topicTime: dict[str, float] = {}
+        self.lastCheckin: int = 0
+        self.timeout = timeout
+        self._session = session
+        self._ownsSession = session is None
+        self.semaphore = semaphore or asyncio.Semaphore(concurrency)
+        self.latency = LatencyHistogram()
+        self.authCache = authCache or AuthCache(ttl=authTtl)
+
+    @staticmethod
+    def sharedSession(
+        poolSize: int = 100,
+        timeout: Union[float, tuple[float, float], None] = (10, 120),
+    ) -> aiohttp.ClientSession:
+        ''' a keep-alive session many clients can share, call from a running loop '''
+        return aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=poolSize),
+            timeout=AsyncSatoriServerClient._clientTimeout(timeout))
+
+    @staticmethod
+    def _clientTimeout(timeout: Union[float, tuple[float, float], None]) -> aiohttp.ClientTimeout:
+        if timeout is None:
+            return aiohttp.ClientTimeout(total=None)
+        if isinstance(timeout, tuple):
+            return aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=timeout[0],
+                sock_read=timeout[1])
+        return aiohttp.ClientTimeout(total=timeout)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = AsyncSatoriServerClient.sharedSession(
+                timeout=self.timeout)
+            self._ownsSession = True
+        return self._session
+
+    async def close(self):
+        ''' closes the session if this client made it, shared ones are the caller's '''
+        if self._ownsSession and self._session is not None:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def latencies(self) -> dict[str, dict]:
+        return self.latency.snapshot()
+
+    async def _send(self, method: str, url: str, endpoint: str, **kwargs) -> AsyncResponse:
+        kwargs = {k: v for k, v in kwargs.items() if v is not None}
+        failed = True
+        async with self.semaphore:
+            start = time.perf_counter()
+            try:
+                async with self.session.request(method, url + endpoint, **kwargs) as r:
+                    response = AsyncResponse(
+                        url=str(r.url),
+                        status=r.status,
+                        text=await r.text(),
+                        reason=r.reason or '')
+                failed = not response.ok
+                return response
+            finally:
+                self.latency.observe(
+                    endpoint, time.perf_counter() - start, failed=failed)
+
+    async def _makeAuthenticatedCall(
+        self,
+        method: str,
+        endpoint: str,
+        url: str = None,
+        payload: Union[str, dict, None] = None,
+        challenge: str = None,
+        useWallet: Wallet = None,
+        extraHeaders: Union[dict, None] = None,
+        raiseForStatus: bool = True,
+    ) -> AsyncResponse:
+        if isinstance(payload, dict):
+            payload = json.dumps(payload)
+        if payload is not None:
+            logging.info(
+                f'outgoing: {endpoint}',
+                payload[0:40], f'{"..." if len(payload) > 40 else ""}',
+                print=True)
+        r = await self._send(
+            method,
+            url or self.url,
+            endpoint,
+            headers=self._authHeaders(
+                challenge=challenge,
+                useWallet=useWallet,
+                extraHeaders=extraHeaders),
+            json=payload)
+        if r.status_code == 401:
+            # a reused signature may have aged out on the server's side
+            self.authCache.forget(useWallet or self.wallet)
+        if raiseForStatus:
+            try:
+                r.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                logging.error('authenticated server err:',
+                              r.text, e, color='red')
+                r.raise_for_status()
+        logging.info(
+            f'incoming: {endpoint}',
+            r.text[0:40], f'{"..." if len(r.text) > 40 else ""}',
+            print=True)
+        return r
+
+    async def _makeUnauthenticatedCall(
+        self,
+        method: str,
+        endpoint: str,
+        url: str = None,
+        headers: Union[dict, None] = None,
+        payload: Union[str, bytes, None] = None,
+    ) -> AsyncResponse:
+        logging.info(
+            'outgoing Satori server message to ',
+            endpoint,
+            print=True)
+        headers, payloadJson, data = self._unauthenticatedBody(headers, payload)
+        r = await self._send(
+            method,
+            url or self.url,
+            endpoint,
+            headers=headers,
+            json=payloadJson,
+            data=data)
+        try:
+            r.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            logging.error("unauth'ed server err:", r.text, e, color='red')
+            r.raise_for_status()
+        logging.info(
+            'incoming Satori server message:',
+            r.text[0:40], f'{"..." if len(r.text) > 40 else ""}',
+            print=True)
+        return r
+
+    async def _statusAndText(
+        self,
+        method: str,
+        endpoint: str,
+        payload: Union[str, None] = None,
+        raiseForStatus: bool = True,
+    ) -> tuple[bool, str]:
+        ''' the (success, text) shape most of the stake and pool calls return '''
+        try:
+            response = await self._makeAuthenticatedCall(
+                method,
+                endpoint=endpoint,
+                payload=payload,
+                raiseForStatus=raiseForStatus)
+            return response.status_code < 400, response.text
+        except Exception as e:
+            logging.warning(
+                f'unable to reach {endpoint}; try again Later.', e, color='yellow')
+            return False, ''
+
+    ### register ###
+
+    async def registerWallet(self):
+        return await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/register/wallet',
+            payload=self.wallet.registerPayload())
+
+    async def registerStream(self, stream: dict, payload: str = None):
+        return await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/register/stream',
+            payload=payload or json.dumps(stream))
+
+    async def registerSubscription(self, subscription: dict, payload: str = None):
+        return await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/register/subscription',
+            payload=payload or json.dumps(subscription))
+
+    async def registerPin(self, pin: dict, payload: str = None):
+        return await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/register/pin',
+            payload=payload or json.dumps(pin))
+
+    ### streams ###
+
+    async def requestPrimary(self):
+        return await self._makeAuthenticatedCall(
+            'GET',
+            endpoint='/request/primary')
+
+    async def getStreams(self, stream: dict, payload: str = None):
+        return await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/get/streams',
+            payload=payload or json.dumps(stream))
+
+    async def myStreams(self):
+        return await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/my/streams',
+            payload='{}')
+
+    async def removeStream(self, stream: dict = None, payload: str = None):
+        if payload is None and stream is None:
+            raise ValueError('stream or payload must be provided')
+        return await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/remove/stream',
+            payload=payload or json.dumps(stream or {}))
+
+    async def getSearchStreams(self, searchText: str = None):
+        response = await self._makeUnauthenticatedCall(
+            'POST',
+            endpoint='/streams/search',
+            payload=json.dumps({'address': self.wallet.address}))
+        return sorted(
+            sanitizeJson(response.json()),
+            key=lambda x: (
+                x.get('vote', 0) == 0,
+                -x.get('vote', 0),
+                -x.get('total_vote', 0)))
+
+    ### checkin ###
+
+    async def checkin(self, referrer: str = None) -> dict:
+        challenge = self._getChallenge()
+        response = await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/checkin',
+            payload=self.wallet.registerPayload(challenge=challenge),
+            challenge=challenge,
+            extraHeaders={'referrer': referrer} if referrer else {},
+            raiseForStatus=False)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            logging.error('unable to checkin:', response.text, e, color='red')
+            return {'ERROR': response.text}
+        self.lastCheckin = time.time()
+        return response.json()
+
+    async def checkinCheck(self) -> bool:
+        challenge = self._getChallenge()
+        response = await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/checkin/check',
+            payload=self.wallet.registerPayload(challenge=challenge),
+            challenge=challenge,
+            extraHeaders={'changesSince': timeToTimestamp(self.lastCheckin)},
+            raiseForStatus=False)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            logging.error('unable to checkin:', response.text, e, color='red')
+            return False
+        return response.text.lower() == 'true'
+
+    ### publish ###
+
+    async def publish(
+        self,
+        topic: str,
+        data: str,
+        observationTime: str,
+        observationHash: str,
+        isPrediction: bool = True,
+        useAuthorizedCall: bool = True,
+    ) -> Union[bool, None]:
+        '''
+        publish predictions, True if accepted, False if the server refused it
+        and None if it didn't get through, like SatoriServerClient._publish
+        '''
+        if self.topicTime.get(topic, 0) > time.time() - (Stream.minimumCadence*.95):
+            return
+        self.setTopicTime(topic)
+        payload = json.dumps({
+            'topic': topic,
+            'data': str(data),
+            'time': str(observationTime),
+            'hash': str(observationHash)})
+        try:
+            if useAuthorizedCall:
+                response = await self._makeAuthenticatedCall(
+                    'POST',
+                    endpoint='/record/prediction/authed' if isPrediction else '/record/observation/authed',
+                    payload=payload)
+            else:
+                response = await self._makeUnauthenticatedCall(
+                    'POST',
+                    endpoint='/record/prediction' if isPrediction else '/record/observation',
+                    payload=payload)
+            if response.status_code == 200:
+                return True
+            if response.status_code > 399:
+                return SatoriServerClient._refused(response)
+            if response.text.lower() in ['fail', 'null', 'none', 'error']:
+                return False
+        except requests.exceptions.HTTPError as e:
+            return SatoriServerClient._refused(e.response)
+        except Exception as _:
+            return None
+        return True
+
+    ### stake, lend and pool ###
+
+    async def stakeCheck(self) -> bool:
+        try:
+            response = await self._makeAuthenticatedCall(
+                'GET',
+                endpoint='/stake/check')
+            return response.text == 'TRUE'
+        except Exception as e:
+            logging.warning(
+                'unable to check stake; try again Later.', e, color='yellow')
+            return False
+
+    async def stakeForAddress(
+        self,
+        vaultSignature: Union[str, bytes],
+        vaultPubkey: str,
+        address: str
+    ) -> tuple[bool, str]:
+        if isinstance(vaultSignature, bytes):
+            vaultSignature = vaultSignature.decode()
+        return await self._statusAndText(
+            'POST',
+            endpoint='/stake/for/address',
+            raiseForStatus=False,
+            payload=json.dumps({
+                'vaultSignature': vaultSignature,
+                'vaultPubkey': vaultPubkey,
+                'address': address}))
+
+    async def lendToAddress(
+        self,
+        vaultSignature: Union[str, bytes],
+        vaultPubkey: str,
+        address: str
+    ) -> tuple[bool, str]:
+        if isinstance(vaultSignature, bytes):
+            vaultSignature = vaultSignature.decode()
+        return await self._statusAndText(
+            'POST',
+            endpoint='/stake/lend/to/address',
+            raiseForStatus=False,
+            payload=json.dumps({
+                'vaultSignature': vaultSignature,
+                'vaultPubkey': vaultPubkey,
+                'address': address}))
+
+    async def lendRemove(self) -> tuple[bool, str]:
+        return await self._statusAndText('GET', endpoint='/stake/lend/remove')
+
+    async def lendAddress(self) -> Union[str, None]:
+        try:
+            response = await self._makeAuthenticatedCall(
+                'GET',
+                endpoint='/stake/lend/address')
+            if response.status_code > 399:
+                return 'Unknown'
+            if response.text in ['null', 'None', 'NULL']:
+                return ''
+            return response.text
+        except Exception as e:
+            logging.warning(
+                'unable to get lend address; try again Later.', e, color='yellow')
+            return ''
+
+    async def poolAddresses(self) -> tuple[bool, str]:
+        return await self._statusAndText('GET', endpoint='/stake/lend/addresses')
+
+    async def poolAddressRemove(self, lend_id: str) -> str:
+        return (await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/stake/lend/address/remove',
+            payload=json.dumps({'lend_id': lend_id}))).text
+
+    async def poolParticipants(self, vaultAddress: str) -> str:
+        return (await self._makeAuthenticatedCall(
+            'POST',
+            endpoint='/pool/participants',
+            payload=json.dumps({'vaultAddress': vaultAddress}))).text
+
+    async def poolAccepting(self, status: bool) -> tuple[bool, str]:
+        return await self._statusAndText(
+            'GET',
+            endpoint='/stake/lend/enable' if status else '/stake/lend/disable')
+
+    async def stakeProxyChildren(self) -> tuple[bool, str]:
+        return await self._statusAndText('GET', endpoint='/stake/proxy/children')
+
+    async def stakeProxyCharity(self, address: str, childId: int) -> tuple[bool, str]:
+        return await self._statusAndText(
+            'POST',
+            endpoint='/stake/proxy/charity',
+            payload=json.dumps({
+                'child': address,
+                **({} if childId in [None, 0, '0'] else {'childId': childId})}))
+
+    async def stakeProxyCharityNot(self, address: str, childId: int) -> tuple[bool, str]:
+        return await self._statusAndText(
+            'POST',
+            endpoint='/stake/proxy/charity/not',
+            payload=json.dumps({
+                'child': address,
+                **({} if childId in [None, 0, '0'] else {'childId': childId})}))
+
+    async def stakeProxyRemove(self, address: str, childId: int) -> tuple[bool, str]:
+        return await self._statusAndText(
+            'POST',
+            endpoint='/stake/proxy/remove',
+            payload=json.dumps({'child': address, 'childId': childId}))
+
+    async def delegateGet(self) -> tuple[bool, str]:
+        return await self._statusAndText('GET', endpoint='/stake/proxy/delegate')
+
+    async def delegateRemove(self) -> tuple[bool, str]:
+        return await self._statusAndText('GET', endpoint='/stake/proxy/delegate/remove')
+
+    async def mineToAddressStatus(self) -> Union[str, None]:
+        try:
+            response = await self._makeAuthenticatedCall(
+                'GET',
+                endpoint='/mine/to/address')
+            if response.status_code > 399:
+                return 'Unknown'
+            if response.text in ['null', 'None', 'NULL']:
+                return ''
+            return response.text
+        except Exception as e:
+            logging.warning(
+                'unable to get reward address; try again Later.', e, color='yellow')
+            return None
+
+    async def setRewardAddress(
+        self,
+        signature: Union[str, bytes],
+        pubkey: str,
+        address: str,
+        usingVault: bool = False,
+    ) -> tuple[bool, str]:
+        if isinstance(signature, bytes):
+            signature = signature.decode()
+        return await self._statusAndText(
+            'POST',
+            endpoint='/mine/to/address',
+            payload=json.dumps({
+                'vaultSignature' if usingVault else 'signature': signature,
+                'vaultPubkey' if usingVault else 'pubkey': pubkey,
+                'address': address}))
+
+    async def fetchWalletStatsDaily(self) -> str:
+        try:
+            response = await self._makeAuthenticatedCall(
+                'GET',
+                endpoint='/wallet/stats/daily')
+            return response.json()
+        except Exception as e:
+            logging.warning(
+                'unable to fetch wallet stats; try again Later.', e, color='yellow')
+            return ''
+
+    async def setMiningMode(self, status: bool) -> tuple[bool, str]:
+        return await self._statusAndText(
+            'GET',
+            endpoint='/worker/mining/mode/enable' if status else '/worker/mining/mode/disable')
@@ -0,0 +1,70 @@
+''' signed auth headers reused while their challenge is still fresh '''
+
+import time
+import threading
+from satorilib.wallet import Wallet
+
+
+class AuthCache():
+    '''
+    the challenge we sign is just the time, and the server accepts it for a
+    while, so signing a fresh one for every call is wasted work. we keep the
+    last signed payload per wallet and hand it out again until it's ttl
+    seconds old. one cache can be shared by any number of clients and wallets.
+    calls that bring their own challenge (checkin signs the same challenge in
+    the body) always sign.
+    '''
+
+    def __init__(self, ttl: float = 30):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries: dict = {}
+        self.locks: dict = {}
+        self.signed = 0
+        self.saved = 0
+
+    @staticmethod
+    def _keyOf(wallet: Wallet):
+        return getattr(wallet, 'publicKey', None) or id(wallet)
+
+    def _lockOf(self, key) -> threading.Lock:
+        with self.lock:
+            if key not in self.locks:
+                self.locks[key] = threading.Lock()
+            return self.locks[key]
+
+    def payload(self, wallet: Wallet, challenge: str = None) -> dict:
+        if challenge is not None:
+            with self.lock:
+                self.signed += 1
+            return wallet.authPayload(asDict=True, challenge=challenge)
+        key = AuthCache._keyOf(wallet)
+        # signing happens under the wallet's own lock so a burst signs once
+        with self._lockOf(key):
+            signedAt, payload = self.entries.get(key, (0, None))
+            if payload is not None and time.time() - signedAt < self.ttl:
+                with self.lock:
+                    self.saved += 1
+                return dict(payload)
+            signedAt = time.time()
+            payload = wallet.authPayload(asDict=True, challenge=str(signedAt))
+            self.entries[key] = (signedAt, payload)
+            with self.lock:
+                self.signed += 1
+            return dict(payload)
+
+    def forget(self, wallet: Wallet = None):
+        ''' drops a wallet's signature, or all of them '''
+        with self.lock:
+            if wallet is None:
+                self.entries = {}
+            else:
+                self.entries.pop(AuthCache._keyOf(wallet), None)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                'signed': self.signed,
+                'saved': self.saved,
+                'wallets': len(self.entries),
+                'ttl': self.ttl}
@@ -0,0 +1,160 @@
+''' the server's stream catalog, revalidated conditionally and indexed locally '''
+
+from typing import Union
+import os
+import re
+import json
+import time
+import bisect
+import threading
+import requests
+from satorilib import logging
+from satorilib.utils.json import sanitizeJson
+from satorilib.disk.utils import safetify
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in re.split(r'[^0-9a-z]+', str(text).lower()) if token]
+
+
+class StreamCatalog():
+    '''
+    keeps the /streams/search catalog locally. it's refetched at most every
+    `ttl` seconds and then only conditionally (If-None-Match/If-Modified-Since)
+    so an unchanged catalog costs a 304 rather than megabytes of json. the
+    last copy is saved to snapshotPath and loaded on start.
+
+    the streams are sanitized and sorted once per download and an inverted
+    index from the words of stream, source, target and tags to positions in
+    that sorted list answers searches without scanning: every word of the
+    query must prefix some word of the stream, results keep catalog order.
+    '''
+
+    fields = ('stream', 'source', 'target', 'tags')
+
+    def __init__(self, client: 'SatoriServerClient', snapshotPath: str = None, ttl: float = 60):
+        self.client = client
+        self.snapshotPath = snapshotPath
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.etag: Union[str, None] = None
+        self.lastModified: Union[str, None] = None
+        self.checked = 0.0
+        # (sorted streams, word -> positions, sorted words) swapped as one
+        self.view: tuple[list[dict], dict[str, list[int]], list[str]] = ([], {}, [])
+        self.fetches = 0
+        self.revalidations = 0
+        self._loadSnapshot()
+
+    @staticmethod
+    def sort(streams: list[dict]) -> list[dict]:
+        ''' voted on streams first, by our vote then everyone's '''
+        return sorted(
+            sanitizeJson(streams),
+            key=lambda x: (
+                x.get('vote', 0) == 0,
+                -x.get('vote', 0),
+                -x.get('total_vote', 0)))
+
+    @property
+    def streams(self) -> list[dict]:
+        return self.view[0]
+
+    def _build(self, streams: list[dict]):
+        index: dict[str, list[int]] = {}
+        for position, stream in enumerate(streams):
+            words = set()
+            for field in StreamCatalog.fields:
+                words.update(tokenize(stream.get(field) or ''))
+            for word in words:
+                index.setdefault(word, []).append(position)
+        self.view = (streams, index, sorted(index.keys()))
+
+    def _loadSnapshot(self):
+        if self.snapshotPath is None or not os.path.exists(self.snapshotPath):
+            return
+        try:
+            with open(self.snapshotPath, mode='r') as f:
+                snapshot = json.load(f)
+            self.etag = snapshot.get('etag')
+            self.lastModified = snapshot.get('lastModified')
+            self._build(snapshot.get('streams', []))
+        except Exception as e:
+            logging.error('unable to load stream catalog snapshot', e, print=True)
+
+    def _saveSnapshot(self):
+        if self.snapshotPath is None:
+            return
+        try:
+            temp = safetify(self.snapshotPath) + '.tmp'
+            with open(temp, mode='w') as f:
+                json.dump({
+                    'etag': self.etag,
+                    'lastModified': self.lastModified,
+                    'streams': self.streams}, f)
+            os.replace(temp, self.snapshotPath)
+        except Exception as e:
+            logging.error('unable to save stream catalog snapshot', e, print=True)
+
+    def refresh(self, force: bool = False) -> bool:
+        ''' revalidates if the ttl has passed, true if the catalog changed '''
+        with self.lock:
+            if not force and len(self.streams) > 0 and time.time() - self.checked < self.ttl:
+                return False
+            headers = {'Content-Type': 'application/json'}
+            if len(self.streams) > 0:
+                if self.etag:
+                    headers['If-None-Match'] = self.etag
+                if self.lastModified:
+                    headers['If-Modified-Since'] = self.lastModified
+            response = self.client._makeUnauthenticatedCall(
+                function=requests.post,
+                endpoint='/streams/search',
+                headers=headers,
+                payload=json.dumps({'address': self.client.wallet.address}))
+            self.checked = time.time()
+            if response.status_code == 304:
+                self.revalidations += 1
+                return False
+            self.fetches += 1
+            self.etag = response.headers.get('ETag')
+            self.lastModified = response.headers.get('Last-Modified')
+            self._build(StreamCatalog.sort(response.json()))
+            self._saveSnapshot()
+            return True
+
+    def expire(self):
+        ''' revalidate on next use, whatever the ttl says '''
+        self.checked = 0.0
+
+    @staticmethod
+    def _positions(index: dict[str, list[int]], tokens: list[str], word: str) -> set[int]:
+        ''' positions of streams with a word starting with this one '''
+        positions = set()
+        for i in range(bisect.bisect_left(tokens, word), len(tokens)):
+            if not tokens[i].startswith(word):
+                break
+            positions.update(index[tokens[i]])
+        return positions
+
+    def search(self, searchText: str = None) -> list[dict]:
+        streams, index, tokens = self.view
+        words = tokenize(searchText or '')
+        if len(words) == 0:
+            return streams
+        positions = None
+        for word in sorted(words, key=len, reverse=True):
+            found = StreamCatalog._positions(index, tokens, word)
+            positions = found if positions is None else positions & found
+            if len(positions) == 0:
+                return []
+        return [streams[position] for position in sorted(positions)]
+
+    def stats(self) -> dict:
+        return {
+            'streams': len(self.streams),
+            'words': len(self.view[2]),
+            'fetches': self.fetches,
+            'revalidations': self.revalidations,
+            'etag': self.etag,
+            'lastModified': self.lastModified}
@@ -0,0 +1,103 @@
+''' pooled keep-alive sessions and call latency for the server clients '''
+
+from typing import Union
+import bisect
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def pooledSession(
+    poolSize: int = 10,
+    retries: int = 3,
+    backoff: float = 0.5,
+) -> requests.Session:
+    '''
+    a session whose adapters keep up to poolSize connections alive per host.
+    connection failures are retried for every method (nothing was sent), but
+    read failures and 502/503/504 only for idempotent methods, so a POST is
+    never submitted twice. statuses are left for the caller to raise on.
+    '''
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False)
+    adapter = HTTPAdapter(
+        pool_connections=poolSize,
+        pool_maxsize=poolSize,
+        max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class LatencyHistogram():
+    ''' counts of call durations per endpoint in fixed millisecond buckets '''
+
+    bounds = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints: dict[str, dict] = {}
+
+    def observe(self, endpoint: str, seconds: float, failed: bool = False):
+        ms = seconds * 1000
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = {
+                    'count': 0,
+                    'failed': 0,
+                    'totalMs': 0.0,
+                    'maxMs': 0.0,
+                    'buckets': [0] * (len(self.bounds) + 1)}
+                self.endpoints[endpoint] = stats
+            stats['count'] += 1
+            stats['failed'] += 1 if failed else 0
+            stats['totalMs'] += ms
+            stats['maxMs'] = max(stats['maxMs'], ms)
+            stats['buckets'][bisect.bisect_left(self.bounds, ms)] += 1
+
+    def percentile(self, endpoint: str, q: float) -> Union[float, None]:
+        ''' upper bound (ms) of the bucket holding the q-th quantile '''
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None or stats['count'] == 0:
+                return None
+            target = q * stats['count']
+            seen = 0
+            for i, count in enumerate(stats['buckets']):
+                seen += count
+                if seen >= target:
+                    return self.bounds[i] if i < len(self.bounds) else stats['maxMs']
+            return stats['maxMs']
+
+    def snapshot(self) -> dict[str, dict]:
+        ''' per endpoint: count, failed, meanMs, maxMs, p50, p95 and buckets '''
+        with self.lock:
+            endpoints = {
+                endpoint: {**stats, 'buckets': list(stats['buckets'])}
+                for endpoint, stats in self.endpoints.items()}
+        return {
+            endpoint: {
+                'count': stats['count'],
+                'failed': stats['failed'],
+                'meanMs': stats['totalMs'] / stats['count'],
+                'maxMs': stats['maxMs'],
+                'p50': self.percentile(endpoint, 0.5),
+                'p95': self.percentile(endpoint, 0.95),
+                'buckets': dict(zip(
+                    [f'<={bound}ms' for bound in self.bounds] + [f'>{self.bounds[-1]}ms'],
+                    stats['buckets']))}
+            for endpoint, stats in endpoints.items()}
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
@@ -0,0 +1,266 @@
+''' a coalescing, spooled publish queue in front of SatoriServerClient '''
+
+from typing import Union
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from satorilib import logging
+from satorilib.disk.utils import safetify
+
+
+class PublishQueue():
+    '''
+    publishes are put on a queue keyed by topic (and whether it's a prediction)
+    so only the latest value per topic is ever sent. a background thread
+    flushes the queue when it holds maxBatch topics or every flushInterval
+    seconds, sending the batch concurrently over the client's pooled session.
+
+    publishes that don't get through are retried with exponential backoff up
+    to `retries` times unless a newer value for the topic replaces them first.
+    publishes the server refuses (including 4xx responses) are dropped.
+
+    everything queued is also written to a spool file (json lines, compacted
+    after a flush that settled something) and read back on start, so a
+    restart loses nothing.
+    '''
+
+    def __init__(
+        self,
+        client: 'SatoriServerClient',
+        spoolPath: str = None,
+        maxBatch: int = 50,
+        flushInterval: float = 5.0,
+        workers: int = 8,
+        retries: int = 5,
+        backoff: float = 1.0,
+        start: bool = True,
+    ):
+        self.client = client
+        self.spoolPath = spoolPath
+        self.maxBatch = maxBatch
+        self.flushInterval = flushInterval
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        # guards pending, inflight and the spool file together
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.pending: dict[tuple[str, bool], dict] = {}
+        self.inflight: dict[str, dict] = {}
+        self.obsolete = 0  # spool lines a compaction would remove
+        self.metrics = {
+            'queued': 0,
+            'coalesced': 0,
+            'accepted': 0,
+            'rejected': 0,
+            'retried': 0,
+            'dropped': 0,
+            'flushes': 0}
+        self.thread = None
+        self._loadSpool()
+        if start:
+            self.start()
+
+    @staticmethod
+    def _key(item: dict) -> tuple[str, bool]:
+        return item['topic'], item['isPrediction']
+
+    ### spool ###
+
+    def _loadSpool(self):
+        if self.spoolPath is None or not os.path.exists(self.spoolPath):
+            return
+        items = {}
+        done = set()
+        lines = 0
+        try:
+            with open(self.spoolPath, mode='r') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError as _:
+                        continue  # a line torn by a crash mid write
+                    if 'put' in entry:
+                        items[PublishQueue._key(entry['put'])] = entry['put']
+                    elif 'done' in entry:
+                        done.add(entry['done'])
+        except Exception as e:
+            logging.error('unable to read publish spool', e, print=True)
+            return
+        with self.lock:
+            self.pending = {
+                key: {**item, 'notBefore': 0}
+                for key, item in items.items()
+                if item['id'] not in done}
+            self.obsolete = lines - len(self.pending)
+        self._compactSpool()
+
+    def _writeSpool(self, entries: list[dict]):
+        ''' appends to the spool, call while holding the lock '''
+        if self.spoolPath is None or len(entries) == 0:
+            return
+        try:
+            with open(safetify(self.spoolPath), mode='a') as f:
+                f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+        except Exception as e:
+            logging.error('unable to write publish spool', e, print=True)
+
+    def _compactSpool(self):
+        '''
+        rewrites the spool as just what's still pending or in flight, if
+        anything has been settled or replaced since the last rewrite
+        '''
+        if self.spoolPath is None:
+            return
+        with self.lock:
+            if self.obsolete == 0:
+                return
+            entries = [
+                {'put': item}
+                for item in [*self.pending.values(), *self.inflight.values()]]
+            try:
+                temp = safetify(self.spoolPath) + '.tmp'
+                with open(temp, mode='w') as f:
+                    f.write(''.join(json.dumps(entry) + '\n' for entry in entries))
+                os.replace(temp, self.spoolPath)
+                self.obsolete = 0
+            except Exception as e:
+                logging.error('unable to compact publish spool', e, print=True)
+
+    ### queue ###
+
+    def put(
+        self,
+        topic: str,
+        data: str,
+        observationTime: str,
+        observationHash: str,
+        isPrediction: bool = True,
+        useAuthorizedCall: bool = True,
+    ):
+        item = {
+            'id': uuid.uuid4().hex,
+            'topic': topic,
+            'data': str(data),
+            'observationTime': str(observationTime),
+            'observationHash': str(observationHash),
+            'isPrediction': isPrediction,
+            'useAuthorizedCall': useAuthorizedCall,
+            'attempts': 0,
+            'notBefore': 0}
+        with self.lock:
+            if PublishQueue._key(item) in self.pending:
+                self.metrics['coalesced'] += 1
+                self.obsolete += 1
+            self.pending[PublishQueue._key(item)] = item
+            self.metrics['queued'] += 1
+            full = len(self.pending) >= self.maxBatch
+            self._writeSpool([{'put': item}])
+        if full:
+            self.wake.set()
+
+    def _ready(self) -> list[dict]:
+        ''' takes up to maxBatch items that aren't backing off '''
+        now = time.time()
+        with self.lock:
+            ready = [
+                item for item in self.pending.values()
+                if item['notBefore'] <= now][:self.maxBatch]
+            for item in ready:
+                del self.pending[PublishQueue._key(item)]
+                self.inflight[item['id']] = item
+        return ready
+
+    def _send(self, item: dict) -> Union[bool, None]:
+        return self.client._publish(
+            topic=item['topic'],
+            data=item['data'],
+            observationTime=item['observationTime'],
+            observationHash=item['observationHash'],
+            isPrediction=item['isPrediction'],
+            useAuthorizedCall=item['useAuthorizedCall'])
+
+    def flush(self) -> int:
+        ''' sends whatever is ready now, returns how many were accepted '''
+        accepted = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while True:
+                batch = self._ready()
+                if len(batch) == 0:
+                    break
+                results = list(executor.map(self._send, batch))
+                accepted += self._settle(batch, results)
+                if len(batch) < self.maxBatch:
+                    break
+        with self.lock:
+            self.metrics['flushes'] += 1
+        self._compactSpool()
+        return accepted
+
+    def _settle(self, batch: list[dict], results: list[Union[bool, None]]) -> int:
+        done = []
+        accepted = 0
+        with self.lock:
+            for item, result in zip(batch, results):
+                self.inflight.pop(item['id'], None)
+                if result is True:
+                    self.metrics['accepted'] += 1
+                    accepted += 1
+                    done.append(item['id'])
+                elif result is False:
+                    self.metrics['rejected'] += 1
+                    done.append(item['id'])
+                elif PublishQueue._key(item) in self.pending:
+                    # a newer value arrived while this one was out
+                    self.metrics['dropped'] += 1
+                    done.append(item['id'])
+                elif item['attempts'] >= self.retries:
+                    self.metrics['dropped'] += 1
+                    done.append(item['id'])
+                else:
+                    self.metrics['retried'] += 1
+                    item['attempts'] += 1
+                    item['notBefore'] = (
+                        time.time() + self.backoff * 2 ** (item['attempts'] - 1))
+                    self.pending[PublishQueue._key(item)] = item
+            self._writeSpool([{'done': itemId} for itemId in done])
+            self.obsolete += len(done)
+        return accepted
+
+    ### background ###
+
+    def start(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            self.wake.wait(timeout=self.flushInterval)
+            self.wake.clear()
+            if self.stopping.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error('publish queue flush failed', e, print=True)
+
+    def stop(self, flush: bool = True):
+        ''' stops the thread, anything left stays in the spool for next time '''
+        self.stopping.set()
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+        if flush:
+            self.flush()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {**self.metrics, 'pending': len(self.pending)}
@@ -21,15 +21,21 @@ JSON -> EXTRACT DATA -> Python Object -> DTO -> JSON
 '''
 from typing import Union
 from functools import partial
+from collections import OrderedDict
 import base64
 import time
 import json
+import threading
 import requests
 from satorilib import logging
 from satorilib.utils.time import timeToTimestamp
 from satorilib.wallet import Wallet
 from satorilib.concepts.structs import Stream
 from satorilib.server.api import ProposalSchema, VoteSchema
+from satorilib.server.pooling import pooledSession, LatencyHistogram
+from satorilib.server.auth import AuthCache
+from satorilib.server.publisher import PublishQueue
+from satorilib.server.catalog import StreamCatalog
 from satorilib.utils.json import sanitizeJson
 from requests.exceptions import RequestException
 import json
@@ -38,18 +44,93 @@ import datetime as dt
 
 
 class SatoriServerClient(object):
+
+    _methods = {
+        requests.get: 'get',
+        requests.post: 'post',
+        requests.put: 'put',
+        requests.patch: 'patch',
+        requests.delete: 'delete',
+        requests.head: 'head'}
+
     def __init__(
         self,
         wallet: Wallet,
         url: str = None,
         sendingUrl: str = None,
-        *args, **kwargs
+        *args,
+        poolSize: int = 10,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: Union[float, tuple[float, float], None] = (10, 120),
+        authCache: AuthCache = None,
+        authTtl: float = 30,
+        catalogPath: str = None,
+        catalogTtl: float = 60,
+        **kwargs
     ):
         self.wallet = wallet
         self.url = url or 'https://central.satorinet.io'
         self.sendingUrl = sendingUrl or 'https://mundo.satorinet.io'
         self.topicTime: dict[str, float] = {}
         self.lastCheckin: int = 0
+        # one keep-alive session per base url instead of a handshake per call
+        self.poolSize = poolSize
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.sessions: dict[str, requests.Session] = {}
+        self.sessionsLock = threading.Lock()
+        self.latency = LatencyHistogram()
+        # signed headers are reused until the challenge is authTtl seconds old
+        self.authCache = authCache or AuthCache(ttl=authTtl)
+        # the stream catalog and other revalidated responses
+        self.catalog = StreamCatalog(
+            client=self,
+            snapshotPath=catalogPath,
+            ttl=catalogTtl)
+        self.conditional: OrderedDict = OrderedDict()
+        self.conditionalLimit = 64
+        self.conditionalLock = threading.Lock()
+
+    def session(self, url: str = None) -> requests.Session:
+        url = url or self.url
+        with self.sessionsLock:
+            if url not in self.sessions:
+                self.sessions[url] = pooledSession(
+                    poolSize=self.poolSize,
+                    retries=self.retries,
+                    backoff=self.backoff)
+            return self.sessions[url]
+
+    def close(self):
+        with self.sessionsLock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+    def _send(self, function: callable, url: str, endpoint: str, **kwargs) -> requests.Response:
+        '''
+        the call sites pass requests.get, requests.post, etc. we send those
+        through the pooled session for the url and time them by endpoint.
+        '''
+        method = SatoriServerClient._methods.get(function)
+        start = time.perf_counter()
+        failed = True
+        try:
+            if method is None:
+                r = function(url + endpoint, **kwargs)
+            else:
+                r = getattr(self.session(url), method)(
+                    url + endpoint, timeout=self.timeout, **kwargs)
+            failed = not r.ok
+            return r
+        finally:
+            self.latency.observe(endpoint, time.perf_counter() - start, failed=failed)
+
+    def latencies(self) -> dict[str, dict]:
+        ''' per endpoint latency histogram of calls made so far '''
+        return self.latency.snapshot()
 
     def setTopicTime(self, topic: str):
         self.topicTime[topic] = time.time()
@@ -58,6 +139,31 @@ class SatoriServerClient(object):
         # return requests.get(self.url + '/time').text
         return str(time.time())
 
+    def _authHeaders(
+        self,
+        challenge: str = None,
+        useWallet: Wallet = None,
+        extraHeaders: Union[dict, None] = None,
+    ) -> dict:
+        return {
+            **self.authCache.payload(
+                wallet=useWallet or self.wallet,
+                challenge=challenge),
+            **(extraHeaders or {}),
+        }
+
+    @staticmethod
+    def _unauthenticatedBody(
+        headers: Union[dict, None] = None,
+        payload: Union[str, bytes, None] = None,
+    ) -> tuple[dict, Union[str, None], Union[bytes, None]]:
+        ''' returns headers, json and data for an unauthenticated call '''
+        if isinstance(payload, bytes):
+            return headers or {'Content-Type': 'application/octet-stream'}, None, payload
+        if isinstance(payload, str):
+            return headers or {'Content-Type': 'application/json'}, payload, None
+        return headers or {}, None, None
+
     def _makeAuthenticatedCall(
         self,
         function: callable,
@@ -77,15 +183,18 @@ class SatoriServerClient(object):
                 f'outgoing: {endpoint}',
                 payload[0:40], f'{"..." if len(payload) > 40 else ""}',
                 print=True)
-        r = function(
-            (url or self.url) + endpoint,
-            headers={
-                **(useWallet or self.wallet).authPayload(
-                    asDict=True,
-                    challenge=challenge or self._getChallenge()),
-                **(extraHeaders or {}),
-            },
+        r = self._send(
+            function,
+            url or self.url,
+            endpoint,
+            headers=self._authHeaders(
+                challenge=challenge,
+                useWallet=useWallet,
+                extraHeaders=extraHeaders),
             json=payload)
+        if r.status_code == 401:
+            # a reused signature may have aged out on the server's side
+            self.authCache.forget(useWallet or self.wallet)
         if raiseForStatus:
             try:
                 r.raise_for_status()
@@ -111,18 +220,11 @@ class SatoriServerClient(object):
             'outgoing Satori server message to ',
             endpoint,
             print=True)
-        data = None
-        json = None
-        if isinstance(payload, bytes):
-            headers = headers or {'Content-Type': 'application/octet-stream'}
-            data = payload
-        elif isinstance(payload, str):
-            headers = headers or {'Content-Type': 'application/json'}
-            json = payload
-        else:
-            headers = headers or {}
-        r = function(
-            (url or self.url) + endpoint,
+        headers, json, data = self._unauthenticatedBody(headers, payload)
+        r = self._send(
+            function,
+            url or self.url,
+            endpoint,
             headers=headers,
             json=json,
             data=data)
@@ -181,11 +283,40 @@ class SatoriServerClient(object):
 
     def getStreams(self, stream: dict, payload: str = None):
         ''' subscribe to primary data stream and and publish prediction '''
-        return self._makeAuthenticatedCall(
-            function=requests.post,
+        return self._makeConditionalCall(
             endpoint='/get/streams',
             payload=payload or json.dumps(stream))
 
+    def _makeConditionalCall(self, endpoint: str, payload: str) -> requests.Response:
+        '''
+        an authenticated post that revalidates the last response we got for
+        this exact request (If-None-Match/If-Modified-Since) and hands that
+        response back again on a 304.
+        '''
+        key = (endpoint, payload)
+        with self.conditionalLock:
+            cached = self.conditional.get(key)
+        extraHeaders = {}
+        if cached is not None:
+            if cached.headers.get('ETag'):
+                extraHeaders['If-None-Match'] = cached.headers['ETag']
+            if cached.headers.get('Last-Modified'):
+                extraHeaders['If-Modified-Since'] = cached.headers['Last-Modified']
+        r = self._makeAuthenticatedCall(
+            function=requests.post,
+            endpoint=endpoint,
+            payload=payload,
+            extraHeaders=extraHeaders)
+        if r.status_code == 304 and cached is not None:
+            return cached
+        if r.headers.get('ETag') or r.headers.get('Last-Modified'):
+            with self.conditionalLock:
+                self.conditional[key] = r
+                self.conditional.move_to_end(key)
+                while len(self.conditional) > self.conditionalLimit:
+                    self.conditional.popitem(last=False)
+        return r
+
     def myStreams(self):
         ''' subscribe to primary data stream and and publish prediction '''
         return self._makeAuthenticatedCall(
@@ -332,35 +463,18 @@ class SatoriServerClient(object):
             'vote': 33.333333333333336},...]
         '''
 
-        def cleanAndSort(streams: str, searchText: str = None):
-            # Commenting down as of now, will be used in future if we need to make the call to server for search streams
-            # as of now we have limited streams so we can search in client side
-            # if searchText:
-            #     searchedStreams = [s for s in streams if searchText.lower() in s['stream'].lower()]
-            #     return sanitizeJson(searchedStreams)
-            sanitizedStreams = sanitizeJson(streams)
-            # sorting streams based on vote and total_vote
-            sortedStreams = sorted(
-                sanitizedStreams,
-                key=lambda x: (x.get('vote', 0) == 0, -
-                               x.get('vote', 0), -x.get('total_vote', 0))
-            )
-            return sortedStreams
-
-        return cleanAndSort(
-            streams=self._makeUnauthenticatedCall(
-                function=requests.post,
-                endpoint='/streams/search',
-                payload=json.dumps({'address': self.wallet.address})).json(),
-            searchText=searchText)
+        self.catalog.refresh()
+        return self.catalog.search(searchText)
 
     def incrementVote(self, streamId: str):
+        self.catalog.expire()  # our vote is part of the catalog
         return self._makeAuthenticatedCall(
             function=requests.post,
             endpoint='/vote_on/sanction/incremental',
             payload=json.dumps({'streamId': streamId})).text
 
     def removeVote(self, streamId: str):
+        self.catalog.expire()  # our vote is part of the catalog
         return self._makeAuthenticatedCall(
             function=requests.post,
             endpoint='/clear_vote_on/sanction/incremental',
@@ -788,6 +902,49 @@ class SatoriServerClient(object):
         if self.topicTime.get(topic, 0) > time.time() - (Stream.minimumCadence*.95):
             return
         self.setTopicTime(topic)
+        return self._publish(
+            topic=topic,
+            data=data,
+            observationTime=observationTime,
+            observationHash=observationHash,
+            isPrediction=isPrediction,
+            useAuthorizedCall=useAuthorizedCall)
+
+    def publishQueue(self, **kwargs) -> PublishQueue:
+        '''
+        the client's coalescing publish queue, made (and started) on first
+        use with kwargs passed to PublishQueue, e.g. spoolPath.
+        '''
+        if getattr(self, '_publishQueue', None) is None:
+            self._publishQueue = PublishQueue(client=self, **kwargs)
+        return self._publishQueue
+
+    @staticmethod
+    def _refused(response: Union[requests.Response, 'AsyncResponse', None]) -> Union[bool, None]:
+        '''
+        False if a failed publish was refused outright (a 4xx worth not
+        sending again), None if it may get through later (auth, timeouts,
+        rate limits and 5xx)
+        '''
+        if response is None:
+            return None
+        if 400 <= response.status_code < 500 and response.status_code not in (401, 408, 429):
+            return False
+        return None
+
+    def _publish(
+        self,
+        topic: str,
+        data: str,
+        observationTime: str,
+        observationHash: str,
+        isPrediction: bool = True,
+        useAuthorizedCall: bool = True,
+    ) -> Union[bool, None]:
+        '''
+        sends one publish without the cadence check, True if accepted, False
+        if the server refused it and None if it didn't get through
+        '''
         try:
             if useAuthorizedCall:
                 response = self._makeAuthenticatedCall(
@@ -815,9 +972,11 @@ class SatoriServerClient(object):
             if response.status_code == 200:
                 return True
             if response.status_code > 399:
-                return None
+                return SatoriServerClient._refused(response)
             if response.text.lower() in ['fail', 'null', 'none', 'error']:
                 return False
+        except requests.exceptions.HTTPError as e:
+            return SatoriServerClient._refused(e.response)
         except Exception as _:
             # logging.warning(
             #    'unable to determine if prediction was accepted; try again Later.', e, color='yellow')
@@ -1,5 +1,9 @@
 import sqlite3
+import queue
+from itertools import islice
+import numpy as np
 import pandas as pd
+from contextlib import contextmanager
 from .coerce import coerce
 import threading
 
@@ -17,6 +21,158 @@ class MockLock:
         pass
 
 
+class ConnectionPool:
+    """
+    a few long lived connections to one database. each connection is opened
+    once in WAL mode with tuned pragmas and keeps its own prepared statement
+    cache, so repeated queries skip both the connect and the compile.
+    """
+
+    pragmas = (
+        'pragma journal_mode=WAL;',
+        'pragma synchronous=NORMAL;',
+        'pragma cache_size=-64000;',  # 64 MB
+        'pragma temp_store=MEMORY;',
+        'pragma busy_timeout=5000;')
+
+    def __init__(self, database: str, size: int = 4, cached_statements: int = 256):
+        self.database = database
+        self.size = size
+        self.cached_statements = cached_statements
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        # every connection we opened and haven't closed, idle or borrowed
+        self.connections = set()
+        self.lock = threading.Lock()
+
+    def open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database,
+            check_same_thread=False,
+            cached_statements=self.cached_statements)
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        with self.lock:
+            self.connections.add(conn)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """ borrows a connection, opening one if we're under size """
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                grow = self.opened < self.size
+                if grow:
+                    self.opened += 1
+            if grow:
+                try:
+                    conn = self.open()
+                except Exception:
+                    with self.lock:
+                        self.opened -= 1
+                    raise
+            else:
+                conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            with self.lock:
+                keep = conn in self.connections
+            if keep:
+                self.idle.put(conn)
+            else:
+                # the pool was closed while this one was borrowed
+                conn.close()
+
+    def close(self):
+        """ closes the idle connections now and borrowed ones when returned """
+        with self.lock:
+            self.connections.clear()
+            self.opened = 0
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class Result:
+    """
+    what a cursor had to say, read before its connection goes back to the
+    pool (where another thread may borrow it). reads like a spent cursor.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.description = cursor.description
+        self.rows = cursor.fetchall() if cursor.description else []
+        self.rowcount = cursor.rowcount
+        self.lastrowid = cursor.lastrowid
+        self.position = 0
+        cursor.close()
+
+    def fetchone(self):
+        if self.position >= len(self.rows):
+            return None
+        self.position += 1
+        return self.rows[self.position - 1]
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def fetchall(self) -> list:
+        rows = self.rows[self.position:]
+        self.position = len(self.rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+
+pools: dict[str, ConnectionPool] = {}
+pools_lock = threading.Lock()
+default_lock = None
+
+
+def pool(database: str, size: int = 4) -> ConnectionPool:
+    """ the shared pool for a database, created on first use """
+    with pools_lock:
+        if database not in pools:
+            pools[database] = ConnectionPool(database, size=size)
+        return pools[database]
+
+
+def close(database: str = None):
+    """ closes the pooled connections of one database or all of them """
+    with pools_lock:
+        for name in ([database] if database else list(pools.keys())):
+            if name in pools:
+                pools.pop(name).close()
+
+
+def get_lock(lock=None):
+    """
+    the lock to use when none is given: a dask lock if a scheduler is around,
+    otherwise a mock. probed once per process rather than on every query.
+    """
+    global default_lock
+    if lock is not None:
+        return lock
+    if default_lock is None:
+        try:
+            from dask.distributed import Lock
+            probe = Lock('db-lock')
+            with probe:
+                pass
+            default_lock = probe
+        except Exception:
+            default_lock = MockLock('db-lock')
+    return default_lock
+
+
 def execute(
     query: str = None,
     params: list = None,
@@ -29,28 +185,140 @@ def execute(
 ):
     if not query and data is None:
         return
-    if lock is None:
-        from dask.distributed import Lock
-        lock = Lock('db-lock')
-        try:
-            with lock:
-                pass
-        except Exception:
-            lock = MockLock('db-lock')
-    with lock:
-        with sqlite3.connect(database) as conn:
-            if query:
-                if ';' in query and (params is None or params == []):
-                    return conn.executescript(query)
-                else:
-                    return conn.execute(query, params)
-            if data is not None and table:
-                if (not data.empty and data.columns.tolist() != [' ']) or data.empty:
-                    return data.to_sql(
+    with get_lock(lock):
+        with pool(database).connection() as conn:
+            with conn:
+                if query:
+                    if ';' in query and (params is None or params == []):
+                        return Result(conn.executescript(query))
+                    else:
+                        return Result(conn.execute(query, params or []))
+                if data is not None and table:
+                    if (not data.empty and data.columns.tolist() != [' ']) or data.empty:
+                        return data.to_sql(
+                            table, conn,
+                            if_exists=if_exists,
+                            index=True if index_col else False,
+                            index_label=index_col if index_col else None)
+
+
+def column_values(data: pd.DataFrame, index_col: str = None) -> tuple[list[str], list[list]]:
+    """
+    the columns of a dataframe as plain python lists, one numpy conversion per
+    column rather than a dict per row. NaN and NaT become NULL, datetimes are
+    handed to sqlite3 as datetimes, just like to_sql does.
+    """
+    columns = [str(column) for column in data.columns]
+    series = [data[column] for column in data.columns]
+    if index_col:
+        columns.insert(0, index_col)
+        series.insert(0, data.index.to_series())
+    arrays = []
+    for values in series:
+        missing = values.isna().to_numpy()
+        if values.dtype.kind == 'M':
+            array = values.dt.to_pydatetime()
+        elif values.dtype.kind in 'biuf' and not missing.any():
+            arrays.append(values.to_numpy().tolist())
+            continue
+        else:
+            array = values.to_numpy(dtype=object)
+        if missing.any():
+            array = np.where(missing, None, array)
+        arrays.append(array.tolist())
+    return columns, arrays
+
+
+def insert_query(table: str, columns: list[str], upsert_key: str = None) -> str:
+    """ insert, or insert ... on conflict do update when upserting on a key """
+    names = ', '.join(f'"{column}"' for column in columns)
+    marks = ', '.join('?' for _ in columns)
+    query = f'insert into "{table}" ({names}) values ({marks})'
+    if upsert_key:
+        updates = ', '.join(
+            f'"{column}"=excluded."{column}"'
+            for column in columns if column != upsert_key)
+        query += (
+            f' on conflict("{upsert_key}") do update set {updates}'
+            if updates else f' on conflict("{upsert_key}") do nothing')
+    return query
+
+
+def unique_index_query(table: str, key: str) -> str:
+    """ upserts need a unique index on the key to conflict on """
+    return f'create unique index if not exists "ux_{table}_{key}" on "{table}" ("{key}")'
+
+
+def execute_many(conn, query: str, arrays: list[list], batch_size: int = 10000) -> int:
+    """
+    executemany in batches of rows inside a single transaction, works on any
+    dbapi connection (sqlite3 or sqlalchemy's raw_connection)
+    """
+    rows = zip(*arrays)
+    count = 0
+    cursor = conn.cursor()
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if len(batch) == 0:
+                break
+            cursor.executemany(query, batch)
+            count += len(batch)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return count
+
+
+def table_exists(conn, table: str) -> bool:
+    return conn.execute(
+        "select 1 from sqlite_master where type='table' and name=?",
+        [table]).fetchone() is not None
+
+
+def bulk_write(
+    data: pd.DataFrame,
+    table: str,
+    database: str = None,
+    index_col: str = None,
+    batch_size: int = 10000,
+    upsert: bool = False,
+    lock=None,
+) -> int:
+    """
+    loads a dataframe through executemany instead of to_sql. the table is
+    created with to_sql's schema the first time, even from an empty frame.
+    with upsert, rows whose index_col already exists are updated instead of
+    duplicated.
+    """
+    if data is None or (not data.empty and data.columns.tolist() == [' ']):
+        return 0
+    with get_lock(lock):
+        with pool(database).connection() as conn:
+            if not table_exists(conn, table):
+                # even for an empty frame, as to_sql did, so it can be read
+                with conn:
+                    data.head(0).to_sql(
                         table, conn,
-                        if_exists=if_exists,
                         index=True if index_col else False,
                         index_label=index_col if index_col else None)
+            if data.empty:
+                return 0
+            columns, arrays = column_values(data, index_col=index_col)
+            if upsert and index_col:
+                with conn:
+                    conn.execute(unique_index_query(table, index_col))
+            return execute_many(
+                conn,
+                insert_query(
+                    table,
+                    columns,
+                    upsert_key=index_col if upsert else None),
+                arrays,
+                batch_size=batch_size)
 
 
 def write(
@@ -81,16 +349,8 @@ def read(
     lock=None,
 ):
     ''' returns dataframe '''
-    if lock is None:
-        from dask.distributed import Lock
-        lock = Lock('db-lock')
-        try:
-            with lock:
-                pass
-        except Exception:
-            lock = MockLock('db-lock')
-    with lock:
-        with sqlite3.connect(database) as conn:
+    with get_lock(lock):
+        with pool(database).connection() as conn:
             if index_col:
                 return pd.read_sql(query, conn, params=params, index_col=index_col)
             else:
@@ -133,7 +393,8 @@ def update(
     columns: list,
     values: list,
     table: str,
-    database: str = None
+    database: str = None,
+    lock=None,
 ):
     ''' returns query for updates '''
     query = update_query(
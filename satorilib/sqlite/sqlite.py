@@ -20,11 +20,13 @@ class Sqlite:
         sql.write(query="insert into table(col) values('foo')")
 
         # write dataframe
-        sql.load(data=df, table='table', if_exists='append')
+        sql.load(data=df, table='table')
 
         # delete
         df = sql.delete(where="col='foo'", table='table')
     ```
+    connections are pooled per database (see sql_io.ConnectionPool) and
+    stay open across `with` blocks, call close() to release them.
     '''
 
     def __init__(
@@ -33,15 +35,18 @@ class Sqlite:
         initialize: str = None,
         index_col: str = None,
         lock=None,
+        pool_size: int = 4,
     ):
         '''
         database - path to database file
         initialize - query to set up datbase tables first time
+        pool_size - long lived connections kept open to the database
         '''
         self.database = database
         self.initialize = initialize or f'create table data ([column] text)'
         self.index_col = index_col
         self.lock = lock
+        self.pool = sql_io.pool(database, size=pool_size)
 
     def __enter__(self):
         if not os.path.exists(os.path.abspath(self.database)):
@@ -58,6 +63,9 @@ class Sqlite:
     def get_initialize(self):
         return self.initialize
 
+    def close(self):
+        sql_io.close(self.database)
+
     def execute(
         self,
         query: str = None,
@@ -119,13 +127,25 @@ class Sqlite:
             database=self.database,
             index_col=self.index_col)
 
-    def load(self, data: pd.DataFrame, table: str):
-        return sql_io.write(
+    def load(
+        self,
+        data: pd.DataFrame,
+        table: str,
+        batch_size: int = 10000,
+        upsert: bool = False,
+    ):
+        '''
+        bulk loads a dataframe with executemany in a single transaction,
+        upsert updates rows whose index_col already exists
+        '''
+        return sql_io.bulk_write(
             lock=self.lock,
             data=data,
             table=table,
             database=self.database,
-            index_col=self.index_col)
+            index_col=self.index_col,
+            batch_size=batch_size,
+            upsert=upsert)
 
     def update(self, where: str, table: str, columns: list, values: list):
         return sql_io.update(
@@ -1,6 +1,6 @@
 # mainly used for generating unique ids for data and model paths since they must be short
 
-from typing import Union
+from typing import Union, Iterable
 import base64
 import hashlib
 import pandas as pd
@@ -45,48 +45,90 @@ def hashIt(string: str) -> str:
         digest_size=8).hexdigest()  # 27mb / million rows
 
 
+def hashChain(
+    indexes: Iterable[str],
+    values: Iterable[str],
+    priorRowHash: str = None,
+) -> list[str]:
+    '''
+    the batch engine behind every function below: hashes each (index, value)
+    pair onto the prior hash, exactly like hashIt(prior + index + value). the
+    loop is kept tight (locals only, no per row objects) since the chain is
+    sequential and can't be vectorized, blake2s itself runs in C.
+    '''
+    blake2s = hashlib.blake2s
+    rowHash = priorRowHash or ''
+    rowHashes = []
+    append = rowHashes.append
+    for index, value in zip(indexes, values):
+        rowHash = blake2s(
+            (rowHash + index + value).encode(),
+            digest_size=8).hexdigest()
+        append(rowHash)
+    return rowHashes
+
+
+def _chainColumns(df: pd.DataFrame) -> tuple[list[str], list[str], list]:
+    '''
+    extracts the index and value strings (and raw hashes) once per dataframe.
+    values are pulled from df.values, the same array iterrows slices each row
+    from, so str(value) matches what the row by row implementation produced.
+    '''
+    if df.empty:
+        return [], [], []
+    array = df.values
+    indexes = list(map(str, df.index))
+    values = list(map(str, array[:, df.columns.get_loc('value')]))
+    hashes = (
+        array[:, df.columns.get_loc('hash')].tolist()
+        if 'hash' in df.columns else [None] * len(indexes))
+    return indexes, values, hashes
+
+
+def _verifyChain(df: pd.DataFrame, priorRowHash: str = None) -> Union[int, None]:
+    '''
+    walks the chain comparing as it goes, so a break early in a long history
+    doesn't pay for hashing the rest of it.
+    '''
+    blake2s = hashlib.blake2s
+    rowHash = priorRowHash or ''
+    indexes, values, hashes = _chainColumns(df)
+    for position, (index, value, stored) in enumerate(zip(indexes, values, hashes)):
+        rowHash = blake2s(
+            (rowHash + index + value).encode(),
+            digest_size=8).hexdigest()
+        if rowHash != stored:
+            return position
+    return None
+
+
 def historyHashes(df: pd.DataFrame, priorRowHash: str = None) -> pd.DataFrame:
     ''' creates hashes of every row in the dataframe based on prior hash '''
-    priorRowHash = priorRowHash or ''
-    rowHashes = []
-    for index, row in df.iterrows():
-        rowStr = priorRowHash + str(index) + str(row['value'])
-        rowHash = hashIt(rowStr)
-        rowHashes.append(rowHash)
-        priorRowHash = rowHash
-    df['hash'] = rowHashes
+    indexes, values, _ = _chainColumns(df)
+    df['hash'] = hashChain(indexes, values, priorRowHash)
     return df
 
 
 def verifyRoot(df: pd.DataFrame) -> bool:
     ''' returns true if root hash is empty string plus the first row '''
-    for index, row in df.iterrows():
-        rowStr = '' + str(index) + str(row['value'])
-        rowHash = hashIt(rowStr)
-        if rowHash == row['hash']:
-            return True
+    if df.empty:
         return False
-    return False
+    return _verifyChain(df.iloc[[0]]) is None
 
 
 def verifyHashes(df: pd.DataFrame, priorRowHash: str = None) -> tuple[bool, Union[pd.DataFrame, None]]:
     '''
-    returns success flag and the first row as DataFrame that doesn't pass the
-    hash check or None
+    returns success flag and the last good row (the one before the first row
+    that doesn't pass the hash check) as DataFrame or None
     priorRowHash isn't usually passed in because we do the verification on the
     entire dataframe, so by default the first priorRowHash is assumed to be an
     empty string because it's the first peice of data that was recorded. if new
     data was found before it, all the hashes change.
     '''
-    priorRowHash = priorRowHash or ''
-    priorRow = None
-    for index, row in df.iterrows():
-        rowHash = hashIt(priorRowHash + str(index) + str(row['value']))
-        if rowHash != row['hash']:
-            return False, priorRow.to_frame().T if isinstance(priorRow, pd.Series) else None
-        priorRowHash = rowHash
-        priorRow = row
-    return True, None
+    position = _verifyChain(df, priorRowHash)
+    if position is None:
+        return True, None
+    return False, df.iloc[[position - 1]] if position > 0 else None
 
 
 def verifyHashesReturnError(df: pd.DataFrame, priorRowHash: str = None) -> tuple[bool, Union[pd.DataFrame, None]]:
@@ -98,29 +140,22 @@ def verifyHashesReturnError(df: pd.DataFrame, priorRowHash: str = None) -> tuple
     empty string because it's the first peice of data that was recorded. if new
     data was found before it, all the hashes change.
     '''
-    priorRowHash = priorRowHash or ''
-    for index, row in df.iterrows():
-        rowHash = hashIt(priorRowHash + str(index) + str(row['value']))
-        if rowHash != row['hash']:
-            return False, row.to_frame().T
-        priorRowHash = rowHash
-    return True, None
+    position = _verifyChain(df, priorRowHash)
+    if position is None:
+        return True, None
+    return False, df.iloc[[position]]
 
 # verifyHashes(pd.DataFrame({'value':[1,2,3,4,5,6], 'hash':['ce8efc6eeb9fc30b','e2cc1a4e70bdba14','42359a663f6c3e30','6278827c73894e0c','c7a6682880ee6f8d','d607268c4f2e75ed']}, index=[0,1,2,3,4,9,5]))
 
 
-def verifyHashesReturnLastGood(df: pd.DataFrame, priorRowHash: str = None) -> tuple[bool, Union[pd.DataFrame, None]]:
+def verifyHashesReturnLastGood(df: pd.DataFrame, priorRowHash: str = None) -> tuple[bool, Union[pd.DataFrame, pd.Series, None]]:
     ''' returns success flag and the last known good row as DataFrame '''
     if df.empty:
         return True, None
-    priorRowHash = priorRowHash or ''
-    for index, row in df.iterrows():
-        rowHash = hashIt(priorRowHash + str(index) + str(row['value']))
-        if rowHash != row['hash']:
-            return False, priorRow.to_frame().T
-        priorRowHash = rowHash
-        priorRow = row
-    return True, row
+    position = _verifyChain(df, priorRowHash)
+    if position is None:
+        return True, df.iloc[-1]
+    return False, df.iloc[[position - 1]] if position > 0 else None
 
 
 def cleanHashes(df: pd.DataFrame) -> tuple[bool, Union[pd.DataFrame, None]]:
@@ -132,25 +167,23 @@ def cleanHashes(df: pd.DataFrame) -> tuple[bool, Union[pd.DataFrame, None]]:
     unable to make a new dataframe or the one it makes matches the input, it
     returns None.
     '''
+    blake2s = hashlib.blake2s
     priorRowHash = ''
-    i = 0
-    success = False
-    rows = []
-    for index, row in df.iterrows():
-        rowStr = priorRowHash + str(index) + str(row['value'])
-        rowHash = hashIt(rowStr)
-        if i == 0 and row['hash'] == rowHash:
-            success = True
-        i += 1
-        if rowHash != row['hash']:
+    kept = []
+    indexes, values, hashes = _chainColumns(df)
+    for position, (index, value, stored) in enumerate(zip(indexes, values, hashes)):
+        rowHash = blake2s(
+            (priorRowHash + index + value).encode(),
+            digest_size=8).hexdigest()
+        if rowHash != stored:
             # skip this row
             continue
-        rows.append(row)
+        kept.append(position)
         priorRowHash = rowHash
-    dfReturn = pd.DataFrame(rows, columns=df.columns)
-    if dfReturn.equals(df):
+    success = len(kept) > 0 and kept[0] == 0
+    if len(kept) == len(indexes):
         return success, None
-    return success, dfReturn
+    return success, df.iloc[kept]
 
 # cleanHashes(pd.DataFrame({'value':[1,2,3,4,5,6], 'hash':['ce8efc6eeb9fc30b','e2cc1a4e70bdba14','42359a663f6c3e30','6278827c73894e0c','c7a6682880ee6f8d','d607268c4f2e75ed']}, index=[0,1,2,3,4,9,5]))
 # cleanHashes(pd.DataFrame({'value':[1,2,3,4,5,9,6], 'hash':['ce8efc6eeb9fc30b','e2cc1a4e70bdba14','42359a663f6c3e30','6278827c73894e0c','c7a6682880ee6f8d','erroneous row','d607268c4f2e75ed']}, index=[0,1,2,3,4,9,5]))
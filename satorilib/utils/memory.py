@@ -1,4 +1,6 @@
+from typing import Union
 from functools import reduce
+import numpy as np
 import pandas as pd
 import warnings
 from satorilib import logging
@@ -85,6 +87,12 @@ class Memory(ModelMemoryApi, DiskMemory):
             return None
         if len(dfs) == 1:
             return dfs[0]
+        dfs = Memory._targetFirst(dfs, targetColumn)
+        return Memory.mergeAsof(dfs[0], dfs[1:])
+
+    @staticmethod
+    def _targetFirst(dfs: list[pd.DataFrame], targetColumn: 'str|tuple[str]') -> list[pd.DataFrame]:
+        ''' moves the target's frame to the front, with datetime indexes '''
         for ix, item in enumerate(dfs):
             if targetColumn in item.columns:
                 dfs.insert(0, dfs.pop(ix))
@@ -94,11 +102,45 @@ class Memory(ModelMemoryApi, DiskMemory):
             # other merge function, also if targetColumn is None
             # why would we make a dataset without target though?
         for df in dfs:
-            df.index = pd.to_datetime(df.index)
-        return reduce(
-            lambda left, right:
-                pd.merge_asof(left, right, left_index=True, right_index=True),
-            dfs)
+            if not isinstance(df.index, pd.DatetimeIndex):
+                df.index = pd.to_datetime(df.index)
+        return dfs
+
+    @staticmethod
+    def aligned(
+        dfs: list[pd.DataFrame],
+        targetColumn: 'str|tuple[str]',
+        capacity: int = None,
+    ) -> Union['AlignedMemory', None]:
+        ''' Layer 1
+        what merge returns, held as an AlignedMemory so each new observation
+        updates it in place rather than merging everything again.
+        '''
+        if len(dfs) == 0:
+            return None
+        dfs = Memory._targetFirst(dfs, targetColumn)
+        return AlignedMemory.asof(dfs[0], dfs[1:], capacity=capacity)
+
+    @staticmethod
+    def mergeAsof(left: pd.DataFrame, rights: list[pd.DataFrame]) -> pd.DataFrame:
+        '''
+        one k-way backward asof merge of every right onto the left index, the
+        same result as chaining pd.merge_asof pairwise (every step keeps the
+        left index) without building N-1 intermediate frames: each right is
+        located with a single searchsorted and taken in one go.
+        '''
+        aligned = [left]
+        times = left.index.values
+        for right in rights:
+            positions = right.index.values.searchsorted(times, side='right') - 1
+            taken = right.take(positions.clip(0))
+            taken.index = left.index
+            if (positions < 0).any():
+                taken = taken.where(
+                    pd.Series(positions >= 0, index=left.index),
+                    axis=0)
+            aligned.append(taken)
+        return pd.concat(aligned, axis=1)
 
     @staticmethod
     def appendInsert(df: pd.DataFrame, incremental: pd.DataFrame):
@@ -115,7 +157,7 @@ class Memory(ModelMemoryApi, DiskMemory):
             df.loc[incremental.index, [
                 x for x in incremental.columns]] = incremental
         else:
-            df = df.append(incremental).sort_index()
+            df = pd.concat([df, incremental]).sort_index()
         return df.fillna(method='ffill')
 
     @staticmethod
@@ -149,3 +191,190 @@ class Memory(ModelMemoryApi, DiskMemory):
         # Drop the grouping column
         df = df.drop(columns=[column])
         return df
+
+
+class AlignedMemory():
+    '''
+    the merged multi-stream frame kept as one preallocated numpy matrix so new
+    observations don't re-merge or re-fill the whole thing. built from a frame
+    every cell holds the latest observation of its column at or before its
+    row's time (what appendInsert's forward fill produces) and any
+    observation can add a row. built with AlignedMemory.asof (as Memory.aligned
+    does) it's Memory.mergeAsof kept up to date instead: rows are the target
+    stream's observations and every other column holds its stream's latest
+    observation at or before the row, so those streams only change values.
+    either way an observation only touches its own row, plus the rows after
+    it in that column up to the column's next observation, so the usual case,
+    an observation newer than everything we have, is amortized O(1).
+    cells present in the initial frame count as observations.
+    frame() and array() are views, they're valid until the next update.
+    '''
+
+    def __init__(self, df: pd.DataFrame, capacity: int = None, fill: bool = True):
+        df = df.sort_index()
+        self.columns = df.columns
+        self.size = df.shape[0]
+        values = df.values
+        dtype = (
+            np.result_type(values.dtype, np.float64)
+            if values.dtype.kind in 'biuf' else np.dtype(object))
+        capacity = max(capacity or 0, self.size * 2, 16)
+        self.times = np.empty(capacity, dtype='datetime64[ns]')
+        self.times[:self.size] = pd.to_datetime(df.index).values
+        self.values = np.full((capacity, len(self.columns)), np.nan, dtype=dtype)
+        self.values[:self.size] = values
+        self.observed = np.zeros((capacity, len(self.columns)), dtype=bool)
+        self.observed[:self.size] = ~pd.isna(values)
+        if fill:
+            self.values[:self.size] = pd.DataFrame(
+                self.values[:self.size]).fillna(method='ffill').values
+        # asof only: every observation of the non-target columns, by column,
+        # as [times, values, count] sorted by time
+        self.history: Union[dict, None] = None
+
+    @staticmethod
+    def asof(
+        left: pd.DataFrame,
+        rights: list[pd.DataFrame],
+        capacity: int = None,
+    ) -> 'AlignedMemory':
+        ''' Memory.mergeAsof(left, rights), to be kept up to date with update() '''
+        aligned = AlignedMemory(
+            Memory.mergeAsof(left, rights),
+            capacity=capacity,
+            fill=False)
+        aligned.history = {}
+        for right in rights:
+            times = pd.to_datetime(right.index).values.astype('datetime64[ns]')
+            for column in right.columns:
+                aligned.history[column] = [
+                    times.copy(),
+                    right[column].to_numpy(dtype=aligned.values.dtype),
+                    len(times)]
+        return aligned
+
+    def _grow(self):
+        capacity = len(self.times) * 2
+        for name in ['times', 'values', 'observed']:
+            current = getattr(self, name)
+            grown = np.empty((capacity,) + current.shape[1:], dtype=current.dtype)
+            grown[:self.size] = current[:self.size]
+            setattr(self, name, grown)
+
+    def _row(self, time: np.datetime64) -> int:
+        ''' position of the row at time, inserting a forward filled one if needed '''
+        position = int(self.times[:self.size].searchsorted(time, side='left'))
+        if position < self.size and self.times[position] == time:
+            return position
+        if self.size == len(self.times):
+            self._grow()
+        if position < self.size:
+            self.times[position + 1:self.size + 1] = self.times[position:self.size]
+            self.values[position + 1:self.size + 1] = self.values[position:self.size]
+            self.observed[position + 1:self.size + 1] = self.observed[position:self.size]
+        self.times[position] = time
+        self.values[position] = self.values[position - 1] if position > 0 else np.nan
+        self.observed[position] = False
+        self.size += 1
+        if self.history is not None:
+            self._alignRow(position)
+        return position
+
+    def _alignRow(self, position: int):
+        ''' asof: a new target row takes each stream's latest observation '''
+        time = self.times[position]
+        self.values[position] = np.nan
+        for column, (times, values, count) in self.history.items():
+            k = int(times[:count].searchsorted(time, side='right')) - 1
+            if k >= 0:
+                self.values[position, self.columns.get_loc(column)] = values[k]
+
+    def _column(self, column) -> int:
+        if column not in self.columns:
+            self.columns = self.columns.append(pd.Index([column]))
+            self.values = np.concatenate(
+                [self.values, np.full((len(self.values), 1), np.nan, dtype=self.values.dtype)],
+                axis=1)
+            self.observed = np.concatenate(
+                [self.observed, np.zeros((len(self.observed), 1), dtype=bool)],
+                axis=1)
+        return self.columns.get_loc(column)
+
+    def _observeAsof(self, time: np.datetime64, column, value) -> tuple[int, int]:
+        '''
+        asof: a non-target observation changes the rows from its time up to
+        the next observation of its column, it never adds a row.
+        '''
+        j = self._column(column)
+        if column not in self.history:
+            self.history[column] = [
+                np.empty(16, dtype='datetime64[ns]'),
+                np.empty(16, dtype=self.values.dtype),
+                0]
+        entry = self.history[column]
+        times, values, count = entry
+        k = int(times[:count].searchsorted(time, side='left'))
+        if k == count or times[k] != time:
+            if count == len(times):
+                entry[0] = times = np.concatenate([times, np.empty_like(times)])
+                entry[1] = values = np.concatenate([values, np.empty_like(values)])
+            times[k + 1:count + 1] = times[k:count]
+            values[k + 1:count + 1] = values[k:count]
+            times[k] = time
+            count = entry[2] = count + 1
+        values[k] = value
+        start = int(self.times[:self.size].searchsorted(time, side='left'))
+        end = (
+            int(self.times[:self.size].searchsorted(times[k + 1], side='left'))
+            if k + 1 < count else self.size)
+        self.values[start:end, j] = value
+        return start, end
+
+    def observe(self, time, column, value) -> tuple[int, int]:
+        ''' records one observation, returns the range of rows it changed '''
+        time = pd.Timestamp(time).to_datetime64().astype('datetime64[ns]')
+        if self.history is not None and (
+            column in self.history or column not in self.columns
+        ):
+            return self._observeAsof(time, column, value)
+        position = self._row(time)
+        j = self._column(column)
+        self.values[position, j] = value
+        self.observed[position, j] = True
+        if self.history is not None:
+            # target columns are taken as observed, never filled
+            return position, position + 1
+        after = self.observed[position + 1:self.size, j]
+        end = (
+            position + 1 + int(after.argmax())
+            if after.any() else self.size)
+        self.values[position + 1:end, j] = value
+        return position, end
+
+    def update(self, incremental: pd.DataFrame) -> Union[tuple[int, int], None]:
+        '''
+        applies a (usually one row) multicolumn frame of observations, the
+        incremental appendInsert takes. returns the changed row range.
+        '''
+        changed = None
+        for time, row in zip(pd.to_datetime(incremental.index), incremental.values):
+            for column, value in zip(incremental.columns, row):
+                if pd.isna(value):
+                    continue
+                start, end = self.observe(time, column, value)
+                changed = (
+                    (start, end) if changed is None
+                    else (min(changed[0], start), max(changed[1], end)))
+        return changed
+
+    def array(self) -> np.ndarray:
+        ''' the aligned matrix, a view '''
+        return self.values[:self.size]
+
+    def frame(self) -> pd.DataFrame:
+        ''' the aligned frame over the matrix, no copy for numeric columns '''
+        return pd.DataFrame(
+            self.values[:self.size],
+            index=pd.DatetimeIndex(self.times[:self.size]),
+            columns=self.columns,
+            copy=False)
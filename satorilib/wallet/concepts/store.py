@@ -0,0 +1,185 @@
+from typing import Union, Callable
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from satorilib import logging
+from satorilib.sqlite import sql_io
+
+
+class TransactionStore():
+    '''
+    verbose transactions by txid, shared by every wallet and vault in the
+    process (and on disk, by every process using the same database).
+
+    a transaction in a block never changes so once we have it we never ask
+    electrumx for it again. one still in the mempool will change (it gets a
+    blockhash and confirmations) so it's only trusted for `ttl` seconds.
+
+    reads go through an in-memory LRU of `capacity` transactions, then sqlite
+    (a WITHOUT ROWID table keyed by txid through sql_io's WAL pool), then the
+    fetch function given to fetch(), whose results are written back. with no
+    database it's just the LRU.
+    '''
+
+    schema = (
+        'create table if not exists transactions ('
+        ' txid text primary key,'
+        ' raw text not null,'
+        ' confirmed integer not null,'
+        ' fetched real not null'
+        ') without rowid;')
+
+    def __init__(
+        self,
+        database: Union[str, None] = None,
+        capacity: int = 4096,
+        ttl: float = 60,
+        poolSize: int = 4,
+    ):
+        self.database = database
+        self.capacity = capacity
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # txid -> (raw, confirmed, fetched)
+        self.memory: OrderedDict[str, tuple[dict, bool, float]] = OrderedDict()
+        self.metrics = {'memory': 0, 'disk': 0, 'fetched': 0, 'expired': 0}
+        self.pool = None
+        if database is not None:
+            try:
+                self.pool = sql_io.pool(database, size=poolSize)
+                with self.pool.connection() as conn:
+                    conn.executescript(self.schema)
+            except Exception as e:
+                logging.error('transaction store unavailable, memory only', e, print=True)
+                self.pool = None
+
+    @staticmethod
+    def confirmed(raw: dict) -> bool:
+        return (raw.get('confirmations') or 0) > 0 and bool(raw.get('blockhash'))
+
+    def _fresh(self, confirmed: bool, fetched: float) -> bool:
+        return confirmed or time.time() - fetched < self.ttl
+
+    def _remember(self, txid: str, entry: tuple[dict, bool, float]):
+        ''' called holding the lock '''
+        self.memory[txid] = entry
+        self.memory.move_to_end(txid)
+        while len(self.memory) > self.capacity:
+            self.memory.popitem(last=False)
+
+    ### reads ###
+
+    def getMany(self, txids: list[str]) -> dict[str, dict]:
+        ''' what we have (and can trust) of these, by txid '''
+        found = {}
+        missing = []
+        with self.lock:
+            for txid in dict.fromkeys(txids):
+                entry = self.memory.get(txid)
+                if entry is not None and self._fresh(entry[1], entry[2]):
+                    self.memory.move_to_end(txid)
+                    found[txid] = entry[0]
+                    self.metrics['memory'] += 1
+                else:
+                    missing.append(txid)
+        if len(missing) == 0 or self.pool is None:
+            return found
+        rows = []
+        try:
+            with self.pool.connection() as conn:
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    rows.extend(conn.execute(
+                        'select txid, raw, confirmed, fetched from transactions'
+                        f' where txid in ({",".join("?" * len(chunk))})',
+                        chunk).fetchall())
+        except Exception as e:
+            logging.error('unable to read transaction store', e, print=True)
+        with self.lock:
+            for txid, raw, confirmed, fetched in rows:
+                if not self._fresh(bool(confirmed), fetched):
+                    self.metrics['expired'] += 1
+                    continue
+                raw = json.loads(raw)
+                self._remember(txid, (raw, bool(confirmed), fetched))
+                found[txid] = raw
+                self.metrics['disk'] += 1
+        return found
+
+    def get(self, txid: str) -> Union[dict, None]:
+        return self.getMany([txid]).get(txid)
+
+    def __contains__(self, txid: str) -> bool:
+        return self.get(txid) is not None
+
+    ### writes ###
+
+    def putMany(self, raws: list[dict]):
+        now = time.time()
+        entries = [
+            (raw['txid'], raw, TransactionStore.confirmed(raw), now)
+            for raw in raws
+            if isinstance(raw, dict) and isinstance(raw.get('txid'), str)]
+        if len(entries) == 0:
+            return
+        with self.lock:
+            for txid, raw, confirmed, fetched in entries:
+                self._remember(txid, (raw, confirmed, fetched))
+        if self.pool is None:
+            return
+        try:
+            with self.pool.connection() as conn:
+                sql_io.execute_many(
+                    conn,
+                    'insert or replace into transactions'
+                    ' (txid, raw, confirmed, fetched) values (?, ?, ?, ?)',
+                    [
+                        [txid for txid, _, _, _ in entries],
+                        [json.dumps(raw) for _, raw, _, _ in entries],
+                        [int(confirmed) for _, _, confirmed, _ in entries],
+                        [fetched for _, _, _, fetched in entries]])
+        except Exception as e:
+            logging.error('unable to write transaction store', e, print=True)
+
+    def put(self, raw: dict):
+        self.putMany([raw])
+
+    def fetch(
+        self,
+        txids: list[str],
+        fetch: Callable[[list[str]], list[Union[dict, None]]],
+    ) -> list[Union[dict, None]]:
+        '''
+        the transactions for txids in order, only asking fetch (a batch
+        getter like ElectrumxApi.getTransactions) for the ones we don't have.
+        '''
+        found = self.getMany(txids)
+        missing = [txid for txid in dict.fromkeys(txids) if txid not in found]
+        if len(missing) > 0:
+            fetched = [
+                raw for raw in fetch(missing)
+                if isinstance(raw, dict) and raw.get('txid') in missing]
+            self.putMany(fetched)
+            with self.lock:
+                self.metrics['fetched'] += len(fetched)
+            found.update({raw['txid']: raw for raw in fetched})
+        return [found.get(txid) for txid in txids]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {**self.metrics, 'cached': len(self.memory)}
+
+
+_stores: dict[str, TransactionStore] = {}
+_storesLock = threading.Lock()
+
+
+def sharedStore(database: Union[str, None] = None, **kwargs) -> TransactionStore:
+    ''' one store per database (and one memory only store) per process '''
+    key = os.path.abspath(database) if database is not None else ''
+    with _storesLock:
+        if key not in _stores:
+            _stores[key] = TransactionStore(database, **kwargs)
+        return _stores[key]
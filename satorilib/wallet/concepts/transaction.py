@@ -19,16 +19,35 @@ class TransactionStruct():
         self.sent = self.getSent(raw)
         self.memo = self.getMemo(raw)
 
-    def getSupportingTransactions(self, electrumx: 'Electrumx'):
-        txs = []
-        for vin in self.raw.get('vin', []):
-            txs.append(
-                electrumx.getTransaction(vin.get('txid', '')))
+    @staticmethod
+    def vinTxids(raw: dict) -> list[str]:
+        ''' the transactions this one spends from '''
+        return [
+            vin.get('txid', '')
+            for vin in raw.get('vin', [])
+            if vin.get('txid', '') != '']
+
+    def scriptPubKey(self, n: int) -> Union[str, None]:
+        ''' the locking script hex of output n, indexed on first use '''
+        # not set in __init__ because older caches pickled these
+        if getattr(self, '_scriptPubKeys', None) is None:
+            self._scriptPubKeys = {
+                vout.get('n'): vout.get('scriptPubKey', {}).get('hex')
+                for vout in self.raw.get('vout', [])}
+        return self._scriptPubKeys.get(n)
+
+    def getSupportingTransactions(self, electrumx: 'Electrumx', store: 'TransactionStore' = None):
+        ''' reads through the store if given, in one batch either way '''
+        txids = TransactionStruct.vinTxids(self.raw)
+        if store is None:
+            txs = electrumx.api.getTransactions(txids)
+        else:
+            txs = store.fetch(txids, electrumx.api.getTransactions)
         self.vinVoutsTxs: list[dict] = [t for t in txs if t is not None]
 
-    def getAndSetReceived(self, electrumx: 'Electrumx' = None):
-        if len(self.vinVoutsTxs) > 0 and electrumx:
-            self.getSupportingTransactions(electrumx)
+    def getAndSetReceived(self, electrumx: 'Electrumx' = None, store: 'TransactionStore' = None):
+        if len(self.vinVoutsTxs) == 0 and electrumx:
+            self.getSupportingTransactions(electrumx, store=store)
         self.received = self.getReceived(self.raw, self.vinVoutsTxs)
 
     def export(self) -> tuple[dict, list[str]]:
@@ -174,9 +174,9 @@ class EvrmoreWallet(Wallet):
             txin = CMutableTxIn(COutPoint(lx(
                 utxo.get('tx_hash')),
                 utxo.get('tx_pos')))
-            if 'scriptPubKey' in utxo:
-                txinScriptPubKey = CScript(
-                    bytes.fromhex(utxo.get('scriptPubKey')))
+            scriptPubKey = self.scriptPubKeyOf(utxo)
+            if scriptPubKey is not None:
+                txinScriptPubKey = CScript(bytes.fromhex(scriptPubKey))
             else:
                 txinScriptPubKey = CScript([
                     OP_DUP,
@@ -191,9 +191,9 @@ class EvrmoreWallet(Wallet):
             txin = CMutableTxIn(COutPoint(lx(
                 utxo.get('tx_hash')),
                 utxo.get('tx_pos')))
-            if 'scriptPubKey' in utxo:
-                txinScriptPubKey = CScript(
-                    bytes.fromhex(utxo.get('scriptPubKey')))
+            scriptPubKey = self.scriptPubKeyOf(utxo)
+            if scriptPubKey is not None:
+                txinScriptPubKey = CScript(bytes.fromhex(scriptPubKey))
             else:
                 txinScriptPubKey = CScript([
                     OP_DUP,
@@ -121,12 +121,16 @@ class RavencoinWallet(Wallet):
             txin = CMutableTxIn(COutPoint(lx(
                 utxo.get('tx_hash')),
                 utxo.get('tx_pos')))
-            txinScriptPubKey = CScript([
-                OP_DUP,
-                OP_HASH160,
-                Hash160(self.publicKeyBytes),
-                OP_EQUALVERIFY,
-                OP_CHECKSIG])
+            scriptPubKey = self.scriptPubKeyOf(utxo)
+            if scriptPubKey is not None:
+                txinScriptPubKey = CScript(bytes.fromhex(scriptPubKey))
+            else:
+                txinScriptPubKey = CScript([
+                    OP_DUP,
+                    OP_HASH160,
+                    Hash160(self.publicKeyBytes),
+                    OP_EQUALVERIFY,
+                    OP_CHECKSIG])
             txins.append(txin)
             txinScripts.append(txinScriptPubKey)
         # satori vins
@@ -134,19 +138,23 @@ class RavencoinWallet(Wallet):
             txin = CMutableTxIn(COutPoint(lx(
                 utxo.get('tx_hash')),
                 utxo.get('tx_pos')))
-            txinScriptPubKey = CScript([
-                OP_DUP,
-                OP_HASH160,
-                Hash160(self.publicKeyBytes),
-                OP_EQUALVERIFY,
-                OP_CHECKSIG,
-                OP_RVN_ASSET,
-                bytes.fromhex(
-                    AssetTransaction.satoriHex(self.symbol) +
-                    TxUtils.padHexStringTo8Bytes(
-                        TxUtils.intToLittleEndianHex(int(utxo.get('value'))))),
-                OP_DROP,
-            ])
+            scriptPubKey = self.scriptPubKeyOf(utxo)
+            if scriptPubKey is not None:
+                txinScriptPubKey = CScript(bytes.fromhex(scriptPubKey))
+            else:
+                txinScriptPubKey = CScript([
+                    OP_DUP,
+                    OP_HASH160,
+                    Hash160(self.publicKeyBytes),
+                    OP_EQUALVERIFY,
+                    OP_CHECKSIG,
+                    OP_RVN_ASSET,
+                    bytes.fromhex(
+                        AssetTransaction.satoriHex(self.symbol) +
+                        TxUtils.padHexStringTo8Bytes(
+                            TxUtils.intToLittleEndianHex(int(utxo.get('value'))))),
+                    OP_DROP,
+                ])
             txins.append(txin)
             txinScripts.append(txinScriptPubKey)
         return txins, txinScripts
@@ -17,6 +17,7 @@ from satorilib.wallet.utils.transaction import TxUtils
 from satorilib.wallet.utils.validate import Validate
 from satorilib.wallet.concepts.balance import Balance
 from satorilib.wallet.concepts.transaction import TransactionResult, TransactionFailure, TransactionStruct
+from satorilib.wallet.concepts.store import TransactionStore, sharedStore
 
 
 class WalletBase():
@@ -198,10 +199,22 @@ class Wallet(WalletBase):
         self._transactions: dict[str, tuple[dict, list[dict]]] = {}
         self.cache = {}
         self.transactions: list[TransactionStruct] = []
+        # the same transactions by txid
+        self.transactionsById: dict[str, TransactionStruct] = {}
+        # raw transactions by txid, shared with the other wallets in the folder
+        self.transactionStore: TransactionStore = sharedStore(
+            None if skipSave else os.path.join(
+                os.path.dirname(self.cachePath) or '.', 'transactions.db'))
         self.assetTransactions = []
         self.electrumx: Electrumx = None # type: ignore
         self.unspentCurrency = None
         self.unspentAssets = None
+        # every output we can spend by (tx_hash, tx_pos), the entries are the
+        # same dicts held in unspentCurrency and unspentAssets
+        self.utxos: dict[tuple[str, int], dict] = {}
+        # positive utxos by asset (None for currency), smallest first
+        self.spendable: Union[dict[Union[str, None], list[dict]], None] = None
+        self.statusLock = threading.Lock()
         self.status = None
         self.pullFullTransactions = pullFullTransactions
         self.load()
@@ -363,9 +376,19 @@ class Wallet(WalletBase):
                 if self.cache is None:
                     return False
                 self.status = self.cache['status']
-                self.unspentCurrency = self.cache['unspentCurrency']
-                self.unspentAssets = self.cache['unspentAssets']
-                self.transactions = self.cache['transactions']
+                self.indexUnspents(
+                    self.cache['unspentCurrency'],
+                    self.cache['unspentAssets'])
+                if 'transactions' in self.cache:
+                    # older caches pickled the transactions themselves
+                    self.setTransactions(self.cache['transactions'])
+                    self.transactionStore.putMany([
+                        raw
+                        for tx in self.transactions
+                        for raw in [tx.raw, *tx.vinVoutsTxs]])
+                else:
+                    self.setTransactions(self.transactionsFromStore(
+                        self.cache.get('transactionIds', [])))
                 return self.status
             return False
         except Exception as e:
@@ -383,12 +406,93 @@ class Wallet(WalletBase):
                     'status': self.status,
                     'unspentCurrency': self.unspentCurrency,
                     'unspentAssets': self.unspentAssets,
-                    'transactions': self.transactions},
+                    'transactionIds': [tx.txid for tx in self.transactions]},
                     self.cachePath)
                 return True
         except Exception as e:
             logging.error("wallet transactions saveCache error", e)
 
+    def transactionsFromStore(self, txids: list[str]) -> list[TransactionStruct]:
+        ''' rebuilds what the store still has, the rest gets refetched '''
+        raws = self.transactionStore.getMany(txids)
+        parents = self.transactionStore.getMany([
+            parent
+            for raw in raws.values()
+            for parent in TransactionStruct.vinTxids(raw)])
+        transactions = []
+        for txid in txids:
+            raw = raws.get(txid)
+            if raw is None:
+                continue
+            vinVoutsTxids = TransactionStruct.vinTxids(raw)
+            transactions.append(TransactionStruct(
+                raw=raw,
+                vinVoutsTxids=vinVoutsTxids,
+                vinVoutsTxs=[
+                    parents[parent] for parent in vinVoutsTxids
+                    if parent in parents]))
+        return transactions
+
+    def setTransactions(self, transactions: list[TransactionStruct]):
+        self.transactions = transactions
+        self.transactionsById = {tx.txid: tx for tx in transactions}
+
+    def addTransaction(self, transaction: TransactionStruct) -> TransactionStruct:
+        if transaction.txid not in self.transactionsById:
+            self.transactions.append(transaction)
+        self.transactionsById[transaction.txid] = transaction
+        return transaction
+
+    def indexUnspents(self, unspentCurrency: list[dict], unspentAssets: list[dict]):
+        '''
+        swaps in the latest unspents. outputs we already had keep what we
+        learned about them (their scriptPubKey) so only new ones need
+        resolving, spent ones fall out of the index.
+        '''
+        utxos = {}
+        for unspent in (unspentCurrency or []) + (unspentAssets or []):
+            outpoint = (unspent.get('tx_hash'), unspent.get('tx_pos'))
+            known = self.utxos.get(outpoint)
+            if (
+                known is not None and
+                known.get('scriptPubKey') is not None and
+                unspent.get('scriptPubKey') is None
+            ):
+                unspent['scriptPubKey'] = known['scriptPubKey']
+            utxos[outpoint] = unspent
+        self.utxos = utxos
+        self.spendable = None
+        self.unspentCurrency = unspentCurrency
+        self.unspentAssets = unspentAssets
+
+    def spendableUnspents(self, asset: Union[str, None] = None) -> list[dict]:
+        ''' a copy of the positive utxos of an asset (None for currency), smallest first '''
+        if self.spendable is None:
+            spendable = {}
+            for unspent in self.utxos.values():
+                if unspent.get('value', 0) > 0:
+                    spendable.setdefault(
+                        unspent.get('name', unspent.get('asset')), []
+                    ).append(unspent)
+            for unspents in spendable.values():
+                unspents.sort(key=lambda x: x['value'])
+            self.spendable = spendable
+        return list(self.spendable.get(asset, []))
+
+    def scriptPubKeyOf(self, utxo: dict) -> Union[str, None]:
+        ''' the locking script of an unspent from the index, if we know it '''
+        outpoint = (utxo.get('tx_hash'), utxo.get('tx_pos'))
+        indexed = self.utxos.get(outpoint, utxo)
+        scriptPubKey = indexed.get('scriptPubKey') or utxo.get('scriptPubKey')
+        if scriptPubKey is None:
+            transaction = self.transactionsById.get(outpoint[0])
+            if transaction is not None:
+                scriptPubKey = transaction.scriptPubKey(outpoint[1])
+        if scriptPubKey is not None:
+            indexed['scriptPubKey'] = scriptPubKey
+            utxo['scriptPubKey'] = scriptPubKey
+        return scriptPubKey
+
     ### Electrumx ##############################################################
 
     def connected(self) -> bool:
@@ -402,7 +506,12 @@ class Wallet(WalletBase):
             return notification.get('params',['scripthash', 'status'])[-1]
 
         def handleNotifiation(notification: dict):
-            return updateStatus(parseNotification(notification))
+            # called on the electrumx parser thread, which must stay free to
+            # deliver the replies updateStatus waits on
+            threading.Thread(
+                target=updateStatus,
+                args=(parseNotification(notification),),
+                daemon=True).start()
 
         def handleResponse(status: str):
             return updateStatus(status)
@@ -413,11 +522,13 @@ class Wallet(WalletBase):
                 self.status = status
                 self.saveCache()
 
-            if self.status == status:
-                return False
-            self.getBalances()
-            self.getUnspents()
-            self.status = status
+            with self.statusLock:
+                if self.status == status:
+                    return False
+                self.getBalances()
+                # only outputs new to the index need their transactions
+                self.getUnspents()
+                self.status = status
             self.getUnspentTransactions(threaded=True, then=thenSave)
             return True
 
@@ -479,21 +590,22 @@ class Wallet(WalletBase):
             self.saveCache()
 
     def getUnspents(self):
-        self.unspentCurrency = self.electrumx.api.getUnspentCurrency(scripthash=self.scripthash)
-        self.unspentCurrency = [
-            x for x in self.unspentCurrency
+        unspentCurrency = self.electrumx.api.getUnspentCurrency(scripthash=self.scripthash)
+        unspentCurrency = [
+            x for x in unspentCurrency
             if x.get('asset') == None]
-        self.unspentAssets = []
+        unspentAssets = []
         if 'SATORI' in self.watchAssets:
             # never used:
             #self.balanceOnChain = self.electrumx.api.getBalance(scripthash=self.scripthash)
             #logging.debug('self.balanceOnChain', self.balanceOnChain)
             # mempool sends all unspent transactions in currency and assets so we have to filter them here:
-            self.unspentAssets = self.electrumx.api.getUnspentAssets(scripthash=self.scripthash)
-            self.unspentAssets = [
-                x for x in self.unspentAssets
+            unspentAssets = self.electrumx.api.getUnspentAssets(scripthash=self.scripthash)
+            unspentAssets = [
+                x for x in unspentAssets
                 if x.get('asset') != None]
-            logging.debug('self.unspentAssets', self.unspentAssets)
+            logging.debug('self.unspentAssets', unspentAssets)
+        self.indexUnspents(unspentCurrency, unspentAssets)
 
     def deriveBalanceFromUnspents(self):
         ''' though I like the one source of truth we don't do this anymore '''
@@ -515,22 +627,22 @@ class Wallet(WalletBase):
                 self.balance or 0,
                 self.divisibility)
 
+    def getTransactions(self, txids: list[str]) -> list[Union[dict, None]]:
+        ''' through the transaction store, electrumx only for what it lacks '''
+        return self.transactionStore.fetch(txids, self.electrumx.api.getTransactions)
+
     def getUnspentTransactions(self, threaded: bool = True, then: callable = None):
 
         def run():
-            transactionIds = {tx.txid for tx in self.transactions}
-            txids = [uc['tx_hash'] for uc in self.unspentCurrency] + [ua['tx_hash'] for ua in self.unspentAssets]
-            for txid in txids:
-                if txid not in transactionIds:
-                    raw = self.electrumx.api.getTransaction(txid)
-                    logging.debug('pulling transaction:', txid, color='blue')
-                    if raw is not None:
-                        self.transactions.append(TransactionStruct(
-                            raw=raw,
-                            vinVoutsTxids=[
-                                vin.get('txid', '')
-                                for vin in raw.get('vin', {})
-                                if vin.get('txid', '') != '']))
+            missing = list(dict.fromkeys(
+                txid for txid, _ in self.utxos.keys()
+                if txid not in self.transactionsById))
+            logging.debug('pulling transactions:', len(missing), color='blue')
+            for raw in self.getTransactions(missing):
+                if raw is not None:
+                    self.addTransaction(TransactionStruct(
+                        raw=raw,
+                        vinVoutsTxids=TransactionStruct.vinTxids(raw)))
             if callable(then):
                 then()
 
@@ -550,49 +662,25 @@ class Wallet(WalletBase):
 
     def appendTransaction(self, txid):
         self.electrumx.ensureConnected()
-        if txid not in self._transactions.keys():
-            raw = self.electrumx.api.getTransaction(txid)
-            if raw is not None:
-                if self.pullFullTransactions:
-                    txs = []
-                    txIds = []
-                    for vin in raw.get('vin', {}):
-                        txId = vin.get('txid', '')
-                        if txId == '':
-                            continue
-                        txIds.append(txId)
-                        txs.append(self.electrumx.api.getTransaction(txId))
-                    transaction = TransactionStruct(
-                        raw=raw,
-                        vinVoutsTxids=txIds,
-                        vinVoutsTxs=[t for t in txs if t is not None])
-                    self.transactions.append(transaction)
-                    self._transactions[txid] = transaction.export()
-                    return transaction.export()
-                else:
-                    txs = []
-                    txIds = []
-                    for vin in raw.get('vin', {}):
-                        txId = vin.get('txid', '')
-                        if txId == '':
-                            continue
-                        txIds.append(txId)
-                        # <--- don't get the inputs to the transaction here
-                    transaction = TransactionStruct(
-                        raw=raw,
-                        vinVoutsTxids=txIds)
-                    self.transactions.append(transaction)
-        else:
-            raw, txids, txs = self._transactions.get(txid, ({}, []))
-            self.transactions.append(
-                TransactionStruct(
-                    raw=raw,
-                    vinVoutsTxids=txids,
-                    vinVoutsTxs=txs))
+        raw = self.getTransactions([txid])[0]
+        if raw is None:
+            return None
+        txIds = TransactionStruct.vinTxids(raw)
+        if self.pullFullTransactions:
+            transaction = TransactionStruct(
+                raw=raw,
+                vinVoutsTxids=txIds,
+                vinVoutsTxs=[t for t in self.getTransactions(txIds) if t is not None])
+            self.addTransaction(transaction)
+            self._transactions[txid] = transaction.export()
+            return transaction.export()
+        # <--- don't get the inputs to the transaction here
+        self.addTransaction(
+            TransactionStruct(raw=raw, vinVoutsTxids=txIds))
 
     def callTransactionHistory(self):
         def getTransactions(transactionHistory: dict) -> list:
-            self.transactions = []
+            self.setTransactions([])
             if not isinstance(transactionHistory, list):
                 return
             new_transactions = {}  # Collect new transactions here
@@ -668,60 +756,30 @@ class Wallet(WalletBase):
         if 'SATORI' in self.watchAssets:
             unspents = [
                 u for u in self.unspentCurrency + self.unspentAssets
-                if 'scriptPubKey' not in u]
+                if u.get('scriptPubKey') is None]
         else:
             unspents = [
                 u for u in self.unspentCurrency
-                if 'scriptPubKey' not in u]
+                if u.get('scriptPubKey') is None]
         if not force and len(unspents) == 0:
             # already have them all
             return True
 
         try:
-            # subscription is not necessary for this
-            # make sure we're connected
-            # if not hasattr(self, 'electrumx') or not self.electrumx.connected():
-            #    self.connect()
-            # self.get()
-
-            # get transactions, save their scriptPubKey hex to the unspents
-            for uc in self.unspentCurrency:
-                if uc.get('scriptPubKey', None) is not None:
-                    continue
-                if len([tx for tx in self.transactions if tx.txid == uc['tx_hash']]) == 0:
-                    new_transactions = {}  # Collect new transactions here
-                    new_tranaction = self.appendTransaction(uc['tx_hash'])
-                    if new_tranaction is not None:
-                        new_transactions[uc['tx_hash']] = new_tranaction
-                    #self.saveCache(new_transactions)
-                tx = [tx for tx in self.transactions if tx.txid == uc['tx_hash']]
-                if len(tx) > 0:
-                    vout = [vout for vout in tx[0].raw.get(
-                        'vout', []) if vout.get('n') == uc['tx_pos']]
-                    if len(vout) > 0:
-                        scriptPubKey = vout[0].get(
-                            'scriptPubKey', {}).get('hex', None)
-                        if scriptPubKey is not None:
-                            uc['scriptPubKey'] = scriptPubKey
-            if 'SATORI' in self.watchAssets:
-                for ua in self.unspentAssets:
-                    if ua.get('scriptPubKey', None) is not None:
-                        continue
-                    if len([tx for tx in self.transactions if tx.txid == ua['tx_hash']]) == 0:
-                        new_transactions = {}  # Collect new transactions here
-                        new_tranaction = self.appendTransaction(ua['tx_hash'])
-                        if new_tranaction is not None:
-                            new_transactions[ua['tx_hash']] = new_tranaction
-                        #self.saveCache(new_transactions)
-                    tx = [tx for tx in self.transactions if tx.txid == ua['tx_hash']]
-                    if len(tx) > 0:
-                        vout = [vout for vout in tx[0].raw.get(
-                            'vout', []) if vout.get('n') == ua['tx_pos']]
-                        if len(vout) > 0:
-                            scriptPubKey = vout[0].get(
-                                'scriptPubKey', {}).get('hex', None)
-                            if scriptPubKey is not None:
-                                ua['scriptPubKey'] = scriptPubKey
+            # fetch the transactions we lack all at once, then each unspent is
+            # a lookup by txid and output index
+            missing = list(dict.fromkeys(
+                u['tx_hash'] for u in unspents
+                if u['tx_hash'] not in self.transactionsById))
+            if len(missing) > 0:
+                self.electrumx.ensureConnected()
+                for raw in self.getTransactions(missing):
+                    if raw is not None:
+                        self.addTransaction(TransactionStruct(
+                            raw=raw,
+                            vinVoutsTxids=TransactionStruct.vinTxids(raw)))
+            for u in unspents:
+                self.scriptPubKeyOf(u)
         except Exception as e:
             logging.warning(
                 'unable to acquire signatures of unspent transactions, maybe unable to send', e, print=True)
@@ -782,9 +840,7 @@ class Wallet(WalletBase):
         outputCount: int = 0,
         randomly: bool = False,
     ) -> tuple[list, int]:
-        unspentCurrency = [
-            x for x in self.unspentCurrency if x.get('value') > 0]
-        unspentCurrency = sorted(unspentCurrency, key=lambda x: x['value'])
+        unspentCurrency = self.spendableUnspents()
         haveCurrency = sum([x.get('value') for x in unspentCurrency])
         if (haveCurrency < sats + self.reserve):
             raise TransactionFailure(
@@ -842,9 +898,7 @@ class Wallet(WalletBase):
         sats: int,
         randomly: bool = False
     ) -> tuple[list, int]:
-        unspentSatori = [x for x in self.unspentAssets if x.get(
-            'name', x.get('asset')) == 'SATORI' and x.get('value') > 0]
-        unspentSatori = sorted(unspentSatori, key=lambda x: x['value'])
+        unspentSatori = self.spendableUnspents('SATORI')
         haveSatori = sum([x.get('value') for x in unspentSatori])
         if not (haveSatori >= sats > 0):
             logging.debug('not enough', haveSatori, sats, color='magenta')
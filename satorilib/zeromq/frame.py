@@ -0,0 +1,256 @@
+'''
+the wire format for what we send over zeromq: a string is one uint8 array of
+its utf-8 bytes, a DataFrame is a columnar frame of tenbin arrays:
+
+    [header, column 0 parts..., column 1 parts..., index parts...]
+
+the header is a uint8 array (a magic prefix followed by json) describing the
+dtype of every column and index level and how many arrays it took. numeric
+columns go out as their own buffers at their own width - nothing is cast -
+and come back as np.frombuffer views of the received message. strings are
+offset encoded: all the utf-8 bytes in one array, an int64 array of n + 1
+offsets into it and, if any are missing, a uint8 mask. booleans, datetimes,
+categoricals and the nullable extension types are sent as views of those.
+
+send the list with a multipart tenbin connection so each buffer is handed to
+zeromq as is rather than copied into one big message.
+'''
+
+from typing import Union, Iterator
+import json
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+MAGIC = b'\x00satori-frame\x00'
+
+# numpy dtypes tenbin can carry without a view
+_native = (
+    'float16', 'float32', 'float64',
+    'int8', 'int16', 'int32', 'int64',
+    'uint8', 'uint16', 'uint32', 'uint64')
+
+
+def _contiguous(arr: np.ndarray) -> np.ndarray:
+    ''' tenbin sends arr.data, so it has to be one contiguous buffer '''
+    return np.ascontiguousarray(arr)
+
+
+def _values(values: Union[pd.Series, pd.Index]):
+    ''' the extension array if there is one, otherwise the numpy array '''
+    if pd.api.types.is_extension_array_dtype(values.dtype):
+        return values.array
+    return values.to_numpy()
+
+
+### strings ###
+
+
+def encodeString(text: str) -> NDArray[np.uint8]:
+    return np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+
+
+def decodeString(arr: NDArray[np.uint8]) -> str:
+    return arr.tobytes().decode('utf-8')
+
+
+def _encodeStrings(values: np.ndarray) -> tuple[dict, list[np.ndarray]]:
+    missing = pd.isna(values)
+    anyMissing = bool(missing.any())
+    if anyMissing:
+        values = values.copy()
+        values[missing] = ''
+    strings = [value if type(value) is str else str(value) for value in values.tolist()]
+    text = ''.join(strings)
+    raw = text.encode('utf-8')
+    if len(raw) == len(text):
+        # all ascii, character lengths are byte lengths
+        lengths = map(len, strings)
+    else:
+        lengths = (len(string.encode('utf-8')) for string in strings)
+    offsets = np.zeros(len(strings) + 1, dtype=np.int64)
+    np.cumsum(
+        np.fromiter(lengths, dtype=np.int64, count=len(strings)),
+        out=offsets[1:])
+    parts = [offsets, np.frombuffer(raw, dtype=np.uint8)]
+    if anyMissing:
+        parts.append(missing.view(np.uint8))
+    return {'kind': 'strings', 'missing': anyMissing}, parts
+
+
+def _decodeStrings(spec: dict, parts: Iterator[np.ndarray]) -> np.ndarray:
+    bounds = next(parts).tolist()
+    raw = next(parts).tobytes()
+    if raw.isascii():
+        # byte offsets are character offsets, decode once and slice
+        text = raw.decode('ascii')
+        strings = [text[a:b] for a, b in zip(bounds, bounds[1:])]
+    else:
+        strings = [raw[a:b].decode('utf-8') for a, b in zip(bounds, bounds[1:])]
+    values = np.empty(len(strings), dtype=object)
+    values[:] = strings
+    if spec['missing']:
+        values[next(parts).view(bool)] = None
+    return values
+
+
+### values ###
+
+
+def _encodeValues(values) -> tuple[dict, list[np.ndarray]]:
+    ''' a column's or index level's values as a spec and the arrays to send '''
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        spec, parts = _encodeValues(_values(values.categories))
+        return (
+            {
+                'kind': 'category',
+                'ordered': bool(dtype.ordered),
+                'categories': spec},
+            [_contiguous(np.asarray(values.codes)), *parts])
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        return (
+            {'kind': 'datetimetz', 'tz': str(dtype.tz)},
+            [_contiguous(values.asi8)])
+    if dtype == object or isinstance(dtype, pd.StringDtype):
+        spec, parts = _encodeStrings(np.asarray(values, dtype=object))
+        return {**spec, 'dtype': str(dtype)}, parts
+    if pd.api.types.is_extension_array_dtype(dtype) and hasattr(dtype, 'numpy_dtype'):
+        # Int64, Float64, boolean: the values with a mask of what's missing
+        spec, parts = _encodeValues(values.to_numpy(
+            dtype=dtype.numpy_dtype,
+            na_value=dtype.numpy_dtype.type(0)))
+        return (
+            {'kind': 'masked', 'dtype': dtype.name, 'values': spec},
+            [*parts, _contiguous(np.asarray(values.isna())).view(np.uint8)])
+    values = np.asarray(values)
+    if values.dtype.name in _native:
+        return {'kind': 'native', 'dtype': values.dtype.name}, [_contiguous(values)]
+    if values.dtype.kind == 'b':
+        return {'kind': 'view', 'dtype': 'bool'}, [_contiguous(values).view(np.uint8)]
+    if values.dtype.kind in 'Mm':
+        return {'kind': 'view', 'dtype': str(values.dtype)}, [_contiguous(values).view(np.int64)]
+    raise ValueError(f'unsupported dtype: {dtype}')
+
+
+def _decodeValues(spec: dict, parts: Iterator[np.ndarray]):
+    kind = spec['kind']
+    if kind == 'native':
+        return next(parts)
+    if kind == 'view':
+        return next(parts).view(np.dtype(spec['dtype']))
+    if kind == 'strings':
+        values = _decodeStrings(spec, parts)
+        if spec['dtype'] == 'object':
+            return values
+        return pd.array(values, dtype=spec['dtype'])
+    if kind == 'category':
+        codes = next(parts)
+        return pd.Categorical.from_codes(
+            codes,
+            categories=_decodeValues(spec['categories'], parts),
+            ordered=spec['ordered'])
+    if kind == 'datetimetz':
+        return (
+            pd.DatetimeIndex(next(parts).view('datetime64[ns]'))
+            .tz_localize('UTC')
+            .tz_convert(spec['tz'])
+            .array)
+    if kind == 'masked':
+        values = _decodeValues(spec['values'], parts)
+        mask = next(parts).view(bool)
+        return pd.api.types.pandas_dtype(spec['dtype']).construct_array_type()(values, mask)
+    raise ValueError(f'unknown column kind: {kind}')
+
+
+### frames ###
+
+
+def _label(label):
+    ''' json turns tuples into lists, turn them back '''
+    return tuple(label) if isinstance(label, list) else label
+
+
+def encodeFrame(df: pd.DataFrame) -> list[np.ndarray]:
+    '''
+    a DataFrame as a list of contiguous arrays, the first being the header.
+    labels must survive json (tuples come back as tuples, anything exotic as
+    str), object columns are sent as strings.
+    '''
+    parts = []
+    columns = []
+    for i in range(df.shape[1]):
+        spec, columnParts = _encodeValues(_values(df.iloc[:, i]))
+        columns.append({**spec, 'parts': len(columnParts)})
+        parts.extend(columnParts)
+    if isinstance(df.index, pd.RangeIndex):
+        index = {
+            'range': [df.index.start, df.index.stop, df.index.step],
+            'names': [df.index.name]}
+    else:
+        levels = []
+        for i in range(df.index.nlevels):
+            spec, levelParts = _encodeValues(_values(df.index.get_level_values(i)))
+            levels.append(spec)
+            parts.extend(levelParts)
+        index = {'levels': levels, 'names': list(df.index.names)}
+    header = {
+        'rows': len(df),
+        'labels': df.columns.tolist(),
+        'labelNames': list(df.columns.names),
+        'columns': columns,
+        'index': index}
+    return [
+        np.frombuffer(MAGIC + json.dumps(header, default=str).encode('utf-8'), dtype=np.uint8),
+        *parts]
+
+
+def isFrame(arrays: list[np.ndarray]) -> bool:
+    return (
+        len(arrays) > 0 and
+        arrays[0].dtype == np.uint8 and
+        arrays[0][:len(MAGIC)].tobytes() == MAGIC)
+
+
+def decodeFrame(arrays: list[np.ndarray]) -> pd.DataFrame:
+    header = json.loads(arrays[0][len(MAGIC):].tobytes().decode('utf-8'))
+    parts = iter(arrays[1:])
+    data = {
+        i: _decodeValues(spec, parts)
+        for i, spec in enumerate(header['columns'])}
+    index = header['index']
+    names = [_label(name) for name in index['names']]
+    if 'range' in index:
+        index = pd.RangeIndex(*index['range'], name=names[0])
+    elif len(index['levels']) == 1:
+        index = pd.Index(_decodeValues(index['levels'][0], parts), name=names[0])
+    else:
+        index = pd.MultiIndex.from_arrays(
+            [_decodeValues(spec, parts) for spec in index['levels']],
+            names=names)
+    df = pd.DataFrame(data, index=index)
+    labels = [_label(label) for label in header['labels']]
+    if len(header['labelNames']) > 1:
+        df.columns = pd.MultiIndex.from_tuples(labels, names=header['labelNames'])
+    elif len(labels) > 0:
+        df.columns = pd.Index(labels, name=header['labelNames'][0])
+    else:
+        df.columns = pd.Index([], dtype=object, name=header['labelNames'][0])
+    return df
+
+
+### messages ###
+
+
+def encode(data: Union[str, pd.DataFrame]) -> list[np.ndarray]:
+    if isinstance(data, str):
+        return [encodeString(data)]
+    if isinstance(data, pd.DataFrame):
+        return encodeFrame(data)
+    raise ValueError(f'can only send a str or a DataFrame, not {type(data)}')
+
+
+def decode(arrays: list[np.ndarray]) -> Union[str, pd.DataFrame]:
+    if isFrame(arrays):
+        return decodeFrame(arrays)
+    return decodeString(arrays[0])
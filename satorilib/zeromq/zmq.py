@@ -111,6 +111,7 @@ import pandas as pd
 from typing import Union
 import tensorcom
 import queue
+from satorilib.zeromq import frame
 
 
 class ZeroMQServer:
@@ -134,7 +135,7 @@ class ZeroMQServer:
 
     def connectServer(self):
         if self.server is None:
-            self.server = tensorcom.Connection(multipart=False)
+            self.server = tensorcom.Connection(multipart=True)
         self.server.connect(self.url)
 
     def listen(self) -> Union[str, pd.DataFrame]:
@@ -172,7 +173,7 @@ class ZeroMQServer:
         self.queueThread.start()
 
     @staticmethod
-    def detectMessageType(arrays: NDArray[np.uint8]) -> Union[str, pd.DataFrame]:
+    def detectMessageType(arrays: list[NDArray]) -> Union[str, pd.DataFrame]:
         """
         Detect whether the received arrays represent a DataFrame or a string message
 
@@ -180,17 +181,11 @@ class ZeroMQServer:
         arrays (list): List of numpy arrays received from the connection
 
         Returns:
-        str: 'dataframe' or 'string' indicating the message type
+        an empty DataFrame or an empty str indicating the message type
         """
-        try:
-            # Check if it's a string message (single array)
-            if len(arrays) == 1:
-                return ""
-            arrays[0].tobytes().decode("utf-8").split("|")
+        if frame.isFrame(arrays):
             return pd.DataFrame()
-        except Exception:
-            # If decoding fails or any other error occurs, assume it's a string
-            return ""
+        return ""
 
     @staticmethod
     def numpyToString(arr: NDArray[np.uint8]) -> Union[str, None]:
@@ -204,39 +199,26 @@ class ZeroMQServer:
         str: Decoded string message
         """
         try:
-            return bytes(arr.tolist()).decode("utf-8")
+            return frame.decodeString(arr)
         except Exception as e:
             print(f"Error converting numpy array to string: {e}")
             return None
 
     @staticmethod
-    def numpyArraysToDataframe(arrays: NDArray[np.uint8]) -> Union[pd.DataFrame, None]:
+    def numpyArraysToDataframe(arrays: list[NDArray]) -> Union[pd.DataFrame, None]:
         """
         Convert received numpy arrays back to DataFrame
 
         Parameters:
-        arrays (list): List of numpy arrays where:
-            - First array contains column names
-            - Second array contains dtype information
-            - Remaining arrays contain column data
+        arrays (list): List of numpy arrays as made by frame.encodeFrame:
+            - First array is the header describing columns and index
+            - Remaining arrays are views of the column and index data
 
         Returns:
-        pandas.DataFrame: Reconstructed DataFrame
+        pandas.DataFrame: Reconstructed DataFrame, dtypes and index intact
         """
         try:
-            colNames = arrays[0].tobytes().decode("utf-8").split("|")
-            dtypeInfo = arrays[1].tobytes().decode("utf-8").split("|")
-            data = {}
-            for i, (colNames, dtypeStr) in enumerate(zip(colNames, dtypeInfo)):
-                arr = arrays[i + 2]  # +2 because first two arrays are metadata
-                if "float" in dtypeStr:
-                    data[colNames] = arr
-                elif "int" in dtypeStr:
-                    data[colNames] = arr
-                else:
-                    # Assume string data
-                    data[colNames] = arr.tobytes().decode("utf-8").split("|")
-            return pd.DataFrame(data)
+            return frame.decodeFrame(arrays)
         except Exception as e:
             print(f"Error converting numpy arrays to DataFrame: {e}")
             return None
@@ -281,57 +263,30 @@ class ZeroMQClient:
 
     def connectClient(self, scheme: str = None):
         if self.client is None:
-            self.client = tensorcom.Connection(multipart=False)
+            self.client = tensorcom.Connection(multipart=True)
         self.client.connect(self.url)
 
     def send(self, data: Union[str, pd.DataFrame]):
         if isinstance(data, str):
-            toSend = self.stringToNumpy(data)
+            toSend = [self.stringToNumpy(data)]
         elif isinstance(data, pd.DataFrame):
             toSend = self.dataframeToNumpyArrays(data)
-        self.client.send(toSend)
+        self.client.send(toSend, allow64=True)
 
     @staticmethod
     def stringToNumpy(text: str) -> NDArray[np.uint8]:
-        """Convert string to numpy array with appropriate dtype"""
-        # Convert to numpy array of uint8 (bytes)
-        arr = np.array(list(text.encode("utf-8")), dtype=np.uint8)
-        return arr
+        """Convert string to a uint8 view of its utf-8 bytes"""
+        return frame.encodeString(text)
 
     @staticmethod
-    def dataframeToNumpyArrays(df: pd.DataFrame) -> NDArray[np.uint8]:
+    def dataframeToNumpyArrays(df: pd.DataFrame) -> list[NDArray]:
         """
-        Convert DataFrame to list of numpy arrays:
-        - One array for column names
-        - One array for dtypes
-        - One array per column of data
+        Convert DataFrame to list of numpy arrays (see frame.encodeFrame):
+        - One header array describing columns, dtypes and index
+        - The column data at its own dtype, strings offset encoded
+        - The index data, unless it's a RangeIndex
         """
-        arrays = []
-        arrays.append(
-            np.array(list("|".join(df.columns).encode("utf-8")), dtype=np.uint8)
-        )
-        arrays.append(
-            np.array(
-                list("|".join(str(dt) for dt in df.dtypes).encode("utf-8")),
-                dtype=np.uint8,
-            )
-        )
-
-        for col in df.columns:
-            if df[col].dtype in [np.float64, np.float32]:
-                arr = df[col].to_numpy(dtype=np.float32)
-            elif df[col].dtype in [np.int64, np.int32, np.int16, np.int8]:
-                arr = df[col].to_numpy(dtype=np.int32)
-            elif df[col].dtype == "object" or df[col].dtype == "string":
-                arr = np.array(
-                    list("|".join(df[col].fillna("").astype(str)).encode("utf-8")),
-                    dtype=np.uint8,
-                )
-            else:
-                raise ValueError(f"Unsupported dtype: {df[col].dtype} in column {col}")
-            arrays.append(arr)
-
-        return arrays
+        return frame.encodeFrame(df)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from satorilib.utils.memory import Memory, AlignedMemory
+
+
+def stream(name: str, times: np.ndarray, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame(
+        {name: rng.random(len(times))},
+        index=pd.DatetimeIndex(np.sort(times)))
+
+
+def streams(seed: int) -> list[pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64('2024-01-01T00:00:00', 'ns')
+
+    def times(count: int) -> np.ndarray:
+        return start + np.unique(rng.integers(0, 10_000, count)).astype('timedelta64[s]')
+
+    return [
+        stream('target', times(300), rng),
+        stream('a', times(200), rng),
+        stream('b', times(50), rng)]
+
+
+def assertMatches(aligned: AlignedMemory, dfs: list[pd.DataFrame]):
+    merged = Memory.mergeAsof(dfs[0], dfs[1:])
+    frame = aligned.frame()
+    assert list(frame.index) == list(merged.index)
+    assert list(frame.columns) == list(merged.columns)
+    np.testing.assert_array_equal(frame.values.astype(float), merged.values.astype(float))
+
+
+def test_aligned_matches_merge_as_observations_arrive():
+    for seed in range(5):
+        full = streams(seed)
+        seeded = [df.iloc[:df.shape[0] // 2] for df in full]
+        aligned = Memory.aligned([df.copy() for df in seeded], targetColumn='target')
+        assertMatches(aligned, seeded)
+        rest = [
+            (time, column, value)
+            for df in full
+            for column in df.columns
+            for time, value in df[column].iloc[df.shape[0] // 2:].items()]
+        # in time order for the first half of the seeds, any order for the rest
+        order = (
+            sorted(range(len(rest)), key=lambda i: rest[i][0]) if seed < 3
+            else np.random.default_rng(seed).permutation(len(rest)))
+        for i in order:
+            time, column, value = rest[i]
+            aligned.update(pd.DataFrame({column: [value]}, index=[time]))
+        assertMatches(aligned, full)
+
+
+def test_aligned_follows_the_target_first():
+    full = streams(9)
+    aligned = Memory.aligned([full[1].copy(), full[0].copy(), full[2].copy()], targetColumn='target')
+    assertMatches(aligned, full)
+    assert len(aligned.frame()) == len(full[0])
+
+
+def test_filled_matches_append_insert():
+    rng = np.random.default_rng(3)
+    index = pd.date_range('2024-01-01', periods=100, freq='min')
+    df = pd.DataFrame({'a': rng.random(100), 'b': np.nan}, index=index)
+    df.loc[index[::7], 'b'] = rng.random(len(index[::7]))
+    aligned = AlignedMemory(df.iloc[:60])
+    expected = df.iloc[:60].ffill()
+    raw = df.iloc[:60]
+    for time in index[60:]:
+        incremental = pd.DataFrame({'b': [rng.random()]}, index=[time])
+        aligned.update(incremental)
+        expected = Memory.appendInsert(expected, incremental)
+        raw = pd.concat([raw, incremental])
+    np.testing.assert_array_equal(aligned.array(), expected.values)
+    # an observation from the past refills the run after it, as filling the
+    # raw observations again would (appendInsert leaves that run stale)
+    incremental = pd.DataFrame({'b': [2.0]}, index=[index[10] + pd.Timedelta(seconds=30)])
+    aligned.update(incremental)
+    raw = pd.concat([raw, incremental]).sort_index()
+    np.testing.assert_array_equal(aligned.array(), raw.ffill().values)
+    assert list(aligned.frame().index) == list(raw.index)
@@ -0,0 +1,150 @@
+import json
+import time
+import random
+import asyncio
+import websockets
+from satorilib.pubsub.asyncpubsub import AsyncSatoriPubSubConn
+
+
+class FakePubSub():
+    '''
+    a local websockets server recording what each connection sends. hangUp
+    closes the next connections right after the key, goSilent stops reading
+    (so pings go unanswered) on the next connection.
+    '''
+
+    def __init__(self):
+        self.connections: list[float] = []
+        self.received: list[list[str]] = []
+        self.hangUp = 0
+        self.goSilent = 0
+        self.server = None
+        self.port = None
+
+    async def handler(self, ws, path: str = None):
+        self.connections.append(time.monotonic())
+        messages = []
+        self.received.append(messages)
+        if self.goSilent > 0:
+            self.goSilent -= 1
+            ws.transport.pause_reading()
+            await asyncio.sleep(1)
+            return
+        async for message in ws:
+            messages.append(message)
+            if self.hangUp > 0:
+                self.hangUp -= 1
+                await ws.close()
+                return
+            if message == 'echo':
+                await ws.send('echoed')
+
+    async def start(self):
+        self.server = await websockets.serve(
+            self.handler, '127.0.0.1', self.port or 0, close_timeout=0.1)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def conn(server: FakePubSub, **kwargs) -> AsyncSatoriPubSubConn:
+    return AsyncSatoriPubSubConn(
+        uid='uid',
+        payload='payload',
+        url=f'ws://127.0.0.1:{server.port}',
+        **{'minDelay': 0.02, 'maxDelay': 0.1, **kwargs})
+
+
+async def until(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        await asyncio.sleep(0.01)
+
+
+def test_reconnect_delays_are_jittered_exponential_backoff():
+    random.seed(1)
+    c = AsyncSatoriPubSubConn(
+        uid='uid', payload='payload', minDelay=1, maxDelay=60, start=False)
+    assert c._delay() == 0
+    for attempts in range(1, 10):
+        c.attempts = attempts
+        cap = min(60, 2 ** (attempts - 1))
+        delays = [c._delay() for _ in range(200)]
+        assert all(0 <= delay <= cap for delay in delays)
+        # spread over the whole window, not bunched at the cap
+        assert min(delays) < cap * 0.1 and max(delays) > cap * 0.9
+
+
+def test_dropped_connections_back_off_then_reset_once_one_holds():
+    async def run():
+        server = await FakePubSub().start()
+        server.hangUp = 4
+        c = conn(server, heartbeat=0.05)
+        await until(lambda: len(server.connections) == 5)
+        # four quick drops in a row grew the backoff
+        assert c.attempts >= 4
+        gaps = [b - a for a, b in zip(server.connections, server.connections[1:])]
+        assert all(gap < 0.1 + 0.05 for gap in gaps)
+        # the fifth holds past two heartbeats, so a drop starts over
+        await asyncio.sleep(0.2)
+        await c.disconnect(reconnect=True)
+        await until(lambda: len(server.connections) == 6)
+        assert c.attempts == 1
+        assert c.stats()['connects'] == 6
+        await c.disconnect()
+        await server.stop()
+
+    asyncio.run(run())
+
+
+def test_the_outbox_drains_in_order_after_a_reconnect():
+    async def run():
+        received = []
+        server = await FakePubSub().start()
+        c = conn(server, router=received.append)
+        await until(lambda: c.connected)
+        c.send('echo')
+        await until(lambda: received == ['echoed'])
+        await server.stop()
+        await until(lambda: not c.connected)
+        for i in range(3):
+            c.send(title='publish', topic='t', data=str(i))
+        assert c.stats()['queued'] == 3
+        await server.start()
+        await until(lambda: len(server.received) == 2 and len(server.received[1]) == 4)
+        key, *sent = server.received[1]
+        assert key == 'key:payload'
+        assert [message.split(':', 1)[0] for message in sent] == ['publish'] * 3
+        assert [json.loads(message.split(':', 1)[1])['data'] for message in sent] == ['0', '1', '2']
+        assert c.stats()['queued'] == 0
+        await c.disconnect()
+        await server.stop()
+
+    asyncio.run(run())
+
+
+def test_a_full_outbox_drops_the_oldest():
+    c = AsyncSatoriPubSubConn(uid='uid', payload='payload', outboxSize=2, start=False)
+    for message in ['a', 'b', 'c']:
+        c._enqueue(message)
+    assert list(c.outbox) == ['b', 'c'] and c.stats()['dropped'] == 1
+
+
+def test_unanswered_heartbeats_end_a_dead_connection():
+    async def run():
+        server = await FakePubSub().start()
+        server.goSilent = 1
+        c = conn(server, heartbeat=0.1)
+        start = time.monotonic()
+        await until(lambda: c.stats()['disconnects'] == 1, timeout=3)
+        # noticed within a couple of heartbeats, not when a send fails
+        assert time.monotonic() - start < 1
+        await until(lambda: c.connected and len(server.connections) == 2)
+        await c.disconnect()
+        await server.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,114 @@
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from satorilib.server.asyncserver import AsyncSatoriServerClient
+from satorilib.server.server import SatoriServerClient
+
+
+class FakeServer():
+    '''
+    answers after `delay` with the status queued for the path (then 200),
+    keeping track of how many requests were in flight at once.
+    '''
+
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.statuses: dict[str, list[int]] = {}
+        self.lock = threading.Lock()
+        self.inFlight = 0
+        self.mostInFlight = 0
+        self.paths: list[str] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def respond(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                with fake.lock:
+                    fake.paths.append(self.path)
+                    fake.inFlight += 1
+                    fake.mostInFlight = max(fake.mostInFlight, fake.inFlight)
+                    queued = fake.statuses.get(self.path, [])
+                    status = queued.pop(0) if len(queued) > 0 else 200
+                time.sleep(fake.delay)
+                with fake.lock:
+                    fake.inFlight -= 1
+                body = json.dumps({'status': status}).encode()
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = respond
+            do_POST = respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+class FakeWallet():
+    publicKey = 'key'
+    address = 'address'
+
+    def authPayload(self, asDict: bool = False, challenge: str = None) -> dict:
+        return {'pubkey': self.publicKey, 'message': challenge, 'signature': 'sig'}
+
+
+def test_concurrency_is_bounded_by_the_shared_semaphore():
+    server = FakeServer(delay=0.05)
+
+    async def run():
+        session = AsyncSatoriServerClient.sharedSession()
+        semaphore = asyncio.Semaphore(4)
+        clients = [
+            AsyncSatoriServerClient(
+                FakeWallet(), url=server.url, session=session, semaphore=semaphore)
+            for _ in range(6)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            client._statusAndText('GET', endpoint='/stake/check')
+            for client in clients for _ in range(4)])
+        elapsed = time.perf_counter() - start
+        # a shared session is the caller's to close
+        for client in clients:
+            await client.close()
+        assert not session.closed
+        await session.close()
+        return results, elapsed, clients
+
+    results, elapsed, clients = asyncio.run(run())
+    assert all(success for success, _ in results) and len(results) == 24
+    assert server.mostInFlight == 4
+    # 24 calls 4 at a time is 6 rounds, far from 24 sequential ones
+    assert 0.3 <= elapsed < 1.0
+    assert clients[0].latencies()['/stake/check']['count'] == 4
+    server.server.shutdown()
+
+
+def test_publish_answers_like_the_sync_client():
+    server = FakeServer(delay=0)
+    server.statuses['/record/prediction/authed'] = [400, 429, 503, 401, 200]
+
+    async def run():
+        async with AsyncSatoriServerClient(FakeWallet(), url=server.url) as client:
+            results = []
+            for i in range(5):
+                client.topicTime = {}
+                results.append(await client.publish(
+                    topic=f'topic{i}', data=1, observationTime='t', observationHash='h'))
+            return results
+
+    results = asyncio.run(run())
+    assert results == [False, None, None, None, True]
+    # the same statuses through the sync client's classification
+    for status, result in zip([400, 429, 503, 401], results):
+        response = type('Response', (), {'status_code': status})()
+        assert SatoriServerClient._refused(response) is result
+    server.server.shutdown()
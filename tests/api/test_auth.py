@@ -0,0 +1,93 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from satorilib.server.auth import AuthCache
+from satorilib.server.server import SatoriServerClient
+
+
+class FakeWallet():
+    def __init__(self, publicKey: str = 'key', delay: float = 0):
+        self.publicKey = publicKey
+        self.delay = delay
+        self.challenges = []
+        self.lock = threading.Lock()
+
+    def authPayload(self, asDict: bool = False, challenge: str = None) -> dict:
+        time.sleep(self.delay)
+        with self.lock:
+            self.challenges.append(challenge)
+        return {'pubkey': self.publicKey, 'message': challenge, 'signature': 'sig'}
+
+
+def test_headers_are_reused_until_the_ttl():
+    cache = AuthCache(ttl=0.2)
+    wallet = FakeWallet()
+    first = cache.payload(wallet)
+    assert cache.payload(wallet) == first
+    assert len(wallet.challenges) == 1
+    # callers get copies, changing one doesn't change what's handed out next
+    cache.payload(wallet)['signature'] = 'changed'
+    assert cache.payload(wallet)['signature'] == 'sig'
+    time.sleep(0.25)
+    renewed = cache.payload(wallet)
+    assert renewed['message'] != first['message']
+    assert float(renewed['message']) > float(first['message'])
+    assert cache.stats()['signed'] == 2 and cache.stats()['saved'] == 3
+
+
+def test_a_burst_signs_once_per_wallet():
+    cache = AuthCache(ttl=30)
+    wallets = [FakeWallet('a', delay=0.05), FakeWallet('b', delay=0.05)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        payloads = list(executor.map(
+            lambda i: cache.payload(wallets[i % 2]), range(32)))
+    assert [len(wallet.challenges) for wallet in wallets] == [1, 1]
+    assert {payload['pubkey'] for payload in payloads} == {'a', 'b'}
+    assert cache.stats()['wallets'] == 2
+
+
+def test_given_challenges_always_sign_and_forget_drops_entries():
+    cache = AuthCache(ttl=30)
+    wallet = FakeWallet()
+    assert cache.payload(wallet, challenge='c1')['message'] == 'c1'
+    assert cache.payload(wallet, challenge='c1')['message'] == 'c1'
+    assert wallet.challenges == ['c1', 'c1']
+    cache.payload(wallet)
+    cache.forget(wallet)
+    cache.payload(wallet)
+    cache.forget()
+    assert len(wallet.challenges) == 4 and cache.stats()['wallets'] == 0
+
+
+class FakeResponse():
+    def __init__(self, status: int):
+        self.status_code = status
+        self.ok = status < 400
+        self.text = str(status)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(self.text, response=self)
+
+
+def test_a_refused_signature_is_not_reused():
+    wallet = FakeWallet()
+    client = SatoriServerClient(wallet=wallet, url='http://unused')
+    statuses = [200, 401, 200]
+    headers = []
+
+    def send(function, url, endpoint, **kwargs):
+        headers.append(kwargs['headers']['message'])
+        return FakeResponse(statuses.pop(0))
+
+    client._send = send
+    client._makeAuthenticatedCall(function=requests.get, endpoint='/a')
+    try:
+        client._makeAuthenticatedCall(function=requests.get, endpoint='/a')
+    except requests.exceptions.HTTPError as _:
+        pass
+    client._makeAuthenticatedCall(function=requests.get, endpoint='/a')
+    # the first two shared a signature, the 401 made the third sign again
+    assert headers[0] == headers[1] != headers[2]
+    assert len(wallet.challenges) == 2
@@ -0,0 +1,68 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from satorilib.concepts import StreamId
+from satorilib.disk.cache import Cache
+from satorilib.disk.filetypes.binary import BinaryManager, migrateCsvDirectories
+from satorilib.utils.hash import generatePathId
+
+
+def frame(hashes: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        {'value': np.arange(len(hashes), dtype=float), 'hash': hashes},
+        index=pd.date_range('2024-01-01', periods=len(hashes), freq='s').strftime(
+            '%Y-%m-%d %H:%M:%S.%f'))
+
+
+def test_rows_keep_their_own_hashes():
+    binary = BinaryManager()
+    path = os.path.join(tempfile.mkdtemp(), 'aggregate.bin')
+    mixed = ['0123456789abcdef', '', '']
+    assert binary.write(path, frame(mixed))
+    assert list(binary.read(path)['hash']) == mixed
+    # lengths that add up to whole digests but aren't one per row
+    uneven = ['0123456789abcdef0123456789abcdef', '', 'fedcba9876543210', np.nan]
+    assert binary.write(path, frame(uneven))
+    assert list(binary.read(path)['hash']) == ['', '', 'fedcba9876543210', '']
+
+
+def test_rows_without_hashes_are_stored():
+    binary = BinaryManager()
+    path = os.path.join(tempfile.mkdtemp(), 'aggregate.bin')
+    assert binary.write(path, frame(['', '']))
+    assert binary.append(path, frame(['', '', '']).iloc[2:])
+    read = binary.read(path)
+    assert list(read['value']) == [0.0, 1.0, 2.0]
+    assert list(read['hash']) == ['', '', '']
+
+
+def test_migration_only_keeps_copies_that_read_back_exactly():
+    loc = tempfile.mkdtemp()
+
+    def stream(name: str, values: list[str], times: list[str]) -> StreamId:
+        streamId = StreamId(source='test', author='author', stream=name, target='target')
+        cache = Cache(id=streamId, loc=loc)
+        for value, time in zip(values, times):
+            assert cache.appendByAttributes(value, time, hashThis=True).success
+        assert cache.validateAllHashes()[0]
+        return streamId
+
+    seconds = [f'2024-01-01 00:00:0{i}.000000' for i in range(3)]
+    floats = stream('floats', ['1.5', '2.25', '-3.0'], seconds)
+    ints = stream('ints', ['1', '2', '3'], seconds)
+    isoTimes = stream('isoTimes', ['1.5', '2.5', '3.5'], [
+        f'2024-01-01T00:00:0{i}' for i in range(3)])
+    results = migrateCsvDirectories(loc)
+    assert results == {
+        generatePathId(streamId=floats): True,
+        generatePathId(streamId=ints): False,
+        generatePathId(streamId=isoTimes): False}
+    for streamId in (ints, isoTimes):
+        assert not os.path.exists(os.path.join(
+            loc, generatePathId(streamId=streamId), 'aggregate.bin'))
+    migrated = Cache(id=floats, loc=loc, ext='bin')
+    assert migrated.modifyBasedValidation(*migrated.performValidation())
+    assert list(migrated.df['value']) == [1.5, 2.25, -3.0]
+    assert list(migrated.df.index) == seconds
+    assert list(migrated.df['hash']) == list(Cache(id=floats, loc=loc).df['hash'])
@@ -0,0 +1,73 @@
+import tempfile
+import pandas as pd
+from satorilib.concepts import StreamId
+from satorilib.disk.cache import Cache
+from satorilib.utils.hash import hashIt
+
+streamId = StreamId(source='test', author='author', stream='stream', target='target')
+
+
+def test_append_after_reloading_unhashed_rows():
+    loc = tempfile.mkdtemp()
+    cache = Cache(id=streamId, loc=loc)
+    cache.appendByAttributes('1', '2024-01-01 00:00:00.000000')
+    cache.appendByAttributes('2', '2024-01-01 00:00:01.000000')
+    # the unhashed row comes back from disk as NaN
+    reloaded = Cache(id=streamId, loc=loc)
+    assert reloaded.appendByAttributes('3', '2024-01-01 00:00:02.000000').success
+    hashed = reloaded.appendByAttributes('4', '2024-01-01 00:00:03.000000', hashThis=True)
+    assert hashed.success
+    assert hashed.hash == hashIt('2024-01-01 00:00:03.0000004')
+    assert list(Cache(id=streamId, loc=loc).df['value'].astype(str)) == ['1', '2', '3', '4']
+
+
+def test_gather_keeps_caches_in_other_folders_apart():
+    first = Cache(id=streamId, loc=tempfile.mkdtemp())
+    second = Cache(id=streamId, loc=tempfile.mkdtemp())
+    first.appendByAttributes('1', '2024-01-01 00:00:00.000000')
+    second.appendByAttributes('2', '2024-01-01 00:00:00.000000')
+    assert list(first.gather(targetColumn='value').iloc[:, 0].astype(str)) == ['1']
+    gathered = second.gather(targetColumn='value')
+    assert list(gathered.iloc[:, 0].astype(str)) == ['2']
+    # a single stream comes back indexed as it was read, like before batching
+    assert list(gathered.index) == list(second.read().index)
+
+
+def test_gather_aligned_matches_gather():
+    loc = tempfile.mkdtemp()
+    other = StreamId(source='test', author='author', stream='other', target='target')
+    target, feature = Cache(id=streamId, loc=loc), Cache(id=other, loc=loc)
+    for second in range(0, 20, 2):
+        target.appendByAttributes(str(second), f'2024-01-01 00:00:{second:02d}.000000')
+    for second in range(1, 20, 3):
+        feature.appendByAttributes(str(second * 10), f'2024-01-01 00:00:{second:02d}.000000')
+    column = ('test', 'author', 'stream', 'target')
+    aligned = target.gatherAligned(targetColumn=column, streamIds=[streamId, other])
+    gathered = target.gather(targetColumn=column, streamIds=[streamId, other])
+    assert aligned.frame().astype(float).equals(gathered.astype(float))
+    aligned.update(pd.DataFrame(
+        {('test', 'author', 'other', 'target'): [999.0]},
+        index=pd.DatetimeIndex(['2024-01-01 00:00:17'])))
+    # only the target rows at or after it change
+    assert list(aligned.frame().iloc[-2:, 1]) == [160.0, 999.0]
+
+
+def test_inserting_into_a_hashed_history_survives_a_restart():
+    loc = tempfile.mkdtemp()
+    cache = Cache(id=streamId, loc=loc)
+    cache.checkpointInterval = 3
+    for second in [0, 1, 2, 4, 5, 6, 7, 8]:
+        result = cache.appendByAttributes(
+            str(second), f'2024-01-01 00:00:0{second}.000000', hashThis=True)
+        cache.modifyBasedValidation(result.validated, result.validatedFrame)
+    restarted = Cache(id=streamId, loc=loc)
+    restarted.checkpointInterval = 3
+    assert restarted.modifyBasedValidation(*restarted.performValidation())
+    inserted = restarted.appendByAttributes(
+        '3', '2024-01-01 00:00:03.000000', hashThis=True)
+    assert inserted.validated
+    restarted.modifyBasedValidation(inserted.validated, inserted.validatedFrame)
+    again = Cache(id=streamId, loc=loc)
+    assert again.modifyBasedValidation(*again.performValidation())
+    assert list(again.df['value'].astype(str)) == [str(i) for i in range(9)]
+    assert again.validateAllHashes()[0]
@@ -0,0 +1,142 @@
+import os
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from satorilib.server.catalog import StreamCatalog, tokenize
+from satorilib.server.server import SatoriServerClient
+
+
+def stream(name: str, source: str, target: str, tags: str, vote: float = 0, total: float = 0) -> dict:
+    return {
+        'stream': name,
+        'source': source,
+        'target': target,
+        'tags': tags,
+        'vote': vote,
+        'total_vote': total}
+
+
+class FakeCatalogServer():
+    ''' serves /streams/search with an etag, answering 304 when it matches '''
+
+    def __init__(self, streams: list[dict]):
+        self.streams = streams
+        self.version = 1
+        self.requests: list[dict] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                fake.requests.append(dict(self.headers))
+                etag = f'"v{fake.version}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body = json.dumps(fake.streams).encode()
+                self.send_response(200)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', f'Mon, 01 Jan 2024 00:00:0{fake.version} GMT')
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def change(self, streams: list[dict]):
+        self.streams = streams
+        self.version += 1
+
+
+class FakeWallet():
+    address = 'address'
+
+
+streams = [
+    stream('Coinbase.AED.USDT', 'satori', 'data.rates.AED', 'AED, coinbase'),
+    stream('Coinbase.BTC.USD', 'satori', 'data.rates.BTC', 'btc, coinbase', vote=5, total=10),
+    stream('Weather.Austin', 'noaa', 'temp', 'weather, texas', total=50),
+    stream('Kraken.BTC.EUR', 'kraken', None, 'btc', vote=5, total=20)]
+
+
+def client(server: FakeCatalogServer, snapshotPath: str = None, ttl: float = 60) -> SatoriServerClient:
+    return SatoriServerClient(
+        wallet=FakeWallet(), url=server.url, catalogPath=snapshotPath, catalogTtl=ttl)
+
+
+def names(found: list[dict]) -> list[str]:
+    return [s['stream'] for s in found]
+
+
+def test_revalidates_with_the_etag_after_the_ttl():
+    server = FakeCatalogServer(streams)
+    c = client(server, ttl=0)
+    assert names(c.getSearchStreams()) == [
+        'Kraken.BTC.EUR', 'Coinbase.BTC.USD', 'Weather.Austin', 'Coinbase.AED.USDT']
+    assert 'If-None-Match' not in server.requests[0]
+    assert c.getSearchStreams('weather') == c.catalog.search('weather')
+    assert server.requests[1]['If-None-Match'] == '"v1"'
+    assert server.requests[1]['If-Modified-Since'] == 'Mon, 01 Jan 2024 00:00:01 GMT'
+    assert c.catalog.stats()['fetches'] == 1 and c.catalog.stats()['revalidations'] == 1
+    server.change(streams[:1])
+    assert names(c.getSearchStreams()) == ['Coinbase.AED.USDT']
+    assert c.catalog.stats()['fetches'] == 2 and c.catalog.etag == '"v2"'
+
+
+def test_within_the_ttl_nothing_is_sent_unless_expired():
+    server = FakeCatalogServer(streams)
+    c = client(server, ttl=60)
+    c.getSearchStreams()
+    c.getSearchStreams('btc')
+    assert len(server.requests) == 1
+    c.catalog.expire()
+    assert not c.catalog.refresh()
+    assert len(server.requests) == 2
+    assert c.catalog.refresh(force=True) is False
+    assert len(server.requests) == 3
+
+
+def test_snapshots_survive_a_restart():
+    server = FakeCatalogServer(streams)
+    path = os.path.join(tempfile.mkdtemp(), 'catalog.json')
+    client(server, snapshotPath=path).getSearchStreams()
+    restarted = client(server, snapshotPath=path)
+    assert len(restarted.catalog.streams) == 4
+    # the first refresh after a restart is already conditional
+    restarted.getSearchStreams()
+    assert server.requests[-1]['If-None-Match'] == '"v1"'
+    assert restarted.catalog.stats()['fetches'] == 0
+
+
+def test_the_inverted_index_matches_word_prefixes():
+    server = FakeCatalogServer(streams)
+    c = client(server)
+    c.getSearchStreams()
+    assert names(c.catalog.search('btc')) == ['Kraken.BTC.EUR', 'Coinbase.BTC.USD']
+    assert names(c.catalog.search('coin BTC')) == ['Coinbase.BTC.USD']
+    assert names(c.catalog.search('rates.a')) == ['Coinbase.AED.USDT']
+    assert names(c.catalog.search('tex')) == ['Weather.Austin']
+    assert c.catalog.search('btc nothing') == []
+    assert len(c.catalog.search('')) == 4
+    # what a scan over the same fields would find, in catalog order
+    for query in ['btc', 'co', 'satori', 'a', 'eur btc', 'zzz']:
+        words = tokenize(query)
+        scanned = [
+            s for s in c.catalog.streams
+            if all(
+                any(token.startswith(word) for field in StreamCatalog.fields
+                    for token in tokenize(s.get(field) or ''))
+                for word in words)]
+        assert c.catalog.search(query) == scanned, query
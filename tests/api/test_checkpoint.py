@@ -0,0 +1,27 @@
+import os
+import tempfile
+import pandas as pd
+from satorilib.disk.checkpoint import Checkpoints
+from satorilib.utils.hash import historyHashes
+
+
+def frame(rows: int) -> pd.DataFrame:
+    return historyHashes(pd.DataFrame(
+        {'value': [str(i) for i in range(rows)]},
+        index=[f'2024-01-01 00:00:{i:02d}.000000' for i in range(rows)]))
+
+
+def test_revalidation_does_not_duplicate_anchors():
+    path = os.path.join(tempfile.mkdtemp(), 'checkpoints.json')
+    df = frame(50)
+    checkpoints = Checkpoints(path, interval=10)
+    checkpoints.extend(df)
+    expected = list(checkpoints.anchors)
+    assert [anchor[0] for anchor in expected] == [9, 19, 29, 39, 49]
+    for _ in range(3):
+        checkpoints.extend(df, start=0)
+        checkpoints.extend(df, start=25)
+    assert checkpoints.anchors == expected
+    checkpoints.advance([(49, df.index[49], df['hash'].values[49])])
+    assert checkpoints.anchors == expected
+    assert Checkpoints(path, interval=10).load().anchors == expected
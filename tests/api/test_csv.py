@@ -0,0 +1,72 @@
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from satorilib.disk.filetypes.csv import CSVManager
+from satorilib.utils.hash import hashIt
+
+
+def frame(start: int, rows: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            'value': [float(i) * 1.5 for i in range(start, start + rows)],
+            'hash': [hashIt(str(i)) for i in range(start, start + rows)]},
+        index=pd.date_range(
+            '2024-01-01', periods=start + rows, freq='s'
+        ).strftime('%Y-%m-%d %H:%M:%S.%f')[start:])
+
+
+def fullRead(path: str, start: int = 0) -> pd.DataFrame:
+    ''' what readLines did before the sidecar: parse from start to the end '''
+    return CSVManager()._conformBasic(pd.read_table(
+        path, sep=',', index_col=0, header=None, skiprows=start))
+
+
+def touchLater(path: str, than: str):
+    later = os.stat(than).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(later, later))
+
+
+def test_sidecar_is_built_on_write_and_extended_on_append():
+    csv = CSVManager()
+    path = os.path.join(tempfile.mkdtemp(), 'aggregate.csv')
+    assert csv.write(path, frame(0, 5))
+    offsets = np.fromfile(path + '.idx', dtype='<u8')
+    assert len(offsets) == 6 and offsets[0] == 0
+    assert offsets[-1] == os.path.getsize(path)
+    assert csv.append(path, frame(5, 3))
+    offsets = np.fromfile(path + '.idx', dtype='<u8')
+    assert len(offsets) == 9 and offsets[-1] == os.path.getsize(path)
+    assert list(csv.lineOffsets(path)) == list(offsets)
+    assert csv.remove(path) and not os.path.exists(path + '.idx')
+
+
+def test_read_lines_matches_a_full_read():
+    csv = CSVManager()
+    path = os.path.join(tempfile.mkdtemp(), 'aggregate.csv')
+    csv.write(path, frame(0, 10))
+    csv.append(path, frame(10, 7))
+    for start, end in [(0, 1), (0, 17), (3, 9), (16, None), (10, 40), (5, 2)]:
+        expected = fullRead(path, start).iloc[:max(end or 0, start + 1) - start]
+        assert csv.readLines(path, start, end).equals(expected), (start, end)
+    assert csv.readLines(path, 17) is None
+    assert csv.tail(path, rows=3).equals(fullRead(path).iloc[-3:])
+
+
+def test_stale_sidecars_are_rebuilt():
+    csv = CSVManager()
+    path = os.path.join(tempfile.mkdtemp(), 'aggregate.csv')
+    csv.write(path, frame(0, 6))
+    # rewritten behind our back with lines of another length, same and
+    # larger sizes than the sidecar remembers
+    for rewrite in (frame(100, 6), frame(1000, 9)):
+        rewrite.to_csv(path, float_format='%.10f', header=False)
+        touchLater(path, path + '.idx')
+        assert csv.readLines(path, 2, 4).equals(fullRead(path).iloc[2:4])
+        assert csv.lineOffsets(path)[-1] == os.path.getsize(path)
+    # shrunk, then a sidecar that's missing altogether
+    frame(0, 2).to_csv(path, float_format='%.10f', header=False)
+    assert csv.tail(path, rows=5).equals(fullRead(path))
+    os.remove(path + '.idx')
+    assert csv.readLines(path, 1).equals(fullRead(path).iloc[1:2])
+    assert os.path.exists(path + '.idx')
@@ -0,0 +1,186 @@
+import json
+import time
+import socket
+import random
+import threading
+from typing import Union
+from concurrent.futures import ThreadPoolExecutor
+from satorilib.electrumx import Electrumx, RateBudget
+from satorilib.electrumx.electrumx import LineFramer
+
+
+class FakeElectrumx():
+    '''
+    answers every request after `delay`, in whatever order they finish. a
+    batch of more than maxBatch calls is answered with busy errors.
+    '''
+
+    def __init__(self, delay: float = 0.05, chunk: int = None, maxBatch: int = None):
+        self.delay = delay
+        self.chunk = chunk
+        self.maxBatch = maxBatch
+        self.batches = []
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+        self.sendLock = threading.Lock()
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        conn, _ = self.server.accept()
+        buffer = b''
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                return
+            buffer += data
+            while b'\n' in buffer:
+                line, buffer = buffer.split(b'\n', 1)
+                threading.Thread(
+                    target=self.reply,
+                    args=(conn, json.loads(line)),
+                    daemon=True).start()
+
+    def answer(self, request: dict, busy: bool = False) -> dict:
+        if busy:
+            return {
+                'jsonrpc': '2.0',
+                'id': request['id'],
+                'error': {'code': -102, 'message': 'server busy'}}
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': request['params']}
+
+    def reply(self, conn: socket.socket, request: Union[dict, list]):
+        time.sleep(self.delay * random.uniform(0.5, 1.5))
+        if isinstance(request, list):
+            self.batches.append(len(request))
+            busy = self.maxBatch is not None and len(request) > self.maxBatch
+            answer = [self.answer(r, busy) for r in request]
+        else:
+            answer = self.answer(request)
+        reply = (json.dumps(answer) + '\n').encode()
+        with self.sendLock:
+            if self.chunk is None:
+                conn.sendall(reply)
+                return
+            # dribble it out so the client sees it split across many reads
+            for i in range(0, len(reply), self.chunk):
+                conn.sendall(reply[i:i + self.chunk])
+
+
+def test_replies_that_beat_the_caller_are_kept():
+    server = FakeElectrumx(delay=0)
+    electrumx = Electrumx(host='127.0.0.1', port=server.port)
+    # the listener can resolve a call before its caller starts waiting
+    future = electrumx.expectResponse('early')
+    electrumx.resolve({'id': 'early', 'result': 1})
+    assert electrumx.listenForResponse('early', future=future) == {'id': 'early', 'result': 1}
+    for i in range(100):
+        assert electrumx.api.sendRequest('echo', [i]) == [i]
+
+
+def test_calls_resolve_as_replies_arrive():
+    server = FakeElectrumx(delay=0.05)
+    electrumx = Electrumx(host='127.0.0.1', port=server.port)
+    then = time.time()
+    for i in range(5):
+        assert electrumx.api.sendRequest('echo', [i]) == [i]
+    # sequential calls cost a round trip each, not a second each
+    assert time.time() - then < 2
+
+
+def test_concurrent_calls_get_their_own_replies():
+    server = FakeElectrumx(delay=0.05)
+    electrumx = Electrumx(host='127.0.0.1', port=server.port)
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        results = list(executor.map(
+            lambda i: electrumx.api.sendRequest('echo', [i]),
+            range(200)))
+    assert results == [[i] for i in range(200)]
+    assert len(electrumx.pending) == 0
+
+
+def test_timeouts_leave_nothing_behind():
+    server = FakeElectrumx(delay=0.5)
+    electrumx = Electrumx(host='127.0.0.1', port=server.port, responseTimeout=5)
+    assert electrumx.send('echo', [1], timeout=0.05) is None
+    assert len(electrumx.pending) == 0
+    # the late reply is dropped and the next call still gets its own
+    assert electrumx.send('echo', [2])['result'] == [2]
+
+
+def test_framer_fuzz_split_and_coalesced():
+    rng = random.Random(7)
+    for _ in range(200):
+        messages = [
+            json.dumps({'id': i, 'result': 'x' * rng.randint(0, 3000) + 'é'}).encode()
+            for i in range(rng.randint(1, 30))]
+        stream = b''.join(message + b'\n' for message in messages)
+        framer = LineFramer()
+        received = []
+        position = 0
+        while position < len(stream):
+            # anything from a single byte to many messages at once
+            size = rng.choice([1, 2, rng.randint(1, 64), rng.randint(1, 20000)])
+            received.extend(framer.feed(stream[position:position + size]))
+            position += size
+        assert received == messages
+        assert len(framer.buffer) == 0
+
+
+def test_large_replies_in_small_pieces():
+    server = FakeElectrumx(delay=0.01, chunk=7000)
+    electrumx = Electrumx(host='127.0.0.1', port=server.port)
+    big = ['ab' * 50000]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(
+            lambda i: electrumx.send('echo', big + [i])['result'],
+            range(16)))
+    assert results == [big + [i] for i in range(16)]
+
+
+def test_batches_line_up_with_their_calls():
+    server = FakeElectrumx(delay=0.01)
+    electrumx = Electrumx(host='127.0.0.1', port=server.port)
+    replies = electrumx.sendBatch([('echo', [i]) for i in range(50)])
+    assert [reply['result'] for reply in replies] == [[i] for i in range(50)]
+    assert electrumx.sendBatch([]) == []
+    assert server.batches == [50]
+
+
+def test_batch_requests_shrink_to_what_the_server_allows():
+    server = FakeElectrumx(delay=0.01, maxBatch=8)
+    electrumx = Electrumx(host='127.0.0.1', port=server.port)
+    electrumx.api.budget = RateBudget(rate=1000, burst=1000, maxRate=1000)
+    txids = [f'{i:064x}' for i in range(100)]
+    results = electrumx.api.getTransactions(txids)
+    assert results == [[txid, True] for txid in txids]
+    assert electrumx.api.budget.stats()['throttled'] > 0
+    assert max(server.batches[-3:]) <= 8
+
+
+def test_budget_paces_requests():
+    budget = RateBudget(rate=100, burst=10)
+    then = time.monotonic()
+    for _ in range(30):
+        budget.acquire()
+    # the first 10 are saved up, the other 20 come at 100 a second
+    assert 0.15 < time.monotonic() - then < 1
+    budget.throttled()
+    assert budget.rate == 50 and budget.chunk == 10
+    budget.succeeded()
+    assert budget.rate == 55 and budget.chunk > 10
+
+
+def test_scripthash_notifications_reach_their_subscription():
+    server = FakeElectrumx(delay=0.01)
+    electrumx = Electrumx(host='127.0.0.1', port=server.port)
+    notified = []
+    electrumx.subscribe('blockchain.scripthash.subscribe', ['ab'], callback=notified.append)
+    notification = {
+        'jsonrpc': '2.0',
+        'method': 'blockchain.scripthash.subscribe',
+        'params': ['ab', 'status']}
+    electrumx.handleMessage(notification)
+    assert notified == [notification]
+    assert electrumx.listenForSubscriptions('blockchain.scripthash.subscribe', ['ab']) == notification
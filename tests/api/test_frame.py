@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from satorilib.zeromq import frame
+from satorilib.zeromq.tensorcom import Connection, tenbin
+
+
+def overTheWire(arrays: list[np.ndarray]) -> list[np.ndarray]:
+    ''' what a multipart tenbin receiver gets back '''
+    return tenbin.decode_list([bytes(part) for part in tenbin.encode_list(arrays)])
+
+
+def everyDtype() -> pd.DataFrame:
+    n = 5
+    return pd.DataFrame({
+        'float64': np.arange(n) / 3,
+        'float32': np.arange(n, dtype='float32') / 3,
+        'int64': np.arange(n) * 2**40,
+        'uint32': np.arange(n, dtype='uint32'),
+        'int8': np.arange(n, dtype='int8'),
+        'bool': [True, False, True, True, False],
+        'object': ['a|b', 'ü€', None, '', 'plain'],
+        'string': pd.array(['a', None, 'c|', 'd', 'é'], dtype='string'),
+        'category': pd.Categorical(['x', 'y', 'x', None, 'y']),
+        'datetime': pd.date_range('2024-01-01', periods=n, freq='s'),
+        'datetimetz': pd.date_range('2024-01-01', periods=n, tz='US/Eastern'),
+        'timedelta': pd.to_timedelta(np.arange(n), unit='s'),
+        'Int64': pd.array([1, None, 3, 4, 5], dtype='Int64'),
+        'boolean': pd.array([True, None, False, True, True], dtype='boolean'),
+        7: np.arange(n),
+    }, index=pd.Index([f'2024-01-01 00:00:0{i}' for i in range(n)], name='ts'))
+
+
+def test_frame_round_trip_keeps_dtypes_and_index():
+    df = everyDtype()
+    pd.testing.assert_frame_equal(frame.decodeFrame(overTheWire(frame.encodeFrame(df))), df)
+    multi = df.set_index(['datetime', 'int64'])
+    pd.testing.assert_frame_equal(frame.decodeFrame(overTheWire(frame.encodeFrame(multi))), multi)
+    ranged = df.reset_index(drop=True)
+    pd.testing.assert_frame_equal(frame.decodeFrame(overTheWire(frame.encodeFrame(ranged))), ranged)
+    empty = pd.DataFrame()
+    pd.testing.assert_frame_equal(frame.decodeFrame(overTheWire(frame.encodeFrame(empty))), empty)
+
+
+def test_frame_sends_columns_as_they_are():
+    df = pd.DataFrame({'value': np.linspace(0, 1, 1000), 'text': ['a|b'] * 1000})
+    arrays = frame.encodeFrame(df)
+    assert frame.isFrame(arrays)
+    assert arrays[1].dtype == np.float64
+    # the column itself, not a copy
+    assert np.shares_memory(arrays[1], df['value'].to_numpy())
+    assert frame.decodeFrame(arrays)['text'].tolist() == ['a|b'] * 1000
+
+
+def test_strings_are_not_frames():
+    for text in ['', 'hello', 'a|b', 'ü€ 🚀']:
+        arrays = overTheWire(frame.encode(text))
+        assert not frame.isFrame(arrays)
+        assert frame.decode(arrays) == text
+
+
+def test_multipart_connection():
+    receiver = Connection('zpull+inproc://test_frame', multipart=True)
+    sender = Connection('zpush+inproc://test_frame', multipart=True)
+    df = everyDtype()
+    sender.send(frame.encode(df), allow64=True)
+    sender.send(frame.encode('a|b'), allow64=True)
+    pd.testing.assert_frame_equal(frame.decode(receiver.recv()), df)
+    assert frame.decode(receiver.recv()) == 'a|b'
+    sender.close()
+    receiver.close()
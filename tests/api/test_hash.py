@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from satorilib.utils.hash import hashIt, historyHashes, verifyHashes, verifyHashesReturnError, cleanHashes
+
+
+def rowByRow(df: pd.DataFrame, priorRowHash: str = '') -> list[str]:
+    rowHashes = []
+    for index, row in df.iterrows():
+        priorRowHash = hashIt(priorRowHash + str(index) + str(row['value']))
+        rowHashes.append(priorRowHash)
+    return rowHashes
+
+
+def test_historyHashes_matches_hashIt():
+    frames = [
+        pd.DataFrame({'value': [1, 2, 3]}, index=['a', 'b', 'c']),
+        pd.DataFrame({'value': [1, 2], 'hash': [np.nan, np.nan]}, index=[0, 1]),
+        pd.DataFrame({'value': np.array([0.1, 0.2], dtype='float32')}),
+        pd.DataFrame(
+            {'value': ['x', '1.50'], 'hash': ['', '']},
+            index=['2024-01-01 00:00:00.000000', '2024-01-01 00:00:01']),
+    ]
+    for df in frames:
+        expected = rowByRow(df)
+        assert historyHashes(df.copy())['hash'].tolist() == expected
+        assert historyHashes(df.copy(), 'abc')['hash'].tolist() == rowByRow(df, 'abc')
+
+
+def test_verifyHashes():
+    df = historyHashes(pd.DataFrame({'value': [1, 2, 3, 4]}, index=list('abcd')))
+    assert verifyHashes(df) == (True, None)
+    df.iloc[2, 1] = 'broken'
+    success, lastGood = verifyHashes(df)
+    assert not success and lastGood.index[-1] == 'b'
+    success, error = verifyHashesReturnError(df)
+    assert not success and error.index[-1] == 'c'
+    success, cleaned = cleanHashes(df)
+    assert success and cleaned.index.tolist() == ['a', 'b']
@@ -0,0 +1,103 @@
+import threading
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from satorilib.server.pooling import pooledSession, LatencyHistogram
+
+
+class FakeServer():
+    '''
+    a local keep-alive http server. each path answers with the statuses
+    queued for it (then 200), and we record which connection every request
+    arrived on.
+    '''
+
+    def __init__(self):
+        self.statuses: dict[str, list[int]] = {}
+        self.requests: list[tuple[str, str, int]] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                fake.requests.append((self.command, self.path, self.client_address[1]))
+                queued = fake.statuses.get(self.path, [])
+                status = queued.pop(0) if len(queued) > 0 else 200
+                body = str(status).encode()
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = respond
+            do_POST = respond
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def calls(self, method: str, path: str) -> int:
+        return sum(1 for m, p, _ in self.requests if (m, p) == (method, path))
+
+
+def test_connections_are_kept_alive():
+    server = FakeServer()
+    session = pooledSession(poolSize=2)
+    for _ in range(5):
+        assert session.get(server.url + '/a').ok
+    assert len({port for _, _, port in server.requests}) == 1
+    server.server.shutdown()
+
+
+def test_gateway_errors_are_retried_for_gets_only():
+    server = FakeServer()
+    session = pooledSession(retries=2, backoff=0)
+    server.statuses['/get'] = [503, 502]
+    assert session.get(server.url + '/get').status_code == 200
+    assert server.calls('GET', '/get') == 3
+    # out of retries the last status is handed back rather than raised
+    server.statuses['/exhausted'] = [503, 503, 503, 503]
+    assert session.get(server.url + '/exhausted').status_code == 503
+    assert server.calls('GET', '/exhausted') == 3
+    # a post may have been acted on, so it's never sent twice
+    server.statuses['/post'] = [503]
+    assert session.post(server.url + '/post', data='x').status_code == 503
+    assert server.calls('POST', '/post') == 1
+    # nor are statuses outside the forcelist
+    server.statuses['/missing'] = [404]
+    assert session.get(server.url + '/missing').status_code == 404
+    assert server.calls('GET', '/missing') == 1
+    server.server.shutdown()
+
+
+def test_refused_connections_are_retried_then_raised():
+    session = pooledSession(retries=2, backoff=0)
+    retry = session.get_adapter('http://').max_retries
+    assert retry.connect == 2 and retry.total == 2
+    # nothing was sent, so even a post is retried before giving up
+    try:
+        session.post('http://127.0.0.1:9/unused', data='x', timeout=1)
+        assert False, 'expected a connection error'
+    except requests.exceptions.ConnectionError as e:
+        assert 'Max retries exceeded' in str(e)
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    for ms in [1, 2, 3, 4, 30, 30, 30, 30, 30, 700]:
+        histogram.observe('/a', ms / 1000)
+    histogram.observe('/a', 0.02, failed=True)
+    snapshot = histogram.snapshot()['/a']
+    assert snapshot['count'] == 11 and snapshot['failed'] == 1
+    assert snapshot['maxMs'] == 700
+    assert snapshot['p50'] == 50 and snapshot['p95'] == 1000
+    assert snapshot['buckets']['<=5ms'] == 4
+    assert histogram.percentile('/missing', 0.5) is None
+    histogram.reset()
+    assert histogram.snapshot() == {}
@@ -0,0 +1,77 @@
+import os
+import json
+import tempfile
+import threading
+import requests
+from satorilib.server.server import SatoriServerClient
+from satorilib.server.publisher import PublishQueue
+
+
+class FakeClient():
+    def __init__(self, result=True):
+        self.result = result
+        self.sent = []
+
+    def _publish(self, **kwargs):
+        self.sent.append(kwargs)
+        return self.result
+
+
+def response(status: int) -> requests.Response:
+    r = requests.Response()
+    r.status_code = status
+    return r
+
+
+def queue(client: FakeClient, spoolPath: str) -> PublishQueue:
+    return PublishQueue(client=client, spoolPath=spoolPath, start=False)
+
+
+def test_client_errors_are_refused_not_retried():
+    assert SatoriServerClient._refused(response(400)) is False
+    assert SatoriServerClient._refused(response(404)) is False
+    assert SatoriServerClient._refused(response(401)) is None
+    assert SatoriServerClient._refused(response(429)) is None
+    assert SatoriServerClient._refused(response(503)) is None
+    assert SatoriServerClient._refused(None) is None
+    q = queue(FakeClient(result=False), None)
+    q.put('topic', 1, 't', 'h')
+    assert q.flush() == 0
+    assert q.stats()['rejected'] == 1 and q.stats()['pending'] == 0
+
+
+def test_spool_is_only_compacted_when_something_settled():
+    spoolPath = os.path.join(tempfile.mkdtemp(), 'spool.jsonl')
+    q = queue(FakeClient(), spoolPath)
+    q.flush()
+    assert not os.path.exists(spoolPath)
+    q.put('topic', 1, 't', 'h')
+    q.flush()
+    assert open(spoolPath).read() == ''
+    q.put('other', 2, 't', 'h')
+    q.client.result = None
+    q.flush()
+    # the retry settled nothing, so the spool is left as it was appended
+    lines = open(spoolPath).read().splitlines()
+    assert [json.loads(line)['put']['topic'] for line in lines] == ['other']
+    assert queue(FakeClient(), spoolPath).stats()['pending'] == 1
+
+
+def test_puts_during_compaction_are_kept():
+    spoolPath = os.path.join(tempfile.mkdtemp(), 'spool.jsonl')
+    q = queue(FakeClient(), spoolPath)
+
+    def putMany(prefix: str):
+        for i in range(200):
+            q.put(f'{prefix}{i}', i, 't', 'h')
+
+    threads = [threading.Thread(target=putMany, args=(p,)) for p in 'abc']
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        q.flush()
+    for t in threads:
+        t.join()
+    restarted = queue(FakeClient(), spoolPath)
+    assert restarted.stats()['pending'] == q.stats()['pending']
+    assert q.stats()['accepted'] + q.stats()['pending'] == 600
@@ -0,0 +1,45 @@
+import threading
+from satorilib.pubsub.pubsub import SatoriPubSubConn
+from satorilib.pubsub.dispatch import Dispatcher
+
+
+class FakeWs():
+    def __init__(self):
+        self.connected = True
+        self.sent = []
+
+    def send(self, payload: str):
+        self.sent.append(payload)
+
+    def close(self):
+        self.connected = False
+
+
+def test_restarts_keep_one_dispatcher():
+    received = []
+    conn = SatoriPubSubConn(
+        uid='uid', payload='key', router=received.append, threaded=False)
+    dispatcher = conn.dispatcher
+    before = threading.active_count()
+    for _ in range(3):
+        conn.restart()
+    assert conn.dispatcher is dispatcher
+    assert threading.active_count() == before
+    conn.dispatcher.put('message')
+    conn.ws = FakeWs()
+    conn.disconnect()
+    # stopping drains, so the message arrives exactly once
+    assert received == ['message']
+    assert not any(thread.is_alive() for thread in dispatcher.threads)
+
+
+def test_given_dispatchers_are_left_running():
+    dispatcher = Dispatcher(router=lambda message: None)
+    conn = SatoriPubSubConn(
+        uid='uid', payload='key', threaded=False, dispatcher=dispatcher)
+    conn.restart()
+    conn.ws = FakeWs()
+    conn.disconnect()
+    assert conn.dispatcher is dispatcher
+    assert all(thread.is_alive() for thread in dispatcher.threads)
+    dispatcher.stop()
@@ -0,0 +1,76 @@
+import tempfile
+from satorilib.concepts import StreamId
+from satorilib.disk.cache import Cache
+from satorilib.disk.registry import CacheRegistry
+
+
+def stream(name: str) -> StreamId:
+    return StreamId(source='test', author='author', stream=name, target='target')
+
+
+def fill(loc: str, streamId: StreamId, rows: int = 50):
+    cache = Cache(id=streamId, loc=loc)
+    for second in range(rows):
+        cache.appendByAttributes(
+            str(second), f'2024-01-01 00:{second // 60:02d}:{second % 60:02d}.000000')
+
+
+def registry(names: str, budgetStreams: float) -> CacheRegistry:
+    ''' a registry with a budget of about budgetStreams filled streams '''
+    loc = tempfile.mkdtemp()
+    for name in names:
+        fill(loc, stream(name))
+    one = Cache(id=stream(names[0]), loc=loc).memoryUsage()
+    return CacheRegistry(budget=int(one * budgetStreams), loc=loc)
+
+
+def resident(caches: CacheRegistry) -> list[str]:
+    return [
+        streamId.stream for streamId, cache in caches.caches.items()
+        if not cache.unloaded]
+
+
+def test_one_cache_per_stream_in_recency_order():
+    caches = registry('abc', budgetStreams=10)
+    a = caches.get(stream('a'))
+    caches.get(stream('b'))
+    caches.get(stream('c'))
+    assert caches.get(stream('a')) is a
+    assert [streamId.stream for streamId in caches.caches] == ['b', 'c', 'a']
+    assert caches.stats()['hits'] == 1 and caches.stats()['misses'] == 3
+    assert caches.stats()['evictions'] == 0
+
+
+def test_least_recently_used_are_evicted_over_budget():
+    caches = registry('abcd', budgetStreams=2.5)
+    caches.get(stream('a'))
+    caches.get(stream('b'))
+    caches.get(stream('a'))
+    caches.get(stream('c'))
+    # b was used least recently
+    assert resident(caches) == ['a', 'c']
+    caches.get(stream('d'))
+    assert resident(caches) == ['c', 'd']
+    assert caches.bytes() <= caches.budget
+    assert caches.stats()['evictions'] == 2
+    # a stream is never evicted to make room for itself
+    caches.budget = 0
+    caches.get(stream('c'))
+    assert resident(caches) == ['c']
+
+
+def test_evicted_caches_are_readmitted_with_their_data():
+    caches = registry('ab', budgetStreams=1.5)
+    a = caches.get(stream('a'))
+    rows = list(a.df.index)
+    caches.get(stream('b'))
+    assert a.unloaded and resident(caches) == ['b']
+    misses = caches.stats()['misses']
+    assert caches.get(stream('a')) is a
+    assert not a.unloaded and list(a.df.index) == rows
+    assert caches.stats()['misses'] == misses + 1
+    assert resident(caches) == ['a']
+    # appends through an unloaded cache land on disk and read back
+    caches.evict(stream('a'))
+    assert a.appendByAttributes('new', '2024-01-01 01:00:00.000000').success
+    assert list(caches.get(stream('a')).df['value'].astype(str))[-1] == 'new'
@@ -0,0 +1,69 @@
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from satorilib.sqlite import Sqlite, sql_io
+from satorilib.disk.filetypes.sqlite import SqliteManager
+
+
+def test_results_are_read_before_the_connection_is_returned():
+    database = os.path.join(tempfile.mkdtemp(), 'pool.db')
+    sql_io.execute(
+        query='create table data (ts integer primary key, value real);',
+        database=database)
+    inserted = sql_io.execute(
+        query='insert into data values (?, ?)', params=[1, 1.0], database=database)
+    assert inserted.rowcount == 1 and inserted.lastrowid == 1
+    for i in range(2, 200):
+        sql_io.execute(query='insert into data values (?, ?)', params=[i, float(i)], database=database)
+
+    def select(i: int) -> list:
+        result = sql_io.execute(
+            query='select ts, value from data where ts <= ? order by ts',
+            params=[i],
+            database=database)
+        # read long after the connection went back to the pool
+        first = result.fetchone()
+        return [first] + list(result)
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(select, range(1, 200)))
+    assert results == [[(ts, float(ts)) for ts in range(1, i + 1)] for i in range(1, 200)]
+    sql_io.close(database)
+
+
+def test_close_reaches_borrowed_connections():
+    pool = sql_io.ConnectionPool(os.path.join(tempfile.mkdtemp(), 'pool.db'), size=2)
+    with pool.connection() as idle:
+        pass
+    with pool.connection() as borrowed:
+        pool.close()
+        # still usable by whoever has it
+        assert borrowed.execute('select 1').fetchone() == (1,)
+    for conn in [idle, borrowed]:
+        try:
+            conn.execute('select 1')
+            assert False, 'connection left open'
+        except Exception as e:
+            assert 'closed' in str(e)
+    # and the pool can still be used afterwards
+    with pool.connection() as conn:
+        assert conn.execute('select 1').fetchone() == (1,)
+    pool.close()
+
+
+def test_empty_frames_create_their_tables():
+    folder = tempfile.mkdtemp()
+    empty = pd.DataFrame({'value': [], 'hash': []}, index=pd.Index([], name='id'))
+    sql = Sqlite(database=os.path.join(folder, 'load.db'), index_col='id')
+    assert sql.load(empty.copy(), table='stream') == 0
+    assert sql.read(query='select * from stream').columns.tolist() == ['value', 'hash']
+    assert sql.load(pd.DataFrame({'value': [1.0], 'hash': ['a']}, index=pd.Index(['2024'], name='id')), table='stream') == 1
+    assert len(sql.read(query='select * from stream')) == 1
+    sql.close()
+    manager = SqliteManager('sqlite:///' + os.path.join(folder, 'manager.db'))
+    for table, store in [('written', manager.write), ('appended', manager.append)]:
+        assert store(table, empty.copy())
+        assert manager.read(table).columns.tolist() == ['value', 'hash']
+        assert manager.append(table, pd.DataFrame({'value': [1.0], 'hash': ['a']}, index=['2024']))
+        assert manager.read(table)['value'].tolist() == [1.0]
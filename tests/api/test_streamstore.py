@@ -0,0 +1,122 @@
+import os
+import tempfile
+import pandas as pd
+from satorilib.concepts import StreamId
+from satorilib.disk.cache import Cache
+from satorilib.disk.filetypes.streamstore import SqliteStreamStore, migrateCsvDirectories
+from satorilib.disk.sqlitecache import SqliteCache
+from satorilib.utils.hash import historyHashes
+
+streamId = StreamId(source='test', author='author', stream='stream', target='target')
+
+
+def times(*seconds: int) -> list[str]:
+    return [f'2024-01-01 00:00:{second:02d}.000000' for second in seconds]
+
+
+def frame(values: list, index: list[str]) -> pd.DataFrame:
+    return historyHashes(pd.DataFrame({'value': values}, index=index))
+
+
+def database() -> str:
+    return os.path.join(tempfile.mkdtemp(), 'streams.db')
+
+
+def test_writes_and_appends_read_back():
+    store = SqliteStreamStore(database())
+    first = frame([1.5, 2.5], times(0, 1))
+    assert store.write('key', first)
+    assert store.append('key', pd.DataFrame(
+        {'value': [3.5], 'hash': ['abc']}, index=times(2)))
+    read = store.read('key')
+    assert list(read.index) == times(0, 1, 2)
+    assert list(read['value']) == [1.5, 2.5, 3.5]
+    assert list(read['hash']) == list(first['hash']) + ['abc']
+    assert list(store.readLines('key', start=1, end=3).index) == times(1, 2)
+    # write replaces the whole series, other streams are left alone
+    assert store.append('other', first)
+    assert store.write('key', frame([9.0], times(5)))
+    assert list(store.read('key').index) == times(5)
+    assert store.count('other') == 2
+    assert sorted(store.streams()) == ['key', 'other']
+    assert store.read('missing') is None
+
+
+def test_time_range_queries():
+    store = SqliteStreamStore(database())
+    # appended out of order, the primary key keeps them sorted
+    store.append('key', frame([5.0, 6.0, 7.0], times(5, 6, 7)))
+    store.append('key', frame([1.0, 2.0, 3.0, 4.0], times(1, 2, 3, 4)))
+    assert list(store.range('key', start=times(2)[0], end=times(4)[0]).index) == times(2, 3, 4)
+    assert list(store.range(
+        'key', start=times(2)[0], end=times(4)[0],
+        includeStart=False, includeEnd=False).index) == times(3)
+    assert list(store.latest('key', n=2).index) == times(6, 7)
+    assert list(store.before('key', times(3)[0], n=2).index) == times(1, 2)
+    assert list(store.after('key', times(3)[0]).index) == times(4)
+    assert list(store.exact('key', times(3)[0])['value']) == [3.0]
+    assert store.hashBefore('key', times(1)[0]) == ''
+    assert store.hashBefore('key', times(3)[0]) == store.exact('key', times(2)[0])['hash'].values[0]
+    assert [list(chunk.index) for chunk in store.iterate('key', rows=3)] == [
+        times(1, 2, 3), times(4, 5, 6), times(7)]
+    assert store.removeRange('key', start=times(6)[0]) == 2
+    assert list(store.latest('key').index) == times(5)
+    plan = store._query(
+        'explain query plan select ts, value, hash from observations'
+        ' where stream_id = ? and ts >= ? order by ts', ['key', times(2)[0]])
+    assert 'primary key' in ' '.join(str(row[-1]) for row in plan).lower()
+
+
+def test_later_rows_win_a_duplicate_timestamp():
+    store = SqliteStreamStore(database())
+    store.append('key', pd.DataFrame({'value': [1.0], 'hash': ['a']}, index=times(0)))
+    store.append('key', pd.DataFrame({'value': [2.0], 'hash': ['b']}, index=times(0)))
+    store.append('key', pd.DataFrame(
+        {'value': [3.0, 4.0], 'hash': ['c', 'd']}, index=times(1, 1)))
+    read = store.read('key')
+    assert list(read.index) == times(0, 1)
+    assert list(read['value']) == [2.0, 4.0]
+    assert list(read['hash']) == ['b', 'd']
+
+
+def test_reopening_a_database_keeps_its_streams():
+    path = database()
+    store = SqliteStreamStore(path)
+    store.write('key', frame([1.0, 2.0], times(0, 1)))
+    store.pool.close()
+    reopened = SqliteStreamStore(path)
+    assert list(reopened.read('key')['value']) == [1.0, 2.0]
+    assert reopened.append('key', frame([3.0], times(2)))
+    assert reopened.count('key') == 3
+
+
+def test_cache_appends_chain_and_validate():
+    path = database()
+    cache = SqliteCache(id=streamId, store=SqliteStreamStore(path))
+    for second in [0, 1, 2, 4]:
+        result = cache.appendByAttributes(str(second), times(second)[0], hashThis=True)
+        assert result.success and result.validated
+    assert not cache.appendByAttributes('x', times(4)[0], hashThis=True).success
+    assert cache.getLatestObservationTime() == times(4)[0]
+    assert list(cache.search(times(2)[0], before=True).index) == times(0, 1)
+    assert list(cache.getObservationAfter(times(2)[0]).index) == times(4)
+    reopened = SqliteCache(id=streamId, store=SqliteStreamStore(path))
+    assert reopened.getRowCounts() == 4
+    assert reopened.performValidation(entire=True) == (True, None)
+    # an insert in the middle rehashes the rows after it
+    inserted = reopened.appendByAttributes('3', times(3)[0], hashThis=True)
+    assert inserted.success and inserted.validated
+    assert reopened.performValidation(entire=True) == (True, None)
+    assert list(reopened.df['value']) == ['0', '1', '2', '3', '4']
+
+
+def test_migrated_csv_streams_still_validate():
+    loc = tempfile.mkdtemp()
+    csvCache = Cache(id=streamId, loc=loc)
+    for second, value in enumerate(['1.5', '2.5', '3.25']):
+        csvCache.appendByAttributes(value, times(second)[0], hashThis=True)
+    path = os.path.join(loc, 'streams.db')
+    assert all(migrateCsvDirectories(loc, path).values())
+    cache = SqliteCache(id=streamId, store=SqliteStreamStore(path))
+    assert cache.performValidation(entire=True) == (True, None)
+    assert list(cache.df['hash']) == list(csvCache.df['hash'])
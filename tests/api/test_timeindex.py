@@ -0,0 +1,98 @@
+import tempfile
+import pandas as pd
+from satorilib.concepts import StreamId
+from satorilib.disk import memory
+from satorilib.disk.cache import Cache
+from satorilib.disk.timeindex import TimeIndex, search
+
+streamId = StreamId(source='test', author='author', stream='stream', target='target')
+
+
+def frame(index: list) -> pd.DataFrame:
+    return pd.DataFrame({'value': range(len(index)), 'hash': ''}, index=index)
+
+
+def masked(df: pd.DataFrame, time: str) -> list[list]:
+    ''' what before, after and exact were before they binary searched '''
+    return [
+        list(df[df.index < time].index),
+        list(df[df.index > time].index),
+        list(df[df.index == time].index)]
+
+
+def searched(df: pd.DataFrame, time: str, times: TimeIndex = None) -> list[list]:
+    return [
+        list(search(df, time, before=True, times=times).index),
+        list(search(df, time, after=True, times=times).index),
+        list(search(df, time, exact=True, times=times).index)]
+
+
+sortedTimes = [f'2024-01-01 00:00:0{i}.000000' for i in range(5)]
+indexes = {
+    'sorted': sortedTimes,
+    'unsorted': [sortedTimes[i] for i in (3, 0, 4, 1, 2)],
+    'timezones': [
+        '2024-01-01 00:00:00+02:00',
+        '2024-01-01 00:00:01+00:00',
+        '2024-01-01 01:00:00+05:00',
+        '2024-01-01 03:00:00-01:00'],
+    'mixedFormats': [
+        '2024-01-01 00:00:02',
+        '2024-01-01 00:00:03.000000',
+        '2024-01-01T00:00:01',
+        '2024-01-02'],
+    'unparseable': ['not a time', 'still not', 'zzz'],
+}
+probes = [
+    '2024-01-01 00:00:02.000000',
+    '2024-01-01 00:00:01+00:00',
+    '2024-01-01T00:00:02',
+    '2024-01-01 00:30:00+01:00',
+    'still not',
+    '']
+
+
+def test_every_path_selects_the_masked_rows():
+    for name, index in indexes.items():
+        df = frame(index)
+        for time in probes:
+            expected = masked(df, time)
+            assert searched(df, time) == expected, (name, time)
+            assert searched(df, time, TimeIndex(df.index)) == expected, (name, time)
+            assert [
+                list(memory.search(df, time, **{side: True}).index)
+                for side in ('before', 'after', 'exact')] == expected, (name, time)
+
+
+def test_only_sorted_string_indexes_are_usable():
+    assert TimeIndex(pd.Index(indexes['sorted'])).usable
+    assert TimeIndex(pd.Index(indexes['unparseable'])).usable
+    assert not TimeIndex(pd.Index(indexes['unsorted'])).usable
+    assert not TimeIndex(pd.to_datetime(pd.Index(indexes['sorted']))).usable
+    assert TimeIndex(pd.Index([])).usable
+
+
+def test_appends_extend_the_index_until_one_is_out_of_order():
+    times = TimeIndex(pd.Index(sortedTimes[:2]))
+    for time in sortedTimes[2:]:
+        times.append(time)
+    assert times.usable and times.size == 5
+    assert times.bounds(sortedTimes[3]) == (3, 4)
+    times.append(sortedTimes[1])
+    assert not times.usable and times.bounds(sortedTimes[3]) is None
+    # once off it stays off, the owner rebuilds it from the frame
+    times.append('2025-01-01 00:00:00.000000')
+    assert not times.usable
+
+
+def test_cache_search_keeps_up_with_appends():
+    cache = Cache(id=streamId, loc=tempfile.mkdtemp())
+    for time in sortedTimes:
+        cache.appendByAttributes('1', time)
+        assert cache.times.usable
+    assert list(cache.search(sortedTimes[2], before=True).index) == sortedTimes[:2]
+    assert cache.times.size == 5
+    cache.appendByAttributes('1', '2024-01-01 00:00:01.500000')
+    assert list(cache.search(sortedTimes[2], before=True).index) == [
+        sortedTimes[0], sortedTimes[1], '2024-01-01 00:00:01.500000']
+    assert cache.getHashBefore(sortedTimes[0]) == ''
@@ -0,0 +1,67 @@
+import os
+import time
+import tempfile
+from types import SimpleNamespace
+from satorilib.wallet.concepts.store import TransactionStore
+from satorilib.wallet.concepts.transaction import TransactionStruct
+
+
+def tx(txid: str, confirmed: bool = True, parents: list[str] = None) -> dict:
+    raw = {
+        'txid': txid,
+        'vin': [{'txid': parent, 'vout': 0} for parent in parents or []],
+        'vout': [{'n': 0, 'value': 1.0, 'scriptPubKey': {'addresses': ['E1']}}]}
+    if confirmed:
+        raw.update({'blockhash': 'b' * 64, 'confirmations': 3})
+    return raw
+
+
+class Fetcher():
+    def __init__(self):
+        self.asked = []
+
+    def __call__(self, txids: list[str]) -> list[dict]:
+        self.asked.append(list(txids))
+        return [tx(txid) for txid in txids]
+
+
+def test_fetch_reads_through_and_persists():
+    database = os.path.join(tempfile.mkdtemp(), 'transactions.db')
+    store = TransactionStore(database)
+    fetcher = Fetcher()
+    assert [raw['txid'] for raw in store.fetch(['a', 'b', 'a'], fetcher)] == ['a', 'b', 'a']
+    assert store.fetch(['a', 'b', 'c'], fetcher)[2]['txid'] == 'c'
+    assert fetcher.asked == [['a', 'b'], ['c']]
+    # another wallet, or another process, using the same database
+    fresh = TransactionStore(database)
+    assert fresh.get('b') == tx('b')
+    assert fresh.stats()['disk'] == 1
+    fresh.fetch(['a', 'b', 'c'], fetcher)
+    assert fetcher.asked == [['a', 'b'], ['c']]
+
+
+def test_unconfirmed_transactions_expire():
+    store = TransactionStore(ttl=0.05)
+    store.putMany([tx('confirmed'), tx('mempool', confirmed=False)])
+    assert 'confirmed' in store and 'mempool' in store
+    time.sleep(0.1)
+    assert 'confirmed' in store
+    assert 'mempool' not in store
+
+
+def test_memory_is_bounded():
+    store = TransactionStore(capacity=10)
+    store.putMany([tx(str(i)) for i in range(25)])
+    assert store.stats()['cached'] == 10
+    assert store.get('0') is None and store.get('24') is not None
+
+
+def test_supporting_transactions_come_from_the_store():
+    store = TransactionStore()
+    store.putMany([tx('p1'), tx('p2')])
+    child = TransactionStruct(raw=tx('child', parents=['p1', 'p2']), vinVoutsTxids=['p1', 'p2'])
+    fetcher = Fetcher()
+    electrumx = SimpleNamespace(api=SimpleNamespace(getTransactions=fetcher))
+    child.getSupportingTransactions(electrumx, store=store)
+    assert [parent['txid'] for parent in child.vinVoutsTxs] == ['p1', 'p2']
+    assert fetcher.asked == []
@@ -0,0 +1,95 @@
+import os
+import tempfile
+from satorilib.wallet.evrmore.wallet import EvrmoreWallet
+
+
+def script(txid: str, n: int) -> str:
+    return f'76a914{txid[:40]}{n:02x}88ac'
+
+
+def raw(txid: str, outputs: int = 3) -> dict:
+    return {
+        'txid': txid,
+        'vin': [],
+        'vout': [
+            {'n': n, 'value': 1.0, 'scriptPubKey': {'hex': script(txid, n)}}
+            for n in range(outputs)]}
+
+
+class FakeApi():
+    def __init__(self):
+        self.currency = []
+        self.assets = []
+        self.asked = []
+
+    def getUnspentCurrency(self, scripthash: str) -> list[dict]:
+        return [dict(u) for u in self.currency]
+
+    def getUnspentAssets(self, scripthash: str) -> list[dict]:
+        return [dict(u) for u in self.currency + self.assets]
+
+    def getTransactions(self, txids: list[str]) -> list[dict]:
+        self.asked.append(list(txids))
+        return [raw(txid) for txid in txids]
+
+
+class FakeElectrumx():
+    def __init__(self):
+        self.api = FakeApi()
+
+    def ensureConnected(self) -> bool:
+        return True
+
+
+def currency(txid: str, pos: int, value: int) -> dict:
+    return {'tx_hash': txid, 'tx_pos': pos, 'value': value, 'height': 1}
+
+
+def satori(txid: str, pos: int, value: int) -> dict:
+    return {**currency(txid, pos, value), 'asset': 'SATORI', 'name': 'SATORI'}
+
+
+def wallet() -> EvrmoreWallet:
+    return EvrmoreWallet(
+        os.path.join(tempfile.mkdtemp(), 'wallet.yaml'),
+        electrumx=FakeElectrumx(),
+        skipSave=True)
+
+
+def test_unspents_are_indexed_by_outpoint():
+    w = wallet()
+    api = w.electrumx.api
+    api.currency = [currency(f'{i:064x}', i % 3, 1000 - i) for i in range(300)]
+    api.assets = [satori('a' * 64, 0, 5), satori('a' * 64, 1, 0)]
+    w.getUnspents()
+    assert w.getUnspentSignatures()
+    # one batch for every transaction we were missing
+    assert len(api.asked) == 1 and len(api.asked[0]) == 301
+    assert w.utxos[('a' * 64, 0)]['scriptPubKey'] == script('a' * 64, 0)
+    assert all(
+        u['scriptPubKey'] == script(u['tx_hash'], u['tx_pos'])
+        for u in w.unspentCurrency + w.unspentAssets)
+    assert [u['value'] for u in w.spendableUnspents()][:3] == [701, 702, 703]
+    assert [u['value'] for u in w.spendableUnspents('SATORI')] == [5]
+
+
+def test_notifications_only_resolve_new_outputs():
+    w = wallet()
+    api = w.electrumx.api
+    coin = 100_000_000
+    api.currency = [currency('b' * 64, 0, coin), currency('c' * 64, 1, 2 * coin)]
+    w.getUnspents()
+    w.getUnspentSignatures()
+    # c was spent, d arrived
+    api.currency = [currency('b' * 64, 0, coin), currency('d' * 64, 2, 3 * coin)]
+    w.getUnspents()
+    assert set(w.utxos) == {('b' * 64, 0), ('d' * 64, 2)}
+    assert w.utxos[('b' * 64, 0)]['scriptPubKey'] == script('b' * 64, 0)
+    w.getUnspentSignatures()
+    assert api.asked[-1] == ['d' * 64]
+    gathered, sats = w._gatherCurrencyUnspents(sats=2 * coin)
+    assert sats == sum(u['value'] for u in gathered)
+    txins, scripts = w._compileInputs(gatheredCurrencyUnspents=gathered)
+    assert [bytes(s) for s in scripts] == [
+        bytes.fromhex(w.utxos[(u['tx_hash'], u['tx_pos'])]['scriptPubKey'])
+        for u in gathered]
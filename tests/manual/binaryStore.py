@@ -0,0 +1,45 @@
+''' read / append timings of the binary store against the csv manager '''
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from satorilib.utils.hash import historyHashes
+from satorilib.disk.filetypes.csv import CSVManager
+from satorilib.disk.filetypes.binary import BinaryManager
+
+
+def generate(rows: int, start: str = '2020-01-01') -> pd.DataFrame:
+    index = pd.date_range(start, periods=rows, freq='S').strftime(
+        '%Y-%m-%d %H:%M:%S.%f')
+    return historyHashes(pd.DataFrame(
+        {'value': np.random.default_rng(0).random(rows) * 1000},
+        index=index))
+
+
+def timed(fn) -> float:
+    then = time.time()
+    fn()
+    return time.time() - then
+
+
+folder = tempfile.mkdtemp()
+csv = CSVManager()
+binary = BinaryManager()
+csvPath = os.path.join(folder, 'aggregate.csv')
+binPath = os.path.join(folder, 'aggregate.bin')
+for rows in [10_000, 1_000_000]:
+    df = generate(rows)
+    tick = generate(1, start='2030-01-01')
+    csv.write(csvPath, df)
+    binary.write(binPath, df)
+    print(f'{rows:>10,} rows  csv read:      {timed(lambda: csv.read(csvPath)):.4f}s')
+    print(f'{rows:>10,} rows  bin read:      {timed(lambda: binary.read(binPath)):.4f}s')
+    print(f'{rows:>10,} rows  csv append:    {timed(lambda: csv.append(csvPath, tick)):.4f}s')
+    print(f'{rows:>10,} rows  bin append:    {timed(lambda: binary.append(binPath, tick)):.4f}s')
+    print(f'{rows:>10,} rows  csv last line: {timed(lambda: csv.readLines(csvPath, rows)):.4f}s')
+    print(f'{rows:>10,} rows  bin tail:      {timed(lambda: binary.tail(binPath)):.4f}s')
+    print(f'{rows:>10,} rows  csv size:      {os.path.getsize(csvPath):,} bytes')
+    print(f'{rows:>10,} rows  bin size:      {binary.count(binPath) * binary.record.itemsize:,} bytes')
+shutil.rmtree(folder)
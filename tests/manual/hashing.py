@@ -0,0 +1,47 @@
+''' compares the row by row hash chain against the batch engine in utils.hash '''
+import sys
+import time
+import numpy as np
+import pandas as pd
+from satorilib.utils.hash import hashIt, historyHashes, verifyHashes
+
+
+def legacyHistoryHashes(df: pd.DataFrame, priorRowHash: str = None) -> pd.DataFrame:
+    ''' the original iterrows implementation, kept here as the reference '''
+    priorRowHash = priorRowHash or ''
+    rowHashes = []
+    for index, row in df.iterrows():
+        rowStr = priorRowHash + str(index) + str(row['value'])
+        rowHash = hashIt(rowStr)
+        rowHashes.append(rowHash)
+        priorRowHash = rowHash
+    df['hash'] = rowHashes
+    return df
+
+
+def generate(rows: int) -> pd.DataFrame:
+    index = pd.date_range('2020-01-01', periods=rows, freq='s').strftime(
+        '%Y-%m-%d %H:%M:%S.%f')
+    return pd.DataFrame(
+        {'value': np.random.default_rng(0).random(rows) * 1000},
+        index=index)
+
+
+def timed(fn) -> float:
+    then = time.time()
+    fn()
+    return time.time() - then
+
+
+# the legacy path takes minutes at 10M rows; pass a smaller cap to skip it
+legacyCap = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+
+for rows in [10_000, 1_000_000, 10_000_000]:
+    df = generate(rows)
+    batch = historyHashes(df.copy())
+    print(f'{rows:>10,} rows  batch:   {timed(lambda: historyHashes(df.copy())):.2f}s')
+    print(f'{rows:>10,} rows  verify:  {timed(lambda: verifyHashes(batch)):.2f}s')
+    if rows <= legacyCap:
+        legacy = legacyHistoryHashes(df.copy())
+        print(f'{rows:>10,} rows  legacy:  {timed(lambda: legacyHistoryHashes(df.copy())):.2f}s')
+        assert legacy['hash'].tolist() == batch['hash'].tolist()
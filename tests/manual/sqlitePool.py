@@ -0,0 +1,50 @@
+''' single row insert and point read latency: connect per call vs the pool '''
+import os
+import time
+import sqlite3
+import tempfile
+from satorilib.sqlite import Sqlite
+from satorilib.sqlite import sql_io
+
+rows = 2000
+folder = tempfile.mkdtemp()
+create = 'create table data (ts text primary key, value real);'
+
+
+def connectPerCall(database: str):
+    ''' how sql_io talked to the database before it pooled connections '''
+    with sqlite3.connect(database) as conn:
+        conn.executescript(create)
+    then = time.time()
+    for i in range(rows):
+        with sqlite3.connect(database) as conn:
+            conn.execute('insert into data values (?, ?)', (f'{i:08d}', float(i)))
+    insert = (time.time() - then) / rows
+    then = time.time()
+    for i in range(rows):
+        with sqlite3.connect(database) as conn:
+            conn.execute('select value from data where ts = ?', (f'{i:08d}',)).fetchone()
+    point = (time.time() - then) / rows
+    return insert, point
+
+
+def pooled(database: str):
+    with Sqlite(database=database, initialize=create) as sql:
+        then = time.time()
+        for i in range(rows):
+            sql.write(query='insert into data values (?, ?)', params=(f'{i:08d}', float(i)))
+        insert = (time.time() - then) / rows
+        then = time.time()
+        for i in range(rows):
+            sql_io.execute(
+                query='select value from data where ts = ?',
+                params=(f'{i:08d}',),
+                database=database).fetchone()
+        point = (time.time() - then) / rows
+    sql.close()
+    return insert, point
+
+
+for name, fn in [('connect per call', connectPerCall), ('pooled', pooled)]:
+    insert, point = fn(os.path.join(folder, name.replace(' ', '') + '.db'))
+    print(f'{name:>16}  insert: {insert * 1e6:8.1f}us  point read: {point * 1e6:8.1f}us')
@@ -0,0 +1,81 @@
+''' DataFrame over tenbin: the old '|' joined, downcast path vs the columnar frame '''
+import time
+import numpy as np
+import pandas as pd
+from satorilib.zeromq import frame
+from satorilib.zeromq.tensorcom import Connection, tenbin
+
+
+def legacyEncode(df: pd.DataFrame) -> list[np.ndarray]:
+    ''' how ZeroMQClient.dataframeToNumpyArrays encoded before the frame codec '''
+    arrays = []
+    arrays.append(np.array(list('|'.join(df.columns).encode('utf-8')), dtype=np.uint8))
+    arrays.append(np.array(list('|'.join(str(dt) for dt in df.dtypes).encode('utf-8')), dtype=np.uint8))
+    for col in df.columns:
+        if df[col].dtype in [np.float64, np.float32]:
+            arr = df[col].to_numpy(dtype=np.float32)
+        elif df[col].dtype in [np.int64, np.int32, np.int16, np.int8]:
+            arr = df[col].to_numpy(dtype=np.int32)
+        else:
+            arr = np.array(list('|'.join(df[col].fillna('').astype(str)).encode('utf-8')), dtype=np.uint8)
+        arrays.append(arr)
+    return arrays
+
+
+def legacyDecode(arrays: list[np.ndarray]) -> pd.DataFrame:
+    colNames = arrays[0].tobytes().decode('utf-8').split('|')
+    dtypeInfo = arrays[1].tobytes().decode('utf-8').split('|')
+    data = {}
+    for i, (colName, dtypeStr) in enumerate(zip(colNames, dtypeInfo)):
+        arr = arrays[i + 2]
+        if 'float' in dtypeStr or 'int' in dtypeStr:
+            data[colName] = arr
+        else:
+            data[colName] = arr.tobytes().decode('utf-8').split('|')
+    return pd.DataFrame(data)
+
+
+def legacy(df: pd.DataFrame) -> pd.DataFrame:
+    ''' single part message: everything copied into one buffer '''
+    return legacyDecode(tenbin.decode_buffer(bytes(tenbin.encode_buffer(legacyEncode(df)))))
+
+
+def columnar(df: pd.DataFrame) -> pd.DataFrame:
+    ''' multipart message: the header and each column are their own part '''
+    return frame.decodeFrame(tenbin.decode_list([bytes(part) for part in tenbin.encode_list(frame.encodeFrame(df))]))
+
+
+def timeIt(fn, df: pd.DataFrame, repeat: int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        then = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - then)
+    return best
+
+
+for rows in [1_000, 10_000, 100_000, 1_000_000]:
+    df = pd.DataFrame({
+        'value': np.random.random(rows),
+        'count': np.arange(rows),
+        'hash': [f'{i:016x}' for i in range(rows)]})
+    # legacy drops the index, so keep a RangeIndex (which costs nothing) to compare like for like
+    mb = df.memory_usage(deep=True).sum() / 1e6
+    old = timeIt(legacy, df)
+    new = timeIt(columnar, df)
+    print(
+        f'{rows:>9} rows {mb:8.1f}MB  '
+        f'legacy: {old * 1000:9.1f}ms  '
+        f'columnar: {new * 1000:8.1f}ms ({mb / new:7.1f}MB/s)  '
+        f'{old / new:6.1f}x')
+
+# the same frame through a real multipart socket pair
+receiver = Connection('zpull+inproc://zeromqFrame', multipart=True)
+sender = Connection('zpush+inproc://zeromqFrame', multipart=True)
+df = pd.DataFrame({'value': np.random.random(1_000_000), 'count': np.arange(1_000_000)})
+then = time.perf_counter()
+for _ in range(20):
+    sender.send(frame.encodeFrame(df), allow64=True)
+    frame.decodeFrame(receiver.recv())
+elapsed = (time.perf_counter() - then) / 20
+print(f'inproc 1M numeric rows: {elapsed * 1000:.1f}ms per frame ({df.memory_usage().sum() / 1e6 / elapsed:.0f}MB/s)')